@@ -4,12 +4,16 @@ AgentSwarm Dashboard -- Rich Terminal UI
 =========================================
 Real-time monitoring for the massively parallel autonomous coding system.
 Reads NDJSON from the TypeScript orchestrator and renders a fullscreen
-multi-panel dashboard at 2 Hz.
+multi-panel dashboard at 2 Hz.  Events are ingested on a dedicated thread,
+so a slow render never throttles how fast the event stream is consumed.
 
 Usage:
     python dashboard.py --demo                  # synthetic data (no orchestrator needed)
     python dashboard.py --demo --agents 100     # demo with 100 agent slots
     node packages/orchestrator/dist/main.js | python dashboard.py --stdin
+    python dashboard.py --replay gource/terminal-logs/run-*.ndjson --speed 60
+    python dashboard.py --replay run.ndjson --speed max --seek +2h30m
+    python dashboard.py --sglang-metrics https://...modal.direct   # + inference server panel
     python dashboard.py                         # spawns orchestrator subprocess
 Controls:
     + / -                                       # zoom planner tree levels in/out
@@ -19,7 +23,9 @@ Controls:
 from __future__ import annotations
 
 import argparse
-import json
+import asyncio
+import bisect
+import mmap
 import os
 import queue
 import random
@@ -31,7 +37,9 @@ import termios
 import threading
 import time
 import tty
+import weakref
 from collections import deque
+from collections.abc import Iterator, Mapping
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -40,6 +48,7 @@ try:
     from rich.layout import Layout
     from rich.live import Live
     from rich.panel import Panel
+    from rich.segment import Segment
     from rich.table import Table
     from rich.text import Text
     from rich.tree import Tree
@@ -47,6 +56,9 @@ except ImportError:
     print("Rich library required.  pip install rich")
     sys.exit(1)
 
+from event_decoder import EventDecoder
+from event_router import EventRouter
+
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -54,13 +66,94 @@ except ImportError:
 
 MAX_ACTIVITY = 50
 COST_PER_1K = 0.001          # default $/1K tokens -- override with --cost-rate
+INGEST_BUDGET = 0.05         # max seconds the ingest thread holds the state lock
+
+INGEST_FRAME = 5000          # max queued events coalesced and ingested as one frame
+
+REPLAY_INDEX_STRIDE = 1 << 20  # bytes between sparse replay index entries
+REPLAY_QUEUE_MAX = 20000       # events buffered ahead of ingest during replay
+
+# Messages whose only lasting effect is superseded by a later event with the
+# same message and task: Metrics carries a full snapshot, the rest only touch
+# the tree node and lag.  Within a frame only the latest of each is ingested.
+COALESCED_MESSAGES = frozenset({
+    "Metrics",
+    "Worker progress",
+    "Worker output",
+    "Loop tick",
+    "Merge queue tick",
+    "Monitor poll",
+})
 
 
 # ---------------------------------------------------------------------------
 # Planner Tree State -- recursive root/planner/subplanner hierarchy
 # ---------------------------------------------------------------------------
 
+STATUS_PROGRESS = {
+    "idle": 0.0,
+    "pending": 0.1,
+    "assigned": 0.25,
+    "running": 0.6,
+    "complete": 1.0,
+    "failed": 1.0,
+    "cancelled": 1.0,
+}
+ACTIVE_STATUSES = ("pending", "assigned", "running")
+TERMINAL_STATUSES = ("complete", "failed", "cancelled")
+
+
+class _NodesView(Mapping):
+    """The ``nodes`` mapping of one tree snapshot.
+
+    Reads through the tree's per-node entry lists (``(version, node)``,
+    oldest first, ``None`` marking a removal) and returns each node as it
+    was at ``version``, so a snapshot stays fixed while later snapshots add
+    entries.  Only lookups are cheap; iteration walks every node.
+    """
+
+    __slots__ = ("_entries", "version", "__weakref__")
+
+    def __init__(self, entries: dict[str, list[tuple[int, dict[str, Any] | None]]], version: int):
+        self._entries = entries
+        self.version = version
+
+    def _lookup(self, node_id: str) -> dict[str, Any] | None:
+        for ver, node in reversed(self._entries.get(node_id, ())):
+            if ver <= self.version:
+                return node
+        return None
+
+    def __getitem__(self, node_id: str) -> dict[str, Any]:
+        node = self._lookup(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id: object) -> bool:
+        return isinstance(node_id, str) and self._lookup(node_id) is not None
+
+    def get(self, node_id: str, default: Any = None) -> Any:
+        node = self._lookup(node_id)
+        return default if node is None else node
+
+    def __iter__(self) -> Iterator[str]:
+        return (n for n in list(self._entries) if self._lookup(n) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
 class PlannerTreeState:
+    """Planner hierarchy with incrementally maintained depth and progress.
+
+    ``ensure``/``update_status`` keep each node's depth, aggregate progress
+    and the per-depth count of active nodes up to date as they mutate, so
+    no query has to walk the whole tree.  ``snapshot`` only rebuilds the
+    node dicts touched since the previous call and is reused outright when
+    nothing changed (see ``version``).
+    """
+
     ROOT_ID = "root-planner"
 
     def __init__(self):
@@ -71,6 +164,23 @@ class PlannerTreeState:
         self._order: dict[str, int] = {self.ROOT_ID: 0}
         self._counter = 1
 
+        # Derived state, kept in sync by _move/_set_depth/_refresh_progress.
+        # Only nodes reachable from the root have a depth.
+        self.depth: dict[str, int] = {self.ROOT_ID: 0}
+        self.progress: dict[str, float] = {self.ROOT_ID: STATUS_PROGRESS["running"]}
+        self._child_sum: dict[str, float] = {self.ROOT_ID: 0.0}
+        self._at_depth: dict[int, int] = {0: 1}
+        self._active_at_depth: dict[int, int] = {0: 1}
+
+        # Snapshot bookkeeping
+        self.version = 0
+        self._dirty: set[str] = {self.ROOT_ID}
+        self._entries: dict[str, list[tuple[int, dict[str, Any] | None]]] = {}
+        self._history: set[str] = set()   # nodes with more than one entry
+        self._views: list[weakref.ref[_NodesView]] = []   # handed-out snapshots
+        self._snapshot: dict[str, Any] | None = None
+        self._snapshot_version = -1
+
     @staticmethod
     def infer_parent_id(task_id: str) -> str | None:
         m = re.match(r"^(.*)-sub-\d+$", task_id)
@@ -91,17 +201,21 @@ class PlannerTreeState:
             parent_id = self.infer_parent_id(node_id) or self.ROOT_ID
 
         if node_id not in self.parent:
-            self.parent[node_id] = parent_id
-            self.children.setdefault(node_id, [])
-            self.status.setdefault(node_id, "pending")
+            self.parent[node_id] = None
+            self.children[node_id] = []
+            self.status[node_id] = "pending"
+            self.progress[node_id] = STATUS_PROGRESS["pending"]
+            self._child_sum[node_id] = 0.0
             if role:
                 self.role[node_id] = role
             self._order[node_id] = self._counter
             self._counter += 1
-        elif role:
+            self._touch(node_id)
+        elif role and self.role.get(node_id) != role:
             self.role[node_id] = role
+            self._touch(node_id)
 
-        if parent_id is not None:
+        if parent_id is not None and self.parent.get(node_id) != parent_id:
             if parent_id not in self.parent:
                 parent_parent = (
                     None
@@ -109,14 +223,7 @@ class PlannerTreeState:
                     else self.infer_parent_id(parent_id) or self.ROOT_ID
                 )
                 self.ensure(parent_id, parent_parent)
-            kids = self.children.setdefault(parent_id, [])
-            if node_id not in kids:
-                kids.append(node_id)
-            if self.parent.get(node_id) != parent_id:
-                old_parent = self.parent.get(node_id)
-                if old_parent and node_id in self.children.get(old_parent, []):
-                    self.children[old_parent].remove(node_id)
-                self.parent[node_id] = parent_id
+            self._move(node_id, parent_id)
 
     def update_status(
         self,
@@ -125,68 +232,211 @@ class PlannerTreeState:
         parent_id: str | None = None,
         role: str | None = None,
     ):
+        if not node_id:
+            return
         self.ensure(node_id, parent_id, role)
+        old = self.status.get(node_id)
+        if old == status:
+            return
         self.status[node_id] = status
+        depth = self.depth.get(node_id)
+        if depth is not None:
+            if old in ACTIVE_STATUSES:
+                self._active_at_depth[depth] -= 1
+            if status in ACTIVE_STATUSES:
+                self._active_at_depth[depth] = self._active_at_depth.get(depth, 0) + 1
+        self._touch(node_id)
+        self._refresh_progress(node_id)
+
+    # -- incremental maintenance --------------------------------------------
+
+    def _touch(self, node_id: str):
+        self._dirty.add(node_id)
+        self.version += 1
+
+    def _move(self, node_id: str, parent_id: str):
+        # Refuse moves under a detached node or one of node_id's descendants;
+        # either would leave the subtree unreachable from the root.
+        cur: str | None = parent_id
+        while cur != self.ROOT_ID:
+            if cur is None or cur == node_id:
+                return
+            cur = self.parent.get(cur)
+
+        old_parent = self.parent.get(node_id)
+        if old_parent is not None:
+            self.children[old_parent].remove(node_id)
+            self._child_sum[old_parent] -= self.progress[node_id]
+            self._touch(old_parent)
+            self._refresh_progress(old_parent)
+
+        self.parent[node_id] = parent_id
+        kids = self.children[parent_id]
+        order = self._order[node_id]
+        if not kids or self._order[kids[-1]] < order:
+            kids.append(node_id)
+        else:
+            bisect.insort(kids, node_id, key=self._order.__getitem__)
+        self._child_sum[parent_id] += self.progress[node_id]
+        self._touch(parent_id)
+        self._set_depth(node_id, self.depth[parent_id] + 1)
+        self._refresh_progress(parent_id)
+
+    def _set_depth(self, node_id: str, depth: int):
+        stack = [(node_id, depth)]
+        while stack:
+            cur, d = stack.pop()
+            old = self.depth.get(cur)
+            if old == d:
+                continue
+            active = self.status.get(cur) in ACTIVE_STATUSES
+            if old is not None:
+                self._at_depth[old] -= 1
+                if active:
+                    self._active_at_depth[old] -= 1
+            self.depth[cur] = d
+            self._at_depth[d] = self._at_depth.get(d, 0) + 1
+            if active:
+                self._active_at_depth[d] = self._active_at_depth.get(d, 0) + 1
+            self._touch(cur)
+            stack.extend((kid, d + 1) for kid in self.children[cur])
+
+    def _refresh_progress(self, node_id: str):
+        """Recompute progress for *node_id* and propagate the change upward."""
+        cur: str | None = node_id
+        while cur is not None:
+            kids = self.children[cur]
+            st = self.status.get(cur, "pending")
+            if st in TERMINAL_STATUSES:
+                p = 1.0
+            elif kids:
+                p = self._child_sum[cur] / len(kids)
+            else:
+                p = STATUS_PROGRESS.get(st, 0.0)
+            p = max(0.0, min(1.0, p))
+            old = self.progress[cur]
+            if p == old:
+                return
+            self.progress[cur] = p
+            self._touch(cur)
+            parent = self.parent[cur]
+            if parent is not None:
+                self._child_sum[parent] += p - old
+            cur = parent
+
+    # -- queries ------------------------------------------------------------
+
+    @staticmethod
+    def _deepest(counts: dict[int, int]) -> int:
+        return max((d for d, n in counts.items() if n > 0), default=0)
 
-    def _depth_map(self) -> dict[str, int]:
-        depth = {self.ROOT_ID: 0}
-        q = deque([self.ROOT_ID])
-        while q:
-            cur = q.popleft()
-            for child in self.children.get(cur, []):
-                depth[child] = depth[cur] + 1
-                q.append(child)
-        return depth
+    def active_max_depth(self) -> int:
+        return self._deepest(self._active_at_depth)
 
     def snapshot(self) -> dict[str, Any]:
-        depth = self._depth_map()
-
-        status_progress = {
-            "idle": 0.0,
-            "pending": 0.1,
-            "assigned": 0.25,
-            "running": 0.6,
-            "complete": 1.0,
-            "failed": 1.0,
-            "cancelled": 1.0,
+        """Return the renderable tree, rebuilding only nodes changed since last call.
+
+        Each rebuilt node is appended to that node's entry list under the
+        new version and ``nodes`` is a ``_NodesView`` reading through the
+        lists, so a snapshot never changes once returned -- the render
+        thread can walk it, and cache ``bucket_index`` on it, outside the
+        state lock -- without copying the whole node map per version.
+        Entries no live snapshot can see any more are pruned here.
+        """
+        if self._snapshot is not None and self._snapshot_version == self.version:
+            return self._snapshot
+
+        version = self.version
+        entries = self._entries
+        for node_id in self._dirty:
+            node_depth = self.depth.get(node_id)
+            node: dict[str, Any] | None = None
+            if node_depth is not None:
+                node_role = self.role.get(node_id)
+                if not node_role:
+                    node_role = "planner" if node_depth == 1 else "subplanner"
+                node = {
+                    "id": node_id,
+                    "depth": node_depth,
+                    "status": self.status.get(node_id, "pending"),
+                    "progress": self.progress[node_id],
+                    "children": list(self.children[node_id]),
+                    "role": node_role,
+                }
+            old = entries.get(node_id)
+            if old is None:
+                if node is not None:
+                    entries[node_id] = [(version, node)]
+            else:
+                # A new list, never an in-place append: older snapshots may
+                # be reading the old one on the render thread.
+                entries[node_id] = old + [(version, node)]
+                self._history.add(node_id)
+        self._dirty.clear()
+
+        nodes = _NodesView(entries, version)
+        self._views = [r for r in self._views if r() is not None]
+        self._views.append(weakref.ref(nodes))
+        self._snapshot = {
+            "root": self.ROOT_ID,
+            "nodes": nodes,
+            "max_depth": self._deepest(self._at_depth),
+            "active_max_depth": self.active_max_depth(),
+            "version": self.version,
         }
+        self._snapshot_version = self.version
+        self._prune(min(v.version for r in self._views if (v := r()) is not None))
+        return self._snapshot
+
+    def _prune(self, oldest: int):
+        """Drop entries hidden from every snapshot at version >= *oldest*."""
+        entries = self._entries
+        for node_id in list(self._history):
+            lst = entries[node_id]
+            keep = 0
+            for i, (ver, _) in enumerate(lst):
+                if ver <= oldest:
+                    keep = i
+            if keep:
+                lst = lst[keep:]
+            if len(lst) == 1:
+                self._history.discard(node_id)
+                if lst[0][1] is None:
+                    del entries[node_id]
+                    continue
+            if keep:
+                entries[node_id] = lst
 
-        progress: dict[str, float] = {}
 
-        def calc(node_id: str) -> float:
-            if node_id in progress:
-                return progress[node_id]
-            kids = self.children.get(node_id, [])
-            st = self.status.get(node_id, "pending")
-            if st in ("complete", "failed", "cancelled"):
-                p = 1.0
-            elif kids:
-                vals = [calc(k) for k in kids]
-                p = sum(vals) / max(len(vals), 1)
-            else:
-                p = status_progress.get(st, 0.0)
-            progress[node_id] = max(0.0, min(1.0, p))
-            return progress[node_id]
-
-        calc(self.ROOT_ID)
-
-        nodes: dict[str, dict[str, Any]] = {}
-        for node_id, node_depth in depth.items():
-            kids = sorted(self.children.get(node_id, []), key=lambda x: self._order.get(x, 0))
-            node_role = self.role.get(node_id)
-            if not node_role:
-                node_role = "planner" if node_depth == 1 else "subplanner"
-            nodes[node_id] = {
-                "id": node_id,
-                "depth": node_depth,
-                "status": self.status.get(node_id, "pending"),
-                "progress": progress.get(node_id, 0.0),
-                "children": kids,
-                "role": node_role,
-            }
+# ---------------------------------------------------------------------------
+# Ingest coalescing
+# ---------------------------------------------------------------------------
 
-        max_depth = max(depth.values()) if depth else 0
-        return {"root": self.ROOT_ID, "nodes": nodes, "max_depth": max_depth}
+def coalesce(frame: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop events in *frame* superseded by a later one (COALESCED_MESSAGES).
+
+    Events are keyed by message, task and parent; errors are always kept.
+    Order of the surviving events is preserved.
+    """
+    if len(frame) < 2:
+        return frame
+    seen: set[tuple[str, Any, Any]] = set()
+    kept: list[dict[str, Any]] = []
+    for event in reversed(frame):
+        msg = event.get("message")
+        if msg in COALESCED_MESSAGES and event.get("level") != "error":
+            data = event.get("data") or {}
+            key = (
+                msg,
+                data.get("taskId") or event.get("taskId"),
+                data.get("parentId") or data.get("parentTaskId"),
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(event)
+    kept.reverse()
+    return kept
 
 
 # ---------------------------------------------------------------------------
@@ -194,6 +444,9 @@ class PlannerTreeState:
 # ---------------------------------------------------------------------------
 
 class DashboardState:
+    # Message name -> handler method, registered with @router.on below.
+    router = EventRouter("dashboard")
+
     def __init__(self, max_agents: int, total_features: int, cost_rate: float):
         self._lock = threading.RLock()
         self.start_time = time.time()
@@ -224,6 +477,7 @@ class DashboardState:
 
         # Activity feed
         self.activity: deque[tuple[str, str, str]] = deque(maxlen=MAX_ACTIVITY)
+        self.activity_version = 0
 
         # Lines added (cumulative)
         self.lines_added = 0
@@ -231,6 +485,19 @@ class DashboardState:
         # Iteration counter
         self.iteration = 0
 
+        # Ingestion lag -- newest event timestamp (epoch ms) seen so far
+        self.last_event_ts = 0
+        self.stream_ended = False
+        self.events_coalesced = 0
+
+        # Replay -- elapsed time follows the log instead of the wall clock
+        self.replay_origin: int | None = None   # first event timestamp (epoch ms)
+        self.replay_label: str | None = None
+
+        # Inference server -- latest SGLang /metrics summary (infra/sglang_metrics.py)
+        self.inference_enabled = False
+        self.inference: dict[str, Any] | None = None
+
     # -- event router -------------------------------------------------------
 
     @staticmethod
@@ -265,26 +532,16 @@ class DashboardState:
                 self.completed_scroll = max(0, self.completed_scroll + delta)
 
     def _current_level_cap_locked(self) -> int:
-        tree_snapshot = self.tree.snapshot()
-        active_depths = [
-            n["depth"]
-            for n in tree_snapshot["nodes"].values()
-            if n["status"] in ("pending", "assigned", "running")
-        ]
-        return max(1, (max(active_depths) if active_depths else 0) + 1)
+        return max(1, self.tree.active_max_depth() + 1)
 
     def ingest(self, event: dict[str, Any]):
         with self._lock:
             msg = event.get("message", "")
             data = event.get("data") or {}
-            level = event.get("level", "info")
             agent_role = event.get("agentRole", "")
             ts = event.get("timestamp", 0)
-            ts_str = (
-                datetime.fromtimestamp(ts / 1000).strftime("%H:%M:%S")
-                if ts
-                else time.strftime("%H:%M:%S")
-            )
+            if ts > self.last_event_ts:
+                self.last_event_ts = ts
 
             event_task_id = str(data.get("taskId") or event.get("taskId") or "")
             node_role = self._event_node_role(agent_role)
@@ -297,134 +554,213 @@ class DashboardState:
                 )
                 self.tree.ensure(event_task_id, parent_id, node_role)
 
-            # -- Metrics snapshot (periodic from Monitor) -------------------
-            if msg == "Metrics":
-                self.active_workers = data.get("activeWorkers", self.active_workers)
-                self.pending_tasks = data.get("pendingTasks", self.pending_tasks)
-                self.completed_tasks = data.get("completedTasks", self.completed_tasks)
-                self.failed_tasks = data.get("failedTasks", self.failed_tasks)
-                self.commits_per_hour = data.get("commitsPerHour", self.commits_per_hour)
-                self.merge_success_rate = data.get("mergeSuccessRate", self.merge_success_rate)
-                self.total_tokens = data.get("totalTokensUsed", self.total_tokens)
-
-            # -- Per-task lifecycle (from wired TaskQueue.onStatusChange) ----
-            elif msg == "Task status":
-                task_id = data.get("taskId", "")
-                new_st = data.get("to", "")
-                if task_id and new_st:
-                    parent_id = data.get("parentId") or data.get("parentTaskId")
-                    self.tree.update_status(task_id, new_st, parent_id, node_role)
-
-            # -- Task created (from Planner callback) -----------------------
-            elif msg == "Task created":
-                task_id = data.get("taskId", "")
-                desc = data.get("desc", "")
-                if task_id:
-                    parent_id = data.get("parentId") or data.get("parentTaskId")
-                    self.tree.update_status(task_id, "pending", parent_id, node_role)
-                self._feed(ts_str, f"  + {task_id}  {desc[:52]}", "cyan")
-
-            # -- Task completed ---------------------------------------------
-            elif msg == "Task completed":
-                task_id = data.get("taskId", "")
-                status = data.get("status", "")
-                final = "complete" if status == "complete" else "failed"
-                if task_id:
-                    parent_id = data.get("parentId") or data.get("parentTaskId")
-                    self.tree.update_status(task_id, final, parent_id, node_role)
-                style = "green" if final == "complete" else "red"
-                self._feed(ts_str, f"  {task_id}  {status}", style)
-
-            # -- Worker dispatched ------------------------------------------
-            elif msg == "Dispatching task to ephemeral sandbox":
-                task_id = data.get("taskId", "")
-                if task_id:
-                    parent_id = data.get("parentId") or data.get("parentTaskId")
-                    self.tree.update_status(task_id, "assigned", parent_id, node_role)
-
-            # -- Subplanner decomposition lifecycle -------------------------
-            elif msg == "Calling LLM for task decomposition":
-                parent_task_id = data.get("parentTaskId") or event.get("taskId")
-                if parent_task_id:
-                    parent_parent = PlannerTreeState.infer_parent_id(str(parent_task_id))
-                    self.tree.update_status(
-                        str(parent_task_id),
-                        "running",
-                        parent_parent,
-                        "subplanner",
-                    )
+            routed = self.router.route(msg, self, event, data, node_role)
+            if not routed and event.get("level") == "error":
+                self._feed(self._ts_str(event), f"  ERR  {msg[:60]}", "bold red")
 
-            elif msg == "Subtask still complex — recursing":
-                subtask_id = data.get("subtaskId", "")
-                if subtask_id:
-                    parent_id = (
-                        data.get("parentId")
-                        or data.get("parentTaskId")
-                        or PlannerTreeState.infer_parent_id(str(subtask_id))
-                    )
-                    self.tree.update_status(str(subtask_id), "running", parent_id, "subplanner")
-
-            elif msg == "Subtask completed by worker":
-                subtask_id = data.get("subtaskId", "")
-                if subtask_id:
-                    parent_id = (
-                        data.get("parentId")
-                        or data.get("parentTaskId")
-                        or PlannerTreeState.infer_parent_id(str(subtask_id))
-                    )
-                    status = data.get("status", "")
-                    final = "complete" if status == "complete" else "failed"
-                    self.tree.update_status(str(subtask_id), final, parent_id)
-
-            # -- Merge results (from new planner logging) -------------------
-            elif msg == "Merge result":
-                status = data.get("status", "")
-                branch = data.get("branch", "")[:30]
-                if status == "merged":
-                    self.merge_merged += 1
-                    self._feed(ts_str, f"  >> merged  {branch}", "green")
-                elif status == "conflict":
-                    self.merge_conflicts += 1
-                    self._feed(ts_str, f"  !! conflict  {branch}", "yellow")
-                else:
-                    self.merge_failed += 1
-                    self._feed(ts_str, f"  xx merge fail  {branch}", "red")
-
-            # -- Iteration --------------------------------------------------
-            elif msg == "Iteration complete":
-                self.iteration = data.get("iteration", self.iteration)
-                n = data.get("tasks", 0)
-                self.active_workers = data.get("activeWorkers", self.active_workers)
-                self.completed_tasks = data.get("completedTasks", self.completed_tasks)
-                self._feed(ts_str, f"  -- iteration {self.iteration}  ({n} tasks)", "blue")
-
-            # -- Reconciler -------------------------------------------------
-            elif msg == "Reconciler created fix tasks":
-                c = data.get("count", 0)
-                self._feed(ts_str, f"  reconciler  {c} fix tasks", "yellow")
-
-            elif msg == "Sweep check results":
-                ok = data.get("buildOk") and data.get("testsOk")
-                label = "all green" if ok else "NEEDS FIX"
-                self._feed(ts_str, f"  sweep: {label}", "green" if ok else "red")
-
-            # -- Timeouts / errors ------------------------------------------
-            elif msg == "Worker timed out":
-                tid = data.get("taskId", "")
-                if tid:
-                    self.tree.update_status(
-                        tid,
-                        "failed",
-                        data.get("parentId") or data.get("parentTaskId"),
-                        node_role,
-                    )
-                self._feed(ts_str, f"  TIMEOUT  {tid}", "bold red")
+    @staticmethod
+    def _ts_str(event: dict[str, Any]) -> str:
+        ts = event.get("timestamp", 0)
+        if ts:
+            return datetime.fromtimestamp(ts / 1000).strftime("%H:%M:%S")
+        return time.strftime("%H:%M:%S")
+
+    # -- Metrics snapshot (periodic from Monitor) ---------------------------
+
+    @router.on("Metrics")
+    def _on_metrics(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        self.active_workers = data.get("activeWorkers", self.active_workers)
+        self.pending_tasks = data.get("pendingTasks", self.pending_tasks)
+        self.completed_tasks = data.get("completedTasks", self.completed_tasks)
+        self.failed_tasks = data.get("failedTasks", self.failed_tasks)
+        self.commits_per_hour = data.get("commitsPerHour", self.commits_per_hour)
+        self.merge_success_rate = data.get("mergeSuccessRate", self.merge_success_rate)
+        self.total_tokens = data.get("totalTokensUsed", self.total_tokens)
+
+    # -- Per-task lifecycle (from wired TaskQueue.onStatusChange) -----------
+
+    @router.on("Task status")
+    def _on_task_status(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        task_id = data.get("taskId", "")
+        new_st = data.get("to", "")
+        if task_id and new_st:
+            parent_id = data.get("parentId") or data.get("parentTaskId")
+            self.tree.update_status(task_id, new_st, parent_id, node_role)
+
+    # -- Task created (from Planner callback) -------------------------------
+
+    @router.on("Task created")
+    def _on_task_created(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        task_id = data.get("taskId", "")
+        desc = data.get("desc", "")
+        if task_id:
+            parent_id = data.get("parentId") or data.get("parentTaskId")
+            self.tree.update_status(task_id, "pending", parent_id, node_role)
+        self._feed(self._ts_str(event), f"  + {task_id}  {desc[:52]}", "cyan")
+
+    # -- Task completed -----------------------------------------------------
+
+    @router.on("Task completed")
+    def _on_task_completed(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        task_id = data.get("taskId", "")
+        status = data.get("status", "")
+        final = "complete" if status == "complete" else "failed"
+        if task_id:
+            parent_id = data.get("parentId") or data.get("parentTaskId")
+            self.tree.update_status(task_id, final, parent_id, node_role)
+        style = "green" if final == "complete" else "red"
+        self._feed(self._ts_str(event), f"  {task_id}  {status}", style)
+
+    # -- Worker dispatched --------------------------------------------------
+
+    @router.on("Dispatching task to ephemeral sandbox")
+    def _on_dispatch(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        task_id = data.get("taskId", "")
+        if task_id:
+            parent_id = data.get("parentId") or data.get("parentTaskId")
+            self.tree.update_status(task_id, "assigned", parent_id, node_role)
+
+    # -- Subplanner decomposition lifecycle ---------------------------------
+
+    @router.on("Calling LLM for task decomposition")
+    def _on_decomposition(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        parent_task_id = data.get("parentTaskId") or event.get("taskId")
+        if parent_task_id:
+            parent_parent = PlannerTreeState.infer_parent_id(str(parent_task_id))
+            self.tree.update_status(
+                str(parent_task_id),
+                "running",
+                parent_parent,
+                "subplanner",
+            )
+
+    @router.on("Subtask still complex — recursing")
+    def _on_subtask_recursing(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        subtask_id = data.get("subtaskId", "")
+        if subtask_id:
+            parent_id = (
+                data.get("parentId")
+                or data.get("parentTaskId")
+                or PlannerTreeState.infer_parent_id(str(subtask_id))
+            )
+            self.tree.update_status(str(subtask_id), "running", parent_id, "subplanner")
+
+    @router.on("Subtask completed by worker")
+    def _on_subtask_completed(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        subtask_id = data.get("subtaskId", "")
+        if subtask_id:
+            parent_id = (
+                data.get("parentId")
+                or data.get("parentTaskId")
+                or PlannerTreeState.infer_parent_id(str(subtask_id))
+            )
+            status = data.get("status", "")
+            final = "complete" if status == "complete" else "failed"
+            self.tree.update_status(str(subtask_id), final, parent_id)
+
+    # -- Merge results (from new planner logging) ---------------------------
+
+    @router.on("Merge result")
+    def _on_merge_result(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        status = data.get("status", "")
+        branch = data.get("branch", "")[:30]
+        ts_str = self._ts_str(event)
+        if status == "merged":
+            self.merge_merged += 1
+            self._feed(ts_str, f"  >> merged  {branch}", "green")
+        elif status == "conflict":
+            self.merge_conflicts += 1
+            self._feed(ts_str, f"  !! conflict  {branch}", "yellow")
+        else:
+            self.merge_failed += 1
+            self._feed(ts_str, f"  xx merge fail  {branch}", "red")
+
+    # -- Iteration ----------------------------------------------------------
+
+    @router.on("Iteration complete")
+    def _on_iteration(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        self.iteration = data.get("iteration", self.iteration)
+        n = data.get("tasks", 0)
+        self.active_workers = data.get("activeWorkers", self.active_workers)
+        self.completed_tasks = data.get("completedTasks", self.completed_tasks)
+        self._feed(self._ts_str(event), f"  -- iteration {self.iteration}  ({n} tasks)", "blue")
+
+    # -- Reconciler ---------------------------------------------------------
+
+    @router.on("Reconciler created fix tasks")
+    def _on_fix_tasks(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        c = data.get("count", 0)
+        self._feed(self._ts_str(event), f"  reconciler  {c} fix tasks", "yellow")
+
+    @router.on("Sweep check results")
+    def _on_sweep(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        ok = data.get("buildOk") and data.get("testsOk")
+        label = "all green" if ok else "NEEDS FIX"
+        self._feed(self._ts_str(event), f"  sweep: {label}", "green" if ok else "red")
+
+    # -- Timeouts / errors --------------------------------------------------
+
+    @router.on("Worker timed out")
+    def _on_worker_timeout(self, event: dict[str, Any], data: dict[str, Any], node_role: str | None):
+        tid = data.get("taskId", "")
+        if tid:
+            self.tree.update_status(
+                tid,
+                "failed",
+                data.get("parentId") or data.get("parentTaskId"),
+                node_role,
+            )
+        self._feed(self._ts_str(event), f"  TIMEOUT  {tid}", "bold red")
+
+    def drain(self, q: queue.Queue[Any], budget: float) -> bool:
+        """Ingest everything queued on *q* as one coalesced frame.
+
+        The frame is collected and coalesced (see ``coalesce``) without the
+        lock, then ingested holding it for at most *budget* seconds at a
+        time, so a burst costs few acquisitions while the render thread is
+        never kept waiting longer than the budget.  Returns False once the
+        end-of-stream sentinel has been consumed.
+        """
+        frame: list[dict[str, Any]] = []
+        alive = True
+        while len(frame) < INGEST_FRAME:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                alive = False
+                break
+            frame.append(item)
+
+        events = coalesce(frame)
+        self.events_coalesced += len(frame) - len(events)
+        i = 0
+        while i < len(events):
+            deadline = time.monotonic() + budget
+            with self._lock:
+                while i < len(events):
+                    self.ingest(events[i])
+                    i += 1
+                    if time.monotonic() >= deadline:
+                        break
+
+        if not alive:
+            self.end_stream()
+        return alive
+
+    def end_stream(self):
+        with self._lock:
+            self.stream_ended = True
 
-            elif level == "error":
-                self._feed(ts_str, f"  ERR  {msg[:60]}", "bold red")
+    def set_inference(self, sample: dict[str, Any]):
+        """Store a scrape summary (called from the scraper thread)."""
+        with self._lock:
+            self.inference = sample
 
     def _feed(self, ts: str, msg: str, style: str):
         self.activity.appendleft((ts, msg, style))
+        self.activity_version += 1
 
     # -- snapshot for renderers ---------------------------------------------
 
@@ -433,16 +769,21 @@ class DashboardState:
             elapsed = time.time() - self.start_time
             total_merge = self.merge_merged + self.merge_conflicts + self.merge_failed
             tree_snapshot = self.tree.snapshot()
-            active_depths = [
-                n["depth"]
-                for n in tree_snapshot["nodes"].values()
-                if n["status"] in ("pending", "assigned", "running")
-            ]
-            tree_snapshot["active_max_depth"] = max(active_depths) if active_depths else 0
-            cap = max(1, tree_snapshot["active_max_depth"] + 1)
+            cap = self._current_level_cap_locked()
             self.visible_levels = max(1, min(self.visible_levels, cap))
+            lag = (
+                max(0.0, time.time() - self.last_event_ts / 1000)
+                if self.last_event_ts
+                else None
+            )
+            if self.replay_origin is not None:
+                lag = None
+                elapsed = max(0.0, (self.last_event_ts - self.replay_origin) / 1000)
             return {
                 "elapsed": elapsed,
+                "lag": lag,
+                "stream_ended": self.stream_ended,
+                "replay": self.replay_label,
                 "active": self.active_workers,
                 "pending": self.pending_tasks,
                 "completed": self.completed_tasks,
@@ -458,20 +799,33 @@ class DashboardState:
                 "merge_failed": self.merge_failed,
                 "merge_total": total_merge,
                 "activity": list(self.activity),
+                "activity_version": self.activity_version,
                 "iteration": self.iteration,
                 "tree": tree_snapshot,
                 "visible_levels": self.visible_levels,
                 "active_tab": self.active_tab,
                 "in_progress_scroll": self.in_progress_scroll,
                 "completed_scroll": self.completed_scroll,
+                "inference_enabled": self.inference_enabled,
+                "inference": self.inference,
+                "inference_age": (
+                    max(0.0, time.time() - self.inference["timestamp"] / 1000)
+                    if self.inference
+                    else None
+                ),
             }
 
 
+# Messages DashboardState.ingest handles beyond the common header fields.
+# Everything else is decoded header-only (see event_decoder.EventDecoder).
+ROUTED_MESSAGES = DashboardState.router.messages
+
+
 # ---------------------------------------------------------------------------
 # Layout
 # ---------------------------------------------------------------------------
 
-def make_layout() -> Layout:
+def make_layout(inference: bool = False) -> Layout:
     root = Layout(name="root")
     root.split_column(
         Layout(name="header", size=3),
@@ -486,10 +840,10 @@ def make_layout() -> Layout:
         Layout(name="footer", ratio=1),
         Layout(name="controls", ratio=1),
     )
-    root["left"].split_column(
-        Layout(name="metrics", ratio=1),
-        Layout(name="merge", size=9),
-    )
+    left = [Layout(name="metrics", ratio=1), Layout(name="merge", size=9)]
+    if inference:
+        left.append(Layout(name="inference", size=8))
+    root["left"].split_column(*left)
     return root
 
 
@@ -532,6 +886,19 @@ def _elapsed_str(s: float) -> str:
     return f"{h:02d}:{m:02d}:{sec:02d}"
 
 
+def _lag_markup(lag: float | None, stream_ended: bool, replay: str | None = None) -> str:
+    if replay:
+        return f"[dim]{replay}{' (end)' if stream_ended else ''}[/]"
+    if stream_ended:
+        return "[dim]stream ended[/]"
+    if lag is None:
+        return "[dim]lag --[/]"
+    if lag < 10:
+        style = "dim" if lag < 2 else "yellow"
+        return f"[{style}]lag {lag:.1f}s[/]"
+    return f"[bold bright_red]lag {lag:.0f}s[/]"
+
+
 def render_header(s: dict[str, Any]) -> Panel:
     tbl = Table.grid(expand=True)
     tbl.add_column(justify="left", ratio=1)
@@ -544,7 +911,8 @@ def render_header(s: dict[str, Any]) -> Panel:
     cph = s["cph"]
 
     tbl.add_row(
-        f"[bold bright_cyan]AGENTSWARM[/]  [dim]{elapsed}[/]",
+        f"[bold bright_cyan]AGENTSWARM[/]  [dim]{elapsed}[/]  "
+        f"{_lag_markup(s['lag'], s['stream_ended'], s['replay'])}",
         f"[bold bright_white]{active}[/][dim]/{mx} agents[/]",
         f"[bold bright_green]{cph:,.0f}[/] [dim]commits/hr[/]",
     )
@@ -579,6 +947,56 @@ def _tabs_title(active_tab: str) -> str:
         return "[dim]Agent Grid[/]  [reverse] Activity [/]"
     return "[reverse] Agent Grid [/]  [dim]Activity[/]"
 
+def _bucket_index(
+    tree_data: dict[str, Any],
+    show_terminal: bool,
+    max_visible_depth: int,
+) -> tuple[dict[str, int], dict[str, int]]:
+    """Precompute per-node counts for one planner-tree pane.
+
+    ``members[n]`` is the number of nodes in n's subtree (n included) that
+    belong in the pane, so ``members[n] > 0`` means n is shown and
+    ``members[n] - 1`` is its hidden-descendant count.  ``rows[n]`` is how
+    many lines n's subtree occupies at the current zoom level, which lets
+    the renderer skip whole subtrees above the scroll window.
+
+    Results are memoized on the snapshot, which is replaced whenever the
+    tree changes.
+    """
+    cache = tree_data.setdefault("bucket_index", {})
+    key = (show_terminal, max_visible_depth)
+    if key in cache:
+        return cache[key]
+
+    nodes = tree_data["nodes"]
+    root_id = tree_data["root"]
+    order: list[str] = []
+    stack = [root_id]
+    while stack:
+        node_id = stack.pop()
+        order.append(node_id)
+        stack.extend(c for c in nodes[node_id]["children"] if c in nodes)
+
+    members: dict[str, int] = {}
+    rows: dict[str, int] = {}
+    for node_id in reversed(order):
+        node = nodes[node_id]
+        kids = [c for c in node["children"] if members.get(c)]
+        below = sum(members[c] for c in kids)
+        terminal = node["status"] in TERMINAL_STATUSES
+        self_match = terminal if show_terminal else not terminal
+        members[node_id] = below + (1 if (self_match and node_id != root_id) or below else 0)
+        if node_id == root_id:
+            rows[node_id] = sum(rows[c] for c in kids)
+        elif node["depth"] > max_visible_depth:
+            rows[node_id] = 2 if below else 1
+        else:
+            rows[node_id] = 1 + sum(rows[c] for c in kids)
+
+    cache[key] = (members, rows)
+    return cache[key]
+
+
 def render_grid(s: dict[str, Any]) -> Panel:
     tree_data = s["tree"]
     nodes = tree_data["nodes"]
@@ -626,117 +1044,104 @@ def render_grid(s: dict[str, Any]) -> Panel:
         return txt
 
     def is_terminal(node_id: str) -> bool:
-        return nodes.get(node_id, {}).get("status") in ("complete", "failed", "cancelled")
-
-    def has_bucket(node_id: str, show_terminal: bool) -> bool:
-        node = nodes.get(node_id)
-        if not node:
-            return False
-        self_match = is_terminal(node_id) if show_terminal else not is_terminal(node_id)
-        if self_match and node_id != root_id:
-            return True
-        return any(has_bucket(child, show_terminal) for child in node["children"])
-
-    def hidden_descendants(node_id: str, depth: int, show_terminal: bool) -> int:
-        count = 0
-        for child in nodes.get(node_id, {}).get("children", []):
-            if not has_bucket(child, show_terminal):
-                continue
-            if depth > max_visible_depth and child != root_id:
-                count += 1
-            count += hidden_descendants(child, depth + 1, show_terminal)
-        return count
+        return nodes.get(node_id, {}).get("status") in TERMINAL_STATUSES
 
     if root_id not in nodes:
         return Panel("[dim]waiting for planner events ...[/]", title="[bold]PLANNER TREE[/]")
 
-    def build_bucket_lines(show_terminal: bool) -> list[Text]:
+    try:
+        term_lines = os.get_terminal_size().lines
+    except OSError:
+        term_lines = 28
+    # Match right-pane body height (total - header - footer - borders).
+    pane_height = max(10, term_lines - 10)
+    # Reserve one content row for the scroll indicator line.
+    pane_window = max(3, pane_height - 3)
+
+    def windowed(
+        show_terminal: bool,
+        offset: int,
+        scroll_hint: str,
+        window: int,
+    ) -> Text:
+        """Format only the rows inside the scroll window of one pane."""
+        members, rows = _bucket_index(tree_data, show_terminal, max_visible_depth)
+        total = rows[root_id]
+        max_offset = max(0, total - window)
+        clamped = max(0, min(offset, max_offset))
         lines: list[Text] = []
+        skip = clamped
 
         def emit(parent_id: str, depth: int, prefix: str):
+            nonlocal skip
             visible_children = [
-                cid
-                for cid in nodes[parent_id]["children"]
-                if has_bucket(cid, show_terminal)
+                cid for cid in nodes[parent_id]["children"] if members.get(cid)
             ]
             for idx, child_id in enumerate(visible_children):
-                child = nodes.get(child_id)
-                if not child:
+                if len(lines) >= window:
+                    return
+                # Whole subtrees above the window are skipped by row count.
+                if skip >= rows[child_id]:
+                    skip -= rows[child_id]
                     continue
                 is_last = idx == len(visible_children) - 1
-                connector = "└─ " if is_last else "├─ "
-                child_match = (
-                    is_terminal(child_id) if show_terminal else not is_terminal(child_id)
-                )
-
-                line = Text()
-                line.append(f"{prefix}{connector}", style="bright_black")
-                line.append_text(label_for(child, muted=not child_match))
-                lines.append(line)
+                if skip:
+                    skip -= 1
+                else:
+                    child_match = (
+                        is_terminal(child_id) if show_terminal else not is_terminal(child_id)
+                    )
+                    connector = "└─ " if is_last else "├─ "
+                    line = Text()
+                    line.append(f"{prefix}{connector}", style="bright_black")
+                    line.append_text(label_for(nodes[child_id], muted=not child_match))
+                    lines.append(line)
 
                 if depth >= max_visible_depth:
-                    hidden = hidden_descendants(child_id, depth + 1, show_terminal)
+                    hidden = members[child_id] - 1
                     if hidden > 0:
-                        hidden_line = Text()
-                        tail = "   " if is_last else "│  "
-                        hidden_line.append(f"{prefix}{tail}└─ ", style="bright_black")
-                        hidden_line.append(f"... {hidden} hidden", style="dim")
-                        lines.append(hidden_line)
+                        if skip:
+                            skip -= 1
+                        elif len(lines) < window:
+                            hidden_line = Text()
+                            tail = "   " if is_last else "│  "
+                            hidden_line.append(f"{prefix}{tail}└─ ", style="bright_black")
+                            hidden_line.append(f"... {hidden} hidden", style="dim")
+                            lines.append(hidden_line)
                     continue
 
                 next_prefix = prefix + ("   " if is_last else "│  ")
                 emit(child_id, depth + 1, next_prefix)
 
         emit(root_id, 0, "")
-        if not lines:
+        if total == 0:
             lines.append(Text.from_markup("[dim]none[/]"))
-        return lines
+            total = 1
 
-    in_progress_lines = build_bucket_lines(show_terminal=False)
-    completed_lines = build_bucket_lines(show_terminal=True)
-
-    try:
-        term_lines = os.get_terminal_size().lines
-    except OSError:
-        term_lines = 28
-    # Match right-pane body height (total - header - footer - borders).
-    pane_height = max(10, term_lines - 10)
-    # Reserve one content row for the scroll indicator line.
-    pane_window = max(3, pane_height - 3)
-
-    def _windowed(
-        lines: list[Text],
-        offset: int,
-        scroll_hint: str,
-        window: int,
-    ) -> tuple[Text, int, int]:
-        max_offset = max(0, len(lines) - window)
-        clamped = max(0, min(offset, max_offset))
         out = Text()
-        visible = lines[clamped: clamped + window]
         for i in range(window):
-            if i < len(visible):
-                out.append_text(visible[i])
+            if i < len(lines):
+                out.append_text(lines[i])
             if i < window - 1:
                 out.append("\n")
 
-        start = clamped + 1 if len(lines) > 0 else 0
-        end = min(len(lines), clamped + window) if len(lines) > 0 else 0
+        start = clamped + 1
+        end = min(total, clamped + window)
         out.append("\n")
         out.append(
-            f" {start}-{end}/{len(lines)} ({scroll_hint})",
+            f" {start}-{end}/{total} ({scroll_hint})",
             style="dim",
         )
-        return out, clamped, max_offset
+        return out
 
-    in_progress_text, _, _ = _windowed(
-        in_progress_lines,
+    in_progress_text = windowed(
+        False,
         s["in_progress_scroll"],
         "w/s to scroll",
         pane_window,
     )
-    completed_text, _, _ = _windowed(
-        completed_lines,
+    completed_text = windowed(
+        True,
         s["completed_scroll"],
         "e/d to scroll",
         pane_window,
@@ -793,6 +1198,66 @@ def render_merge(s: dict[str, Any]) -> Panel:
     return Panel(tbl, title="[bold]MERGE QUEUE[/]", border_style="bright_magenta")
 
 
+KV_SATURATED = 0.9   # KV-cache usage at which SGLang starts queueing/preempting
+
+
+def _sample_age_markup(age: float | None, interval: float) -> str:
+    """Age of the last scrape; a sample several intervals old means the
+    scraper stopped, so the numbers below it are no longer live."""
+    if age is None:
+        return ""
+    if age <= 3 * interval:
+        return f" [dim]{age:.0f}s ago[/]"
+    return f" [bold bright_red]stale {age:.0f}s[/]"
+
+
+def render_inference(s: dict[str, Any]) -> Panel:
+    inf = s["inference"]
+    tbl = Table(show_header=False, box=None, padding=(0, 1), expand=True)
+    tbl.add_column("k", style="dim", no_wrap=True, width=9)
+    tbl.add_column("v", justify="right")
+
+    if inf is None:
+        tbl.add_row("Servers", "[dim]scraping ...[/]")
+        return Panel(tbl, title="[bold]INFERENCE[/]", border_style="bright_yellow")
+
+    up, total = inf["up"], inf["servers"]
+    kv = inf["kvUsage"]
+    queued = inf["queued"]
+    tps = inf["genTps"]
+    kv_bar = "[dim]--[/]"
+    if kv is not None:
+        bar_w = 8
+        filled = int(min(kv, 1.0) * bar_w)
+        color = "bright_red" if kv >= KV_SATURATED else "yellow" if kv >= 0.7 else "bright_green"
+        kv_bar = (
+            f"[{color}]" + "\u2588" * filled + "[/]"
+            + "[bright_black]" + "\u2591" * (bar_w - filled) + "[/]"
+            + f" {kv * 100:.0f}%"
+        )
+    # A queue or a full KV cache means workers wait on the model; otherwise
+    # throughput is limited by what the sandboxes send it.
+    if not up:
+        bound = "[bright_red]unreachable[/]"
+    elif queued > 0 or (kv is not None and kv >= KV_SATURATED):
+        bound = "[bold yellow]model server[/]"
+    elif s["active"]:
+        bound = "[bright_green]sandboxes[/]"
+    else:
+        bound = "[dim]--[/]"
+
+    tbl.add_row("Servers",   f"[bright_white]{up}[/][dim]/{total} up[/]" if up == total
+                else f"[bright_red]{up}[/][dim]/{total} up[/]")
+    tbl.add_row("Running",   f"[bright_white]{inf['running']:.0f}[/]")
+    tbl.add_row("Queued",    f"[yellow]{queued:.0f}[/]" if queued else "[dim]0[/]")
+    tbl.add_row("KV cache",  kv_bar)
+    tbl.add_row("Gen tok/s", f"[bright_cyan]{tps:,.0f}[/]" if tps is not None else "[dim]--[/]")
+    tbl.add_row("Bound by",  bound)
+
+    age = _sample_age_markup(s["inference_age"], inf["intervalS"])
+    return Panel(tbl, title=f"[bold]INFERENCE[/]{age}", border_style="bright_yellow")
+
+
 def render_activity(s: dict[str, Any]) -> Panel:
     logs = s["activity"]
     txt = Text()
@@ -837,26 +1302,104 @@ def render_controls(s: dict[str, Any], interactive: bool) -> Panel:
     return Panel(txt, title="[bold bright_white]CONTROLS[/]", border_style="bright_cyan", height=3)
 
 
+# ---------------------------------------------------------------------------
+# Dirty-region rendering
+# ---------------------------------------------------------------------------
+
+def panel_keys(s: dict[str, Any], size: tuple[int, int]) -> dict[str, tuple[Any, ...]]:
+    """Key each layout region on the state slice its renderer reads."""
+    tree = s["tree"]
+    if s["active_tab"] == "activity":
+        right: tuple[Any, ...] = ("activity", s["activity_version"])
+    else:
+        right = (
+            "grid", tree["version"], s["visible_levels"],
+            s["in_progress_scroll"], s["completed_scroll"], size,
+        )
+    keys = {
+        "header": (
+            int(s["elapsed"]), s["active"], s["max_agents"], s["cph"],
+            _lag_markup(s["lag"], s["stream_ended"], s["replay"]),
+        ),
+        "metrics": (
+            s["iteration"], s["cph"], s["completed"], s["total_features"],
+            s["failed"], s["pending"], s["merge_rate"], s["tokens"], s["cost"],
+        ),
+        "merge": (
+            s["merge_rate"], s["merge_total"], s["merge_merged"],
+            s["merge_conflicts"], s["merge_failed"],
+        ),
+        "right": right,
+        "footer": (s["completed"], s["total_features"]),
+        "controls": (
+            s["visible_levels"], tree["active_max_depth"], tree["max_depth"],
+            s["active_tab"],
+        ),
+    }
+    if s["inference_enabled"]:
+        inf = s["inference"]
+        keys["inference"] = (
+            None if inf is None else (
+                inf["up"], inf["servers"], inf["running"], inf["queued"],
+                inf["kvUsage"], inf["genTps"], inf["intervalS"],
+            ),
+            bool(s["active"]),
+            None if s["inference_age"] is None else int(s["inference_age"]),
+        )
+    return keys
+
+
+class _Frozen:
+    """Renderable that caches its rendered lines for the last region size."""
+
+    def __init__(self, renderable: Any):
+        self.renderable = renderable
+        self._size: tuple[int, int | None] | None = None
+        self._lines: list[list[Segment]] = []
+
+    def __rich_console__(self, console: Console, options: Any):
+        size = (options.max_width, options.height)
+        if size != self._size:
+            self._lines = console.render_lines(self.renderable, options)
+            self._size = size
+        newline = Segment.line()
+        for line in self._lines:
+            yield from line
+            yield newline
+
+
+class PanelCache:
+    """Rebuild a layout region only when its panel key changes."""
+
+    def __init__(self, layout: Layout):
+        self.layout = layout
+        self._keys: dict[str, Any] = {}
+
+    def update(self, name: str, key: Any, render: Any) -> bool:
+        if self._keys.get(name) == key:
+            return False
+        self._keys[name] = key
+        self.layout[name].update(_Frozen(render()))
+        return True
+
+
 # ---------------------------------------------------------------------------
 # NDJSON readers
 # ---------------------------------------------------------------------------
 
 def reader_subprocess(cmd: list[str], q: queue.Queue[Any], cwd: str):
     """Spawn orchestrator process, read NDJSON lines from stdout."""
+    decoder = EventDecoder(ROUTED_MESSAGES, headers=True)
     try:
         proc = subprocess.Popen(
             cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            text=True, bufsize=1, cwd=cwd, env={**os.environ},
+            cwd=cwd, env={**os.environ},
         )
         assert proc.stdout is not None
         for line in proc.stdout:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                q.put(json.loads(line))
-            except json.JSONDecodeError:
-                pass
+            event = decoder.decode(line)
+            if event is not None:
+                q.put(event)
         proc.wait()
     except Exception as exc:
         q.put({
@@ -869,15 +1412,186 @@ def reader_subprocess(cmd: list[str], q: queue.Queue[Any], cwd: str):
 
 def reader_stdin(q: queue.Queue[Any]):
     """Read NDJSON from stdin (pipe mode)."""
+    decoder = EventDecoder(ROUTED_MESSAGES, headers=True)
+    try:
+        for line in sys.stdin.buffer:
+            event = decoder.decode(line)
+            if event is not None:
+                q.put(event)
+    finally:
+        q.put(None)
+
+
+def ingest_loop(q: queue.Queue[Any], state: DashboardState, budget: float):
+    """Feed reader events into *state* off the render thread.
+
+    Blocks for the first event of a burst, then drains the rest in
+    time-budgeted batches until the reader signals end of stream.
+    """
+    while True:
+        item = q.get()
+        if item is None:
+            state.end_stream()
+            break
+        state.ingest(item)
+        if not state.drain(q, budget):
+            break
+
+
+def scraper_sglang(state: DashboardState, urls: list[str], interval: float):
+    """Poll SGLang /metrics on its own event loop, feeding *state*."""
+    from infra.sglang_metrics import SGLangScraper
+
+    asyncio.run(SGLangScraper(urls, interval).run(state.set_inference))
+
+
+# ---------------------------------------------------------------------------
+# Replay -- memory-mapped saved logs with a sparse timestamp index
+# ---------------------------------------------------------------------------
+
+_TS_FIELD = re.compile(rb'"timestamp":(\d+)')
+
+
+class ReplayLog:
+    """Memory-mapped NDJSON log with a sparse timestamp -> offset index.
+
+    The index is built on open by jumping ``stride`` bytes at a time and
+    reading the timestamp of the next line start, so it touches one page per
+    stride instead of reading the whole log.  Seeking bisects the index and
+    scans forward at most one stride.
+    """
+
+    def __init__(self, path: str, stride: int = REPLAY_INDEX_STRIDE):
+        self.path = path
+        self._fh = open(path, "rb")
+        self.size = os.fstat(self._fh.fileno()).st_size
+        self.mm: mmap.mmap | bytes = (
+            mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        )
+        # Parallel lists; timestamps are a running max so bisect stays valid
+        # when log lines are slightly out of order.
+        self._index_ts: list[int] = []
+        self._index_pos: list[int] = []
+        self._build_index(stride)
+        self.first_ts = self._index_ts[0] if self._index_ts else 0
+        self.last_ts = self._last_timestamp()
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._fh.close()
+
+    def _line_end(self, pos: int) -> int:
+        end = self.mm.find(b"\n", pos)
+        return self.size if end < 0 else end
+
+    def _timestamp_at(self, pos: int) -> int | None:
+        m = _TS_FIELD.search(self.mm, pos, min(self._line_end(pos), pos + 64))
+        return int(m.group(1)) if m else None
+
+    def _build_index(self, stride: int):
+        pos = 0
+        high = 0
+        while pos < self.size:
+            # First line with a timestamp at or after pos.
+            ts = None
+            while pos < self.size:
+                ts = self._timestamp_at(pos)
+                if ts is not None:
+                    break
+                pos = self._line_end(pos) + 1
+            if ts is None:
+                break
+            high = max(high, ts)
+            self._index_ts.append(high)
+            self._index_pos.append(pos)
+            nxt = self.mm.find(b"\n", pos + stride)
+            if nxt < 0:
+                break
+            pos = nxt + 1
+
+    def _last_timestamp(self) -> int:
+        end = self.size
+        while end > 0:
+            start = self.mm.rfind(b"\n", 0, end - 1) + 1
+            ts = self._timestamp_at(start)
+            if ts is not None:
+                return ts
+            end = start
+        return self.first_ts
+
+    @property
+    def index_entries(self) -> int:
+        return len(self._index_pos)
+
+    def offset_for(self, ts: int) -> int:
+        """Byte offset of the first line stamped at or after *ts* (epoch ms)."""
+        i = bisect.bisect_right(self._index_ts, ts) - 1
+        if i < 0:
+            return 0
+        pos = self._index_pos[i]
+        while pos < self.size:
+            line_ts = self._timestamp_at(pos)
+            if line_ts is not None and line_ts >= ts:
+                return pos
+            pos = self._line_end(pos) + 1
+        return self.size
+
+    def lines(self, start: int = 0):
+        """Yield raw lines from byte offset *start* to the end of the log."""
+        mm = self.mm
+        pos = start
+        while pos < self.size:
+            end = self._line_end(pos)
+            yield mm[pos:end]
+            pos = end + 1
+
+
+def parse_seek(value: str, first_ts: int) -> int:
+    """Resolve a --seek value to epoch ms.
+
+    Accepts an offset from the start of the log (``+90m``, ``+1h30m``,
+    ``+5400``), an ISO date/time (``2026-02-15T06:00``), a wall-clock time on
+    the log's first day (``06:00:00``), or epoch milliseconds.
+    """
+    value = value.strip()
+    if value.startswith("+"):
+        m = re.fullmatch(r"\+(?:(\d+)h)?(?:(\d+)m)?(?:(\d+(?:\.\d+)?)s?)?", value)
+        if not m or not any(m.groups()):
+            raise ValueError(f"bad offset {value!r} (e.g. +90m, +1h30m, +5400)")
+        h, mnt, sec = m.groups()
+        seconds = int(h or 0) * 3600 + int(mnt or 0) * 60 + float(sec or 0)
+        return first_ts + int(seconds * 1000)
+    if value.isdigit():
+        return int(value)
+    if re.fullmatch(r"\d{1,2}:\d{2}(:\d{2})?", value):
+        first = datetime.fromtimestamp(first_ts / 1000)
+        parts = [int(p) for p in value.split(":")] + [0]
+        target = first.replace(hour=parts[0], minute=parts[1], second=parts[2], microsecond=0)
+        if target < first.replace(microsecond=0):
+            target += timedelta(days=1)
+        return int(target.timestamp() * 1000)
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def reader_replay(log: ReplayLog, q: queue.Queue[Any], speed: float | None, start: int = 0):
+    """Stream a saved log at its recorded pace scaled by *speed* (None = max)."""
+    decoder = EventDecoder(ROUTED_MESSAGES, headers=True)
+    wall0 = time.monotonic()
+    ts0: int | None = None
     try:
-        for line in sys.stdin:
-            line = line.strip()
-            if not line:
+        for line in log.lines(start):
+            event = decoder.decode(line)
+            if event is None:
                 continue
-            try:
-                q.put(json.loads(line))
-            except json.JSONDecodeError:
-                pass
+            ts = event.get("timestamp")
+            if speed is not None and isinstance(ts, int):
+                if ts0 is None:
+                    ts0 = ts
+                delay = wall0 + (ts - ts0) / 1000 / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            q.put(event)
     finally:
         q.put(None)
 
@@ -1152,19 +1866,63 @@ def main():
     ap = argparse.ArgumentParser(description="AgentSwarm Rich Terminal Dashboard")
     ap.add_argument("--demo", action="store_true", help="Synthetic data mode")
     ap.add_argument("--stdin", action="store_true", help="Read NDJSON from stdin")
+    ap.add_argument("--replay", metavar="FILE", help="Replay a saved run-*.ndjson log")
+    ap.add_argument("--speed", default="1",
+                    help="Replay speed multiplier, or 'max' for no pacing (default 1)")
+    ap.add_argument("--seek", metavar="WHEN",
+                    help="Start the replay at +OFFSET (e.g. +2h30m), HH:MM[:SS], "
+                         "an ISO time or epoch ms")
     ap.add_argument("--agents", type=int, default=100, help="Max agent slots (default 100)")
     ap.add_argument("--features", type=int, default=200, help="Total features (default 200)")
     ap.add_argument("--hz", type=int, default=2, help="Refresh rate Hz (default 2)")
+    ap.add_argument("--ingest-budget", type=float, default=INGEST_BUDGET,
+                    help=f"Max seconds per ingest batch (default {INGEST_BUDGET})")
     ap.add_argument("--cost-rate", type=float, default=COST_PER_1K,
                     help="$/1K tokens for cost estimate")
+    ap.add_argument("--router-stats", action="store_true",
+                    help="Print per-message call counts and handler time on exit")
+    ap.add_argument("--sglang-metrics", metavar="URL[,URL]",
+                    default=os.environ.get("SGLANG_METRICS_URL"),
+                    help="Scrape SGLang /metrics from these inference servers "
+                         "(default $SGLANG_METRICS_URL)")
+    ap.add_argument("--sglang-interval", type=float, default=5.0,
+                    help="Seconds between /metrics scrapes (default 5)")
     args = ap.parse_args()
 
+    speed: float | None = None
+    if args.speed != "max":
+        try:
+            speed = float(args.speed)
+        except ValueError:
+            speed = 0.0
+        if speed <= 0:
+            ap.error("--speed must be a positive number or 'max'")
+    if args.seek and not args.replay:
+        ap.error("--seek requires --replay")
+
     console = Console()
     state = DashboardState(args.agents, args.features, args.cost_rate)
     dq: queue.Queue[Any] = queue.Queue()
 
     # start reader thread
-    if args.demo:
+    if args.replay:
+        try:
+            log = ReplayLog(args.replay)
+        except OSError as exc:
+            ap.error(f"--replay: {exc}")
+        start = 0
+        if args.seek:
+            try:
+                start = log.offset_for(parse_seek(args.seek, log.first_ts))
+            except ValueError as exc:
+                ap.error(f"--seek: {exc}")
+        state.replay_origin = log.first_ts
+        state.replay_label = f"replay {'max' if speed is None else f'x{speed:g}'}"
+        # Bounded so a max-speed replay of a huge log cannot outrun ingest.
+        dq = queue.Queue(maxsize=REPLAY_QUEUE_MAX)
+        thr = threading.Thread(target=reader_replay,
+                               args=(log, dq, speed, start), daemon=True)
+    elif args.demo:
         thr = threading.Thread(target=demo_generator,
                                args=(dq, args.agents, args.features), daemon=True)
     elif args.stdin:
@@ -1177,15 +1935,30 @@ def main():
             daemon=True,
         )
     thr.start()
-
-    layout = make_layout()
+    threading.Thread(
+        target=ingest_loop, args=(dq, state, args.ingest_budget), daemon=True,
+    ).start()
+
+    sglang_urls = [u.strip() for u in (args.sglang_metrics or "").split(",") if u.strip()]
+    if sglang_urls:
+        try:
+            import aiohttp  # noqa: F401  (needed by infra/sglang_metrics.py)
+        except ImportError:
+            ap.error("--sglang-metrics requires aiohttp.  pip install aiohttp")
+        state.inference_enabled = True
+        threading.Thread(
+            target=scraper_sglang, args=(state, sglang_urls, args.sglang_interval), daemon=True,
+        ).start()
+
+    layout = make_layout(inference=state.inference_enabled)
     interactive_zoom = not args.stdin and sys.stdin.isatty()
 
     try:
         with KeyPoller(interactive_zoom) as key_poller:
-            with Live(layout, console=console, refresh_per_second=args.hz, screen=True):
+            with Live(layout, console=console, auto_refresh=False, screen=True) as live:
+                panels = PanelCache(layout)
+                last_size = None
                 running = True
-                stream_ended = False
                 while running:
                     key = key_poller.poll()
                     while key:
@@ -1240,31 +2013,29 @@ def main():
                                 state.adjust_tree_scroll("completed", 2)
                         key = key_poller.poll()
 
-                    # drain queue
-                    batch = 0
-                    while (not stream_ended) and batch < 200:  # cap per tick
-                        try:
-                            item = dq.get_nowait()
-                            if item is None:
-                                stream_ended = True
-                                break
-                            state.ingest(item)
-                            batch += 1
-                        except queue.Empty:
-                            break
-
-                    # render
+                    # render (events are ingested by the ingest_loop thread)
                     s = state.snap()
                     apply_tab_layout(layout, s["active_tab"])
-                    layout["header"].update(render_header(s))
-                    layout["metrics"].update(render_metrics(s))
-                    layout["merge"].update(render_merge(s))
-                    if s["active_tab"] == "activity":
-                        layout["right"].update(render_activity(s))
-                    else:
-                        layout["right"].update(render_grid(s))
-                    layout["footer"].update(render_footer(s))
-                    layout["controls"].update(render_controls(s, interactive_zoom))
+                    renderers = {
+                        "header": lambda: render_header(s),
+                        "metrics": lambda: render_metrics(s),
+                        "merge": lambda: render_merge(s),
+                        "right": (
+                            (lambda: render_activity(s))
+                            if s["active_tab"] == "activity"
+                            else (lambda: render_grid(s))
+                        ),
+                        "footer": lambda: render_footer(s),
+                        "controls": lambda: render_controls(s, interactive_zoom),
+                        "inference": lambda: render_inference(s),
+                    }
+                    size = (console.size.width, console.size.height)
+                    dirty = size != last_size
+                    for name, key in panel_keys(s, size).items():
+                        dirty |= panels.update(name, key, renderers[name])
+                    if dirty:
+                        live.refresh()
+                        last_size = size
 
                     time.sleep(1.0 / args.hz)
 
@@ -1284,6 +2055,9 @@ def main():
     console.print(f"  Tokens      {s['tokens']:,}")
     console.print(f"  Est. cost   ${s['cost']:.2f}")
     console.print()
+    if args.router_stats:
+        console.print(DashboardState.router.report(), markup=False, highlight=False)
+        console.print()
 
 
 if __name__ == "__main__":
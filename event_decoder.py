@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Event Decoder -- fast NDJSON decoding for AgentSwarm event streams
+==================================================================
+Shared by the dashboard, the CLI (main.py) and the gource adapter.
+
+Picks the fastest JSON backend available (orjson, then msgspec, then the
+stdlib) and can pre-filter lines on their ``"message"`` field so events a
+consumer never routes skip full parsing.  "Worker output" and "Handoff
+details" lines carry multi-KB payloads that most consumers ignore.
+
+Usage:
+    from event_decoder import EventDecoder
+
+    decoder = EventDecoder({"Task created", "Merge result"})
+    for line in sys.stdin.buffer:
+        event = decoder.decode(line)      # None for blank/invalid/unrouted
+        if event is not None:
+            ...
+
+    # Benchmark against the bundled run log:
+    python event_decoder.py --bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+def _json_loads(data: bytes | bytearray | memoryview) -> Any:
+    # json.loads(bytes) sniffs the encoding; decoding first is measurably faster.
+    # str() rather than .decode() so memoryview slices work too.
+    return json.loads(str(data, "utf-8"))
+
+
+BACKENDS: dict[str, Callable[[bytes | bytearray | memoryview], Any]] = {"json": _json_loads}
+_decode_errors: list[type[Exception]] = [ValueError]
+
+try:
+    import orjson
+
+    BACKENDS["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import msgspec
+
+    BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+    _decode_errors.append(msgspec.DecodeError)
+except ImportError:
+    pass
+
+# Every backend raises one of these on malformed input.
+DecodeError: tuple[type[Exception], ...] = tuple(_decode_errors)
+
+# AGENTSWARM_JSON=json|orjson|msgspec forces a backend; otherwise the fastest wins.
+DEFAULT_BACKEND = os.environ.get("AGENTSWARM_JSON") or next(
+    name for name in ("orjson", "msgspec", "json") if name in BACKENDS
+)
+if DEFAULT_BACKEND not in BACKENDS:
+    DEFAULT_BACKEND = "json"
+
+loads = BACKENDS[DEFAULT_BACKEND]
+
+# Identifier fields kept on header-only events (see EventDecoder.headers).
+HEADER_DATA_FIELDS = ("taskId", "parentId", "parentTaskId")
+
+# Below this size a full parse is cheaper than cutting out the header.
+HEADER_MIN_BYTES = 1024
+
+# The orchestrator's logger writes flat header fields first and "data" last:
+#   {"timestamp":...,"level":...,"agentId":...,"agentRole":...,"message":"...","data":{...}}
+# The fast paths below rely on that shape and fall back to a full parse
+# whenever a line does not have it.
+_LINE_PREFIX = b'{"timestamp":'
+_MESSAGE_KEY = b'"message":"'
+_DATA_KEY = b',"data":'
+
+
+def _nested(line: bytes, start: int, end: int) -> bool:
+    """True if line[start:end] opens an object or array (or a string holds
+    a brace -- then the cheap scan cannot tell, which counts as nested)."""
+    return line.find(b"{", start, end) >= 0 or line.find(b"[", start, end) >= 0
+
+
+# ---------------------------------------------------------------------------
+# Decoder
+# ---------------------------------------------------------------------------
+
+def peek_message(line: bytes) -> tuple[bytes | None, int]:
+    """Raw bytes of the top-level message field and the offset of its closing
+    quote, without parsing the line.  None if absent, not plainly encoded or
+    the line lacks the logger's flat header (a ``"message":"`` inside
+    ``data`` is never mistaken for the event's own)."""
+    if not line.startswith(_LINE_PREFIX):
+        return None, 0
+    start = line.find(_MESSAGE_KEY)
+    if start < 0 or _nested(line, 1, start):
+        return None, 0
+    start += len(_MESSAGE_KEY)
+    end = line.find(b'"', start)
+    if end < 0:
+        return None, 0
+    msg = line[start:end]
+    if b"\\" in msg:
+        # Escaped characters -- let the full parser decide.
+        return None, 0
+    return msg, end
+
+
+class EventDecoder:
+    """Decode NDJSON event lines, fully parsing only the messages a consumer routes.
+
+    Args:
+        routed: Message names the consumer handles.  ``None`` parses every line.
+        headers: Keep unrouted messages instead of dropping them.  Lines of
+            ``HEADER_MIN_BYTES`` or more are reduced to a header-only event
+            (timestamp, level, agent fields, message and the string ``fields``
+            of data); shorter ones are cheaper to parse in full.
+        fields: Data fields header-only events keep (default ``HEADER_DATA_FIELDS``).
+        backend: Name from ``BACKENDS``; defaults to ``DEFAULT_BACKEND``.
+    """
+
+    def __init__(
+        self,
+        routed: Iterable[str] | None = None,
+        *,
+        headers: bool = False,
+        fields: Iterable[str] = HEADER_DATA_FIELDS,
+        backend: str | None = None,
+    ):
+        self.loads = BACKENDS[backend or DEFAULT_BACKEND]
+        self.routed = (
+            None if routed is None else frozenset(m.encode("utf-8") for m in routed)
+        )
+        self.headers = headers
+        self.fields = tuple(fields)
+        self._field_keys = tuple((f, b'"' + f.encode() + b'":"') for f in self.fields)
+        self.parsed = 0
+        self.skipped = 0
+
+    def decode(self, line: bytes | str) -> dict[str, Any] | None:
+        """Return the event dict, or None for blank, invalid or dropped lines."""
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        line = line.strip()
+        if not line:
+            return None
+
+        if self.routed is not None and (not self.headers or len(line) >= HEADER_MIN_BYTES):
+            msg, end = peek_message(line)
+            if msg is not None and msg not in self.routed:
+                self.skipped += 1
+                return self._header(line, end) if self.headers else None
+
+        self.parsed += 1
+        try:
+            event = self.loads(line)
+        except DecodeError:
+            return None
+        return event if isinstance(event, dict) else None
+
+    def _header(self, line: bytes, after: int) -> dict[str, Any] | None:
+        cut = line.find(_DATA_KEY, after)
+        if cut < 0:
+            return self._full_header(line)
+        body = cut + len(_DATA_KEY)
+        # "data" must be a flat-headed object and the last top-level key.
+        if _nested(line, after, cut) or line[body:body + 1] != b"{" or not line.endswith(b"}}"):
+            return self._full_header(line)
+        data: dict[str, str] = {}
+        for field, key in self._field_keys:
+            i = line.find(key, body + 1)
+            if i < 0:
+                continue
+            if _nested(line, body + 1, i):
+                # Possibly a nested object's field, not data's own.
+                return self._full_header(line)
+            i += len(key)
+            j = line.find(b'"', i)
+            if j > i:
+                if line.find(b"\\", i, j) >= 0:
+                    return self._full_header(line)
+                data[field] = line[i:j].decode("utf-8", errors="replace")
+        try:
+            event = self.loads(line[:cut] + b"}")
+        except DecodeError:
+            return None
+        event["data"] = data
+        return event
+
+    def _full_header(self, line: bytes) -> dict[str, Any] | None:
+        """Header-only event from a full parse, for lines of another shape."""
+        try:
+            event = self.loads(line)
+        except DecodeError:
+            return None
+        if not isinstance(event, dict):
+            return None
+        data = event.get("data")
+        event["data"] = {
+            field: data[field]
+            for field in self.fields
+            if isinstance(data, dict) and isinstance(data.get(field), str)
+        }
+        return event
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _bench(paths: list[str], routed: set[str], repeat: int) -> None:
+    lines: list[bytes] = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            lines.extend(fh.readlines())
+    size_mb = sum(len(line) for line in lines) / 1_000_000
+    print(f"{len(lines):,} lines, {size_mb:.1f} MB from {len(paths)} file(s)")
+    print(f"routed set: {len(routed)} message types, backends: {', '.join(BACKENDS)}")
+    print()
+
+    def timed(fn: Callable[[], None]) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    def baseline() -> None:
+        for line in lines:
+            line = line.decode("utf-8").strip()
+            if line:
+                try:
+                    json.loads(line)
+                except json.JSONDecodeError:
+                    pass
+
+    base = timed(baseline)
+    print(f"  {'json.loads per line (baseline)':40s} {base * 1000:8.1f} ms   1.00x")
+
+    for name in BACKENDS:
+        for label, decoder in (
+            ("full", EventDecoder(backend=name)),
+            ("routed, drop others", EventDecoder(routed, backend=name)),
+            ("routed, headers", EventDecoder(routed, headers=True, backend=name)),
+        ):
+            def run(decode: Callable[[bytes], Any] = decoder.decode) -> None:
+                for line in lines:
+                    decode(line)
+
+            elapsed = timed(run)
+            print(f"  {name + ' ' + label:40s} {elapsed * 1000:8.1f} ms  "
+                  f"{base / elapsed:5.2f}x")
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    default_logs = sorted(glob.glob(os.path.join(here, "gource", "terminal-logs", "run-*.ndjson")))
+
+    ap = argparse.ArgumentParser(description="AgentSwarm NDJSON decoder")
+    ap.add_argument("--bench", action="store_true",
+                    help="Benchmark decoding backends and message pre-filtering")
+    ap.add_argument("files", nargs="*", default=default_logs,
+                    help="NDJSON logs to benchmark (default: bundled run-*.ndjson)")
+    ap.add_argument("--routed", action="append", metavar="MESSAGE",
+                    help="Message name to route (repeatable; default: the dashboard's set)")
+    ap.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best of)")
+    args = ap.parse_args()
+
+    if not args.bench:
+        ap.print_help()
+        return
+    if args.routed:
+        routed = set(args.routed)
+    else:
+        from dashboard import ROUTED_MESSAGES
+        routed = set(ROUTED_MESSAGES)
+    _bench(args.files, routed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Event Router -- dispatch-table routing for AgentSwarm event streams
+==================================================================
+Shared by the dashboard, the CLI (main.py) and the gource adapter.
+
+Handlers are registered per message name in a dict, so routing an event is
+one lookup instead of a chain of ``msg == "..."`` comparisons.  Every route
+is counted and timed per message, which shows which event types cost the
+most.
+
+Usage:
+    from event_router import EventRouter
+
+    router = EventRouter("gource")
+
+    @router.on("Task created")
+    def on_task_created(event, data):
+        ...
+
+    if not router.route(event.get("message", ""), event, data):
+        ...                                   # no handler for this message
+
+    print(router.report(), file=sys.stderr)
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class EventRouter:
+    """Map message names to handlers and keep per-message call statistics.
+
+    Args:
+        name: Label used in ``report``.
+        timed: Measure cumulative handler time.  Call counts are always kept.
+    """
+
+    def __init__(self, name: str = "events", timed: bool = True):
+        self.name = name
+        self.timed = timed
+        self.unrouted = 0
+        self._handlers: dict[str, Callable[..., Any]] = {}
+        # message -> [calls, cumulative ns]; lists so route() updates in place.
+        self._stats: dict[str, list[int]] = {}
+
+    # -- registration --------------------------------------------------------
+
+    def on(self, *messages: str) -> Callable[[F], F]:
+        """Decorator registering the function for one or more message names."""
+        def register(handler: F) -> F:
+            for message in messages:
+                self.add(message, handler)
+            return handler
+        return register
+
+    def add(self, message: str, handler: Callable[..., Any]):
+        if message in self._handlers:
+            raise ValueError(f"{self.name}: handler for {message!r} already registered")
+        self._handlers[message] = handler
+        self._stats[message] = [0, 0]
+
+    @property
+    def messages(self) -> frozenset[str]:
+        """Message names with a handler."""
+        return frozenset(self._handlers)
+
+    def __contains__(self, message: object) -> bool:
+        return message in self._handlers
+
+    # -- dispatch ------------------------------------------------------------
+
+    def route(self, message: str, *args: Any) -> bool:
+        """Call the handler for *message* with *args*.  False if there is none."""
+        handler = self._handlers.get(message)
+        if handler is None:
+            self.unrouted += 1
+            return False
+        stats = self._stats[message]
+        stats[0] += 1
+        if not self.timed:
+            handler(*args)
+            return True
+        t0 = time.perf_counter_ns()
+        try:
+            handler(*args)
+        finally:
+            stats[1] += time.perf_counter_ns() - t0
+        return True
+
+    # -- instrumentation -----------------------------------------------------
+
+    def stats(self) -> dict[str, tuple[int, float]]:
+        """message -> (calls, cumulative seconds), for messages routed at least once."""
+        return {
+            message: (calls, ns / 1e9)
+            for message, (calls, ns) in self._stats.items()
+            if calls
+        }
+
+    def reset(self):
+        for stats in self._stats.values():
+            stats[0] = stats[1] = 0
+        self.unrouted = 0
+
+    def report(self) -> str:
+        """Plain-text table of routed messages, most expensive first."""
+        rows = sorted(self.stats().items(), key=lambda kv: (-kv[1][1], -kv[1][0]))
+        routed = sum(calls for calls, _ in self.stats().values())
+        lines = [f"[{self.name}] routed {routed:,} events, {self.unrouted:,} without a handler"]
+        if rows:
+            width = max(len(message) for message, _ in rows)
+            lines.append(f"  {'message':{width}s}  {'calls':>8s}  {'total ms':>9s}  {'us/call':>8s}")
+            for message, (calls, seconds) in rows:
+                lines.append(
+                    f"  {message:{width}s}  {calls:8,d}  {seconds * 1000:9.2f}  "
+                    f"{seconds * 1e6 / calls:8.1f}"
+                )
+        return "\n".join(lines)
@@ -28,13 +28,18 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
 import math
+import os
 import random
 import re
 import sys
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_decoder import HEADER_DATA_FIELDS, EventDecoder
+from event_router import EventRouter
+
 # ── Colour palette (hex, no #) ──────────────────────────────────────────────
 
 ROLE_COLOURS = {
@@ -120,6 +125,9 @@ def _emit(ts: int, user: str, action: str, path: str, colour: str):
 
 # ── NDJSON → Gource ─────────────────────────────────────────────────────────
 
+router = EventRouter("gource")
+
+
 def process_event(event: dict) -> None:
     msg = event.get("message", "")
     data = event.get("data") or {}
@@ -142,70 +150,109 @@ def process_event(event: dict) -> None:
     role_group = f"{agent_role}s" if agent_role else "system"
     user = _username(agent_id, agent_role, task_id)
 
-    if msg == "Task created" and task_id:
+    router.route(msg, event, data, ts, user, task_id, role_group)
+
+
+# Handlers: (event, data, ts, user, task_id, role_group) -> None
+
+@router.on("Task created")
+def _on_task_created(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    if task_id:
         path = _task_path(task_id, role_group)
-        _emit(ts, user, "A", path, _colour(msg, role=agent_role))
+        _emit(ts, user, "A", path, _colour(event["message"], role=event.get("agentRole", "")))
+
 
-    elif msg == "Task status" and task_id:
+@router.on("Task status")
+def _on_task_status(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    if task_id:
         new_status = data.get("to", "")
         path = _task_path(task_id, role_group)
         if new_status in ("complete", "failed", "cancelled"):
-            _emit(ts, user, "D", path, _colour(msg, status=new_status))
+            _emit(ts, user, "D", path, _colour(event["message"], status=new_status))
         else:
-            _emit(ts, user, "M", path, _colour(msg, role=agent_role))
+            _emit(ts, user, "M", path, _colour(event["message"], role=event.get("agentRole", "")))
+
 
-    elif msg == "Task completed" and task_id:
+@router.on("Task completed")
+def _on_task_completed(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    if task_id:
         status = str(data.get("status", "complete"))
         path = _task_path(task_id, role_group)
-        _emit(ts, user, "D", path, _colour(msg, status=status))
+        _emit(ts, user, "D", path, _colour(event["message"], status=status))
 
-    elif msg == "Dispatching task to ephemeral sandbox" and task_id:
+
+@router.on("Dispatching task to ephemeral sandbox")
+def _on_dispatch(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    if task_id:
         path = _task_path(task_id, "workers")
         _emit(ts, user, "M", path, ROLE_COLOURS["worker"])
 
-    elif msg == "Calling LLM for task decomposition":
-        ptid = str(data.get("parentTaskId") or event.get("taskId") or "")
-        if ptid:
-            path = _task_path(ptid, "subplanners")
-            _emit(ts, user, "M", path, ROLE_COLOURS["subplanner"])
 
-    elif msg == "Subtask still complex — recursing":
-        sid = str(data.get("subtaskId", ""))
-        if sid:
-            path = _task_path(sid, "subplanners")
-            _emit(ts, user, "A", path, ROLE_COLOURS["subplanner"])
+@router.on("Calling LLM for task decomposition")
+def _on_decomposition(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    ptid = str(data.get("parentTaskId") or event.get("taskId") or "")
+    if ptid:
+        path = _task_path(ptid, "subplanners")
+        _emit(ts, user, "M", path, ROLE_COLOURS["subplanner"])
+
+
+@router.on("Subtask still complex — recursing")
+def _on_subtask_recursing(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    sid = str(data.get("subtaskId", ""))
+    if sid:
+        path = _task_path(sid, "subplanners")
+        _emit(ts, user, "A", path, ROLE_COLOURS["subplanner"])
+
+
+@router.on("Merge result")
+def _on_merge_result(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    branch = str(data.get("branch", "")).replace("/", "_")
+    status = str(data.get("status", "merged"))
+    c = STATUS_COLOURS.get(status, "AA00FF")
+    _emit(ts, user, "M", f"swarm/merges/{branch}", c)
+
+
+@router.on("Reconciler created fix tasks")
+def _on_fix_tasks(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    count = int(data.get("count", 1))
+    for i in range(count):
+        _emit(ts, "reconciler", "A", f"swarm/fixes/fix-{ts}-{i}", ROLE_COLOURS["reconciler"])
+
+
+@router.on("Sweep check results")
+def _on_sweep(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    ok = data.get("buildOk") and data.get("testsOk")
+    c = "00AAFF" if ok else "FF0000"
+    _emit(ts, "reconciler", "M", "swarm/health/sweep", c)
+
+
+@router.on("Iteration complete")
+def _on_iteration(event: dict, data: dict, ts: int, user: str, task_id: str, role_group: str):
+    it = data.get("iteration", 0)
+    _emit(ts, "root-planner", "A", f"swarm/iterations/iter-{it}", ROLE_COLOURS["root-planner"])
+
 
-    elif msg == "Merge result":
-        branch = str(data.get("branch", "")).replace("/", "_")
-        status = str(data.get("status", "merged"))
-        c = STATUS_COLOURS.get(status, "AA00FF")
-        _emit(ts, user, "M", f"swarm/merges/{branch}", c)
+# Messages with a handler; everything else is dropped before it is parsed.
+ROUTED_MESSAGES = router.messages
 
-    elif msg == "Reconciler created fix tasks":
-        count = int(data.get("count", 1))
-        for i in range(count):
-            _emit(ts, "reconciler", "A", f"swarm/fixes/fix-{ts}-{i}", ROLE_COLOURS["reconciler"])
+# process_event fills _parent_cache/_desc_cache from any event, routed or
+# not, so unrouted events are still decoded as headers carrying these.
+CACHED_FIELDS = HEADER_DATA_FIELDS + ("desc",)
 
-    elif msg == "Sweep check results":
-        ok = data.get("buildOk") and data.get("testsOk")
-        c = "00AAFF" if ok else "FF0000"
-        _emit(ts, "reconciler", "M", "swarm/health/sweep", c)
 
-    elif msg == "Iteration complete":
-        it = data.get("iteration", 0)
-        _emit(ts, "root-planner", "A", f"swarm/iterations/iter-{it}", ROLE_COLOURS["root-planner"])
+def _decoder() -> EventDecoder:
+    return EventDecoder(ROUTED_MESSAGES, headers=True, fields=CACHED_FIELDS)
 
 
 # ── SSE parser ───────────────────────────────────────────────────────────────
 
-def _read_sse(stream):
+def _read_sse(stream, decoder: EventDecoder):
     for line in stream:
         line = line.strip()
-        if line.startswith("data: "):
-            try:
-                yield json.loads(line[6:])
-            except json.JSONDecodeError:
-                pass
+        if line.startswith(b"data: "):
+            event = decoder.decode(line[6:])
+            if event is not None:
+                yield event
 
 
 # ── Demo generator ───────────────────────────────────────────────────────────
@@ -398,25 +445,26 @@ def main():
                     help="Demo: max concurrent agents (default 20)")
     ap.add_argument("--features", type=int, default=60,
                     help="Demo: total features (default 60)")
+    ap.add_argument("--router-stats", action="store_true",
+                    help="Print per-message call counts and handler time to stderr on exit")
     args = ap.parse_args()
 
     try:
         if args.demo:
             run_demo(args.agents, args.features, args.save)
         elif args.sse:
-            for event in _read_sse(sys.stdin):
+            for event in _read_sse(sys.stdin.buffer, _decoder()):
                 process_event(event)
         else:
-            for line in sys.stdin:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    process_event(json.loads(line))
-                except json.JSONDecodeError:
-                    pass
+            decoder = _decoder()
+            for line in sys.stdin.buffer:
+                event = decoder.decode(line)
+                if event is not None:
+                    process_event(event)
     except (KeyboardInterrupt, BrokenPipeError):
         pass
+    if args.router_stats:
+        print(router.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+"""
+Dependency Cache — shared node_modules snapshots for worker sandboxes
+=====================================================================
+
+Every ephemeral sandbox starts without the target repo's ``node_modules``,
+so each worker that runs ``npm test`` or ``tsc`` pays for a full install.
+This module mounts one Modal Volume into every sandbox and, right after
+checkout, restores a ``node_modules`` snapshot keyed by the hash of the
+repo's lockfile (and root package.json).
+
+On a miss the sandbox installs once -- with the pnpm store and npm cache on
+the volume, so even a changed lockfile mostly reuses downloaded packages --
+and saves a snapshot plus the install time.  Later tasks with the same
+lockfile extract the snapshot and report the install time they saved.
+The volume only gains a new snapshot when the lockfile changes.
+
+Misses are serialized per lockfile hash by a lock file on the volume: the
+first task of a run's first wave builds the snapshot, the others wait for
+it (up to ``DEP_CACHE_WAIT_S``) instead of all installing and racing to
+write it.  A waiter that times out installs without saving a snapshot.
+
+Usage:
+    from infra.dep_cache import dep_cache_volumes, restore_command, describe
+
+    sb = await modal.Sandbox.create.aio(..., volumes=dep_cache_volumes())
+    # run restore_command("/workspace/repo") in the sandbox (the bootstrap
+    # does this as its "deps" phase); its last stdout line is the report
+    print(f"[spawn] {describe(report)} for task {task_id}")
+
+Configuration (env vars):
+    DEP_CACHE          set to 0 to disable (default on)
+    DEP_CACHE_VOLUME   Modal Volume name (default agentswarm-deps)
+    DEP_CACHE_WAIT_S   seconds a miss waits for another task's snapshot build (default 300)
+    DEP_CACHE_LOCK_STALE_S  seconds after which a build lock is treated as abandoned (default 900)
+"""
+
+import json
+import os
+from typing import TYPE_CHECKING
+
+# Only dep_cache_volumes needs Modal; the local backend imports this module
+# for restore_command and describe.
+if TYPE_CHECKING:
+    import modal
+
+DEP_CACHE_ENABLED = os.environ.get("DEP_CACHE", "1") != "0"
+DEP_CACHE_VOLUME = os.environ.get("DEP_CACHE_VOLUME", "agentswarm-deps")
+DEP_CACHE_MOUNT = "/cache"
+DEP_CACHE_WAIT_S = float(os.environ.get("DEP_CACHE_WAIT_S", "300"))
+DEP_CACHE_LOCK_STALE_S = float(os.environ.get("DEP_CACHE_LOCK_STALE_S", "900"))
+
+# Runs inside the sandbox (python3 is in the image).  argv: repo dir, cache
+# dir, seconds to wait for another task's snapshot, seconds after which a
+# build lock counts as abandoned.  Prints one JSON line: status
+# none|hit|miss|installed|failed plus timings.
+_RESTORE_SCRIPT = r"""
+import hashlib, json, os, subprocess, sys, time
+
+repo, cache = sys.argv[1], sys.argv[2]
+wait_s, stale_s = float(sys.argv[3]), float(sys.argv[4])
+LOCKFILES = (
+    ("pnpm-lock.yaml", ["pnpm", "install", "--frozen-lockfile", "--prefer-offline"]),
+    ("package-lock.json", ["npm", "ci", "--prefer-offline", "--no-audit", "--no-fund"]),
+)
+for lockfile, install in LOCKFILES:
+    if os.path.isfile(os.path.join(repo, lockfile)):
+        break
+else:
+    print(json.dumps({"status": "none"}))
+    sys.exit(0)
+
+h = hashlib.sha256()
+for name in (lockfile, "package.json"):
+    path = os.path.join(repo, name)
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            h.update(name.encode() + b"\0" + f.read())
+key = h.hexdigest()[:16]
+snapshots = os.path.join(cache, "node_modules")
+snap = os.path.join(snapshots, key + ".tar")
+meta = os.path.join(snapshots, key + ".json")
+lock = os.path.join(snapshots, key + ".lock")
+out = {"lockfile": lockfile, "lockHash": key}
+t0 = time.time()
+
+
+def restore():
+    if not (os.path.isfile(snap) and os.path.isfile(meta)):
+        return False
+    with open(meta) as f:
+        out["installS"] = json.load(f).get("installS", 0)
+    t = time.time()
+    subprocess.run(["tar", "-xf", snap, "-C", repo], check=True)
+    out.update(status="hit", restoreS=round(time.time() - t, 2))
+    return True
+
+
+def acquire():
+    # One task per lockfile hash installs and writes the snapshot; the lock
+    # file's creation is the mutex.  A lock older than stale_s belongs to a
+    # task that died mid-build and is taken over.
+    for _ in range(2):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) < stale_s:
+                    return False
+                os.remove(lock)
+            except OSError:
+                pass
+            continue
+        os.write(fd, json.dumps({"pid": os.getpid(), "host": os.uname().nodename}).encode())
+        os.close(fd)
+        subprocess.run(["sync", snapshots], check=False)
+        return True
+    return False
+
+
+if restore():
+    print(json.dumps(out))
+    sys.exit(0)
+
+os.makedirs(snapshots, exist_ok=True)
+owner = acquire()
+if not owner:
+    # Another task is building this snapshot: wait for it rather than
+    # installing alongside it, taking over if its lock disappears.
+    deadline = t0 + wait_s
+    while time.time() < deadline:
+        time.sleep(2)
+        if restore():
+            out["waitS"] = round(time.time() - t0 - out["restoreS"], 2)
+            print(json.dumps(out))
+            sys.exit(0)
+        if not os.path.exists(lock) and acquire():
+            owner = True
+            break
+    out["waitS"] = round(time.time() - t0, 2)
+
+try:
+    env = dict(
+        os.environ,
+        NODE_ENV="development",  # the image sets production, which skips devDependencies
+        npm_config_store_dir=os.path.join(cache, "pnpm-store"),
+        npm_config_cache=os.path.join(cache, "npm"),
+    )
+    t = time.time()
+    proc = subprocess.run(install, cwd=repo, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    out["installS"] = round(time.time() - t, 2)
+    if proc.returncode != 0:
+        out.update(status="failed", error=proc.stderr.strip()[-300:])
+        print(json.dumps(out))
+        sys.exit(0)
+    if not owner:
+        # Timed out waiting; the builder still owns the snapshot.
+        out.update(status="installed")
+        print(json.dumps(out))
+        sys.exit(0)
+
+    # Snapshot every top-level node_modules (workspace packages have their own).
+    dirs = []
+    for root, subdirs, _ in os.walk(repo):
+        if "node_modules" in subdirs:
+            dirs.append(os.path.relpath(os.path.join(root, "node_modules"), repo))
+        subdirs[:] = [d for d in subdirs if d not in ("node_modules", ".git")]
+    t = time.time()
+    tmp = f"{snap}.{os.getpid()}.tmp"
+    subprocess.run(["tar", "-cf", tmp, "-C", repo, *dirs], check=True)
+    os.replace(tmp, snap)
+    with open(meta + ".tmp", "w") as f:
+        json.dump({"installS": out["installS"], "lockfile": lockfile, "dirs": dirs, "createdAt": time.time()}, f)
+    os.replace(meta + ".tmp", meta)
+    out.update(status="miss", snapshotS=round(time.time() - t, 2))
+finally:
+    if owner:
+        try:
+            os.remove(lock)
+        except OSError:
+            pass
+        # Volumes v2 persist on sync; v1 commits when the sandbox terminates.
+        subprocess.run(["sync", cache], check=False)
+print(json.dumps(out))
+"""
+
+
+def dep_cache_volumes() -> "dict[str, modal.Volume]":
+    """``volumes=`` argument for ``Sandbox.create``; empty when disabled."""
+    if not DEP_CACHE_ENABLED:
+        return {}
+    import modal
+
+    return {DEP_CACHE_MOUNT: modal.Volume.from_name(DEP_CACHE_VOLUME, create_if_missing=True)}
+
+
+def restore_command(repo_dir: str, cache_dir: str = DEP_CACHE_MOUNT) -> list[str] | None:
+    """argv that restores or installs *repo_dir*'s node_modules from
+    *cache_dir* (the volume mount in a sandbox) and prints its JSON report;
+    None when the cache is disabled."""
+    if not DEP_CACHE_ENABLED:
+        return None
+    return [
+        "python3", "-c", _RESTORE_SCRIPT, repo_dir, cache_dir,
+        str(DEP_CACHE_WAIT_S), str(DEP_CACHE_LOCK_STALE_S),
+    ]
+
+
+def describe(info: dict) -> str:
+    """One-line summary for the ``[spawn]`` log."""
+    status = info.get("status")
+    lock = f"{info.get('lockfile')} {info.get('lockHash')}"
+    if status == "hit" and info.get("waitS"):
+        return (f"deps restored from cache after waiting {info['waitS']:.1f}s for its build "
+                f"({lock}, {info['restoreS']:.1f}s)")
+    if status == "hit":
+        saved = info.get("installS", 0) - info.get("restoreS", 0)
+        return (f"deps restored from cache ({lock}, {info['restoreS']:.1f}s, "
+                f"saved ~{saved:.1f}s of install)")
+    if status == "miss":
+        return f"deps installed and cached ({lock}, {info['installS']:.1f}s)"
+    if status == "installed":
+        return (f"deps installed, not cached: snapshot still building after "
+                f"{info.get('waitS', 0):.0f}s ({lock}, {info['installS']:.1f}s)")
+    if status == "failed":
+        return f"deps install failed ({lock}, {info['installS']:.1f}s): {info.get('error', '')}"
+    if status == "none":
+        return "deps cache skipped (no lockfile)"
+    if status == "disabled":
+        return "deps cache disabled"
+    return f"deps cache error: {info.get('error', 'unknown')}"
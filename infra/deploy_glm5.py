@@ -26,7 +26,6 @@ Usage:
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import subprocess
 import time
@@ -244,11 +243,16 @@ async def test(test_timeout=60 * MINUTES, content=None, twice=True):
 
 
 async def _probe(url: str, messages: list, timeout: int = 60 * MINUTES) -> None:
+    import sys
+
+    sys.path.insert(0, str(here.parent))
+    from infra.glm5_client import GLM5Client
+
     deadline = time.time() + timeout
-    async with aiohttp.ClientSession(base_url=url) as session:
+    async with GLM5Client(url, timeout=None) as client:
         while time.time() < deadline:
             try:
-                await _send_streaming(session, messages)
+                await _send_streaming(client, messages)
                 return
             except asyncio.TimeoutError:
                 await asyncio.sleep(1)
@@ -260,48 +264,22 @@ async def _probe(url: str, messages: list, timeout: int = 60 * MINUTES) -> None:
     raise TimeoutError(f"No response from server within {timeout} seconds")
 
 
-async def _send_streaming(
-    session: aiohttp.ClientSession, messages: list, timeout: int | None = None
-) -> None:
-    payload = {
-        "messages": messages,
-        "stream": True,
-        "max_tokens": 1024 if USE_DUMMY_WEIGHTS else 2048,
-    }
-    headers = {"Accept": "text/event-stream"}
-
-    async with session.post(
-        "/v1/chat/completions", json=payload, headers=headers, timeout=timeout
-    ) as resp:
-        resp.raise_for_status()
-        full_text = ""
-
-        async for raw in resp.content:
-            line = raw.decode("utf-8", errors="ignore").strip()
-            if not line:
-                continue
-
-            if not line.startswith("data:"):
-                continue
-
-            data = line[len("data:"):].strip()
-            if data == "[DONE]":
-                break
-
-            try:
-                evt = json.loads(data)
-            except json.JSONDecodeError:
-                continue
-
-            delta = (evt.get("choices") or [{}])[0].get("delta") or {}
-            chunk = delta.get("content") or delta.get("reasoning_content")
-
-            if chunk:
-                print(
-                    chunk,
-                    end="",
-                    flush="\n" in chunk or "." in chunk or len(chunk) > 100,
-                )
-                full_text += chunk
-        print()
-        print(f"\n--- Generated {len(full_text)} characters ---")
+async def _send_streaming(client, messages: list) -> None:
+    from infra.glm5_client import delta_text
+
+    stream = client.stream_chat(messages, max_tokens=1024 if USE_DUMMY_WEIGHTS else 2048)
+    full_text = ""
+    async for evt in stream:
+        chunk = delta_text(evt)
+        if chunk:
+            print(
+                chunk,
+                end="",
+                flush="\n" in chunk or "." in chunk or len(chunk) > 100,
+            )
+            full_text += chunk
+    print()
+    print(f"\n--- Generated {len(full_text)} characters ---")
+    stats = stream.stats
+    ttft = f"{stats.ttft_s:.2f}s" if stats.ttft_s is not None else "n/a"
+    print(f"--- TTFT {ttft}, {stats.completion_tokens} tokens, {stats.tokens_per_s:.1f} tok/s ---")
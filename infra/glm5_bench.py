@@ -0,0 +1,384 @@
+"""
+GLM-5 Benchmark — concurrent load test of the inference endpoint
+================================================================
+
+Replays planner, worker and reconciler requests against the endpoint at
+one or more concurrency levels and reports, per level and per role:
+
+    TTFT               request sent -> first generated token
+    ITL                gap between consecutive streamed tokens
+    tokens/sec         per-request decode speed, plus aggregate output
+                       tokens/sec across the level
+    errors             count, rate and by status
+
+as p50 / p90 / p99 / mean / max.  Each level is a closed loop: N callers
+keep ``concurrency`` requests in flight until ``--requests`` have been sent.
+
+Requests have the shape the orchestrator logs in ``llm-detail-*.ndjson``
+(``{"messages": [{"role": "system", ...}, {"role": "user", ...}]}``):
+by default the real system prompts from prompts/ with synthetic user
+messages, or recorded ones with ``--replay``.  Roles are mixed by
+``--mix`` (worker calls dominate a real run).
+
+``--mock`` starts the bundled OpenAI-compatible mock server
+(infra/glm5_mock_server.py) in-process, so the harness and client can be
+benchmarked offline before pointing them at Modal.
+
+Usage:
+    python infra/glm5_bench.py --mock                            # offline
+    python infra/glm5_bench.py --concurrency 1,8,24,48 --requests 200 --json bench.json
+    python infra/glm5_bench.py --replay logs/llm-detail-*.ndjson --max-tokens 512
+    python infra/glm5_bench.py --router                          # over LLM_ENDPOINTS
+
+Configuration (env vars):
+    GLM5_ENDPOINT   endpoint benchmarked without --mock / --router
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infra.glm5_client import GLM5Client, delta_text, get_endpoint_url
+
+REPO_ROOT = Path(__file__).parent.parent
+PROMPTS_DIR = REPO_ROOT / "prompts"
+
+ROLES = ("planner", "worker", "reconciler")
+ROLE_PROMPTS = {"planner": "root-planner.md", "worker": "worker.md", "reconciler": "reconciler.md"}
+DEFAULT_MIX = "planner=1,worker=6,reconciler=1"
+
+
+# ---------------------------------------------------------------------------
+# Workload
+# ---------------------------------------------------------------------------
+def _planner_user(rng: random.Random) -> str:
+    tasks = [
+        {
+            "id": f"task-{i:03d}",
+            "description": f"Implement module {i} of the voxel engine with typed exports and unit tests.",
+            "scope": [f"src/engine/module{i}.ts"],
+            "status": rng.choice(["complete", "failed", "pending", "running"]),
+        }
+        for i in range(1, rng.randint(8, 30))
+    ]
+    return (
+        "## Request\nBuild a browser voxel sandbox game in TypeScript with Vite and WebGL2.\n\n"
+        f"## Current state\n{json.dumps(tasks, indent=2)}\n\n"
+        "Emit the next batch of tasks as a JSON array."
+    )
+
+
+def _worker_user(rng: random.Random) -> str:
+    n = rng.randint(1, 400)
+    return json.dumps({
+        "id": f"task-{n:03d}",
+        "description": "Implement chunk meshing in src/world/mesher.ts: greedy meshing per face "
+                       "direction, skip faces between opaque blocks, emit typed vertex arrays.",
+        "scope": ["src/world/mesher.ts", "src/world/chunk.ts"],
+        "acceptance": "tsc --noEmit passes; mesher.test.ts covers an empty and a full chunk.",
+        "branch": f"worker/task-{n:03d}",
+    }, indent=2)
+
+
+def _reconciler_user(rng: random.Random) -> str:
+    errors = "\n".join(
+        f"src/engine/module{rng.randint(1, 40)}.ts({rng.randint(1, 300)},{rng.randint(1, 80)}): "
+        f"error TS2339: Property 'x{i}' does not exist on type 'Vector3'."
+        for i in range(rng.randint(3, 40))
+    )
+    return f"## Build output (tsc --noEmit)\n```\n{errors}\n```\n\nCreate fix tasks for these errors."
+
+
+_USER_BUILDERS = {"planner": _planner_user, "worker": _worker_user, "reconciler": _reconciler_user}
+
+
+def synthetic_request(role: str, rng: random.Random) -> list[dict]:
+    system = (PROMPTS_DIR / ROLE_PROMPTS[role]).read_text()
+    return [{"role": "system", "content": system}, {"role": "user", "content": _USER_BUILDERS[role](rng)}]
+
+
+def classify(messages: list[dict]) -> str:
+    """Role of a recorded request, from its system prompt's heading."""
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    head = system.lstrip()[:64].lower() if isinstance(system, str) else ""
+    if head.startswith("# worker"):
+        return "worker"
+    if head.startswith("# reconciler"):
+        return "reconciler"
+    return "planner"
+
+
+def load_replay(patterns: list[str]) -> dict[str, list[list[dict]]]:
+    """Recorded requests by role from llm-detail NDJSON files."""
+    by_role: dict[str, list[list[dict]]] = {role: [] for role in ROLES}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    messages = entry.get("messages")
+                    if isinstance(messages, list) and messages:
+                        by_role[classify(messages)].append(messages)
+    return by_role
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        role, _, weight = part.partition("=")
+        if role.strip() not in ROLES:
+            raise ValueError(f"unknown role {role!r} in --mix (expected {', '.join(ROLES)})")
+        weights[role.strip()] = float(weight or 1)
+    return weights
+
+
+class Workload:
+    """Draws (role, messages) by ``mix`` weight, synthetic or replayed."""
+
+    def __init__(self, mix: dict[str, float], replay: dict[str, list[list[dict]]] | None = None, seed: int = 0):
+        self.rng = random.Random(seed)
+        if replay is not None:
+            mix = {role: w for role, w in mix.items() if replay.get(role)}
+            if not mix:
+                raise ValueError("no replayable requests found for the roles in --mix")
+        self.roles = list(mix)
+        self.weights = [mix[role] for role in self.roles]
+        self.replay = replay
+
+    def next(self) -> tuple[str, list[dict]]:
+        role = self.rng.choices(self.roles, self.weights)[0]
+        if self.replay is not None:
+            return role, self.rng.choice(self.replay[role])
+        return role, synthetic_request(role, self.rng)
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+class Sample:
+    def __init__(self, role: str):
+        self.role = role
+        self.ttft_s: float | None = None
+        self.itl_s: list[float] = []
+        self.tokens = 0
+        self.tokens_per_s = 0.0
+        self.duration_s = 0.0
+        self.error: str | None = None
+        self.status = 0
+
+
+async def run_one(caller, role: str, messages: list[dict], max_tokens: int) -> Sample:
+    """One streamed request through a ``GLM5Client`` or ``GLM5Router``."""
+    sample = Sample(role)
+    stream = caller.stream_chat(messages, max_tokens=max_tokens, temperature=0.2)
+    last = None
+    try:
+        async for chunk in stream:
+            if not delta_text(chunk):
+                continue
+            now = time.perf_counter()
+            if last is not None:
+                sample.itl_s.append(now - last)
+            last = now
+    except (aiohttp.ClientError, TimeoutError) as e:
+        sample.error = f"{type(e).__name__}: {e}"
+    stats = stream.stats
+    if stats is not None:
+        sample.ttft_s = stats.ttft_s
+        sample.tokens = stats.completion_tokens
+        sample.tokens_per_s = stats.tokens_per_s
+        sample.duration_s = stats.duration_s
+        sample.status = stats.status
+    return sample
+
+
+def percentiles(values: list[float], scale: float = 1.0) -> dict | None:
+    """p50/p90/p99/mean/max of *values* (times *scale*), or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        # Linear interpolation between closest ranks.
+        k = (len(ordered) - 1) * p
+        lo = int(k)
+        hi = min(lo + 1, len(ordered) - 1)
+        return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+    return {
+        key: round(val * scale, 2)
+        for key, val in (
+            ("p50", pct(0.50)), ("p90", pct(0.90)), ("p99", pct(0.99)),
+            ("mean", statistics.fmean(ordered)), ("max", ordered[-1]),
+        )
+    }
+
+
+def summarize(samples: list[Sample], wall_s: float) -> dict:
+    ok = [s for s in samples if s.error is None]
+    errors = [s for s in samples if s.error is not None]
+    tokens = sum(s.tokens for s in ok)
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "errorRate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "errorsByStatus": dict(Counter(str(s.status or s.error.split(":")[0]) for s in errors)),
+        "ttftMs": percentiles([s.ttft_s for s in ok if s.ttft_s is not None], 1000),
+        "itlMs": percentiles([gap for s in ok for gap in s.itl_s], 1000),
+        "tokensPerSec": percentiles([s.tokens_per_s for s in ok if s.tokens_per_s]),
+        "outputTokens": tokens,
+        "aggregateTokensPerSec": round(tokens / wall_s, 1) if wall_s > 0 else 0.0,
+        "wallS": round(wall_s, 2),
+    }
+
+
+async def run_level(caller, workload: Workload, concurrency: int, n_requests: int, max_tokens: int) -> dict:
+    """Keep *concurrency* requests in flight until *n_requests* were sent."""
+    samples: list[Sample] = []
+    remaining = n_requests
+
+    async def caller_loop():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            role, messages = workload.next()
+            samples.append(await run_one(caller, role, messages, max_tokens))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(caller_loop() for _ in range(min(concurrency, n_requests))))
+    wall = time.perf_counter() - t0
+
+    level = {"concurrency": concurrency, **summarize(samples, wall)}
+    level["byRole"] = {
+        role: summarize([s for s in samples if s.role == role], wall)
+        for role in ROLES if any(s.role == role for s in samples)
+    }
+    return level
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+def _fmt(p: dict | None, key: str) -> str:
+    return "-" if p is None else f"{p[key]:.0f}"
+
+
+def print_table(levels: list[dict], out=sys.stderr):
+    print(
+        f"{'conc':>5} {'reqs':>5} {'err%':>6}  {'ttft ms p50/p90/p99':>22}  "
+        f"{'itl ms p50/p90/p99':>20}  {'tok/s p50':>9}  {'agg tok/s':>9}",
+        file=out,
+    )
+    for lv in levels:
+        ttft, itl, tps = lv["ttftMs"], lv["itlMs"], lv["tokensPerSec"]
+        print(
+            f"{lv['concurrency']:>5} {lv['requests']:>5} {lv['errorRate'] * 100:>5.1f}%  "
+            f"{_fmt(ttft, 'p50') + '/' + _fmt(ttft, 'p90') + '/' + _fmt(ttft, 'p99'):>22}  "
+            f"{_fmt(itl, 'p50') + '/' + _fmt(itl, 'p90') + '/' + _fmt(itl, 'p99'):>20}  "
+            f"{_fmt(tps, 'p50'):>9}  {lv['aggregateTokensPerSec']:>9.0f}",
+            file=out,
+        )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+async def bench(args: argparse.Namespace) -> dict:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    replay = load_replay(args.replay) if args.replay else None
+    workload = Workload(parse_mix(args.mix), replay, seed=args.seed)
+
+    mock = None
+    if args.mock:
+        from infra.glm5_mock_server import MockServer
+
+        mock = MockServer(port=0, error_rate=args.mock_error_rate)
+        await mock.start()
+        endpoint = mock.url
+    elif not args.router:
+        endpoint = args.endpoint or get_endpoint_url()
+
+    # By default the client's per-endpoint cap would clip the higher levels;
+    # --respect-limit measures what the orchestrator's callers actually see.
+    client = GLM5Client(timeout=args.timeout)
+    if not args.respect_limit:
+        client.max_concurrency = max(levels)
+    if args.router:
+        from infra.glm5_router import GLM5Router
+
+        caller = GLM5Router(client=client, events_path=None)
+        target = [s.url for s in caller.endpoints]
+    else:
+        client.endpoint = endpoint
+        caller = client
+        target = [endpoint]
+
+    results = []
+    try:
+        for concurrency in levels:
+            print(f"[bench] concurrency {concurrency}: {args.requests} requests", file=sys.stderr, flush=True)
+            results.append(await run_level(caller, workload, concurrency, args.requests, args.max_tokens))
+    finally:
+        if args.router:
+            await caller.close()
+        await client.close()
+        if mock is not None:
+            await mock.stop()
+
+    return {
+        "timestamp": int(time.time() * 1000),
+        "endpoints": target,
+        "mock": bool(args.mock),
+        "replay": bool(replay),
+        "mix": args.mix,
+        "maxTokens": args.max_tokens,
+        "levels": results,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent load test of the GLM-5 endpoint")
+    ap.add_argument("--endpoint", help="Endpoint URL (default: $GLM5_ENDPOINT)")
+    ap.add_argument("--router", action="store_true",
+                    help="Spread requests over LLM_ENDPOINTS with infra/glm5_router.py")
+    ap.add_argument("--mock", action="store_true", help="Benchmark the bundled local mock server")
+    ap.add_argument("--mock-error-rate", type=float, default=0.0, help="503 rate of the mock server")
+    ap.add_argument("--concurrency", default="1,8,24", help="Comma-separated concurrency levels")
+    ap.add_argument("--requests", type=int, default=48, help="Requests per level")
+    ap.add_argument("--max-tokens", type=int, default=256, help="max_tokens per request")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"Role weights (default: {DEFAULT_MIX})")
+    ap.add_argument("--replay", nargs="+", metavar="GLOB",
+                    help="Replay recorded requests from llm-detail-*.ndjson files")
+    ap.add_argument("--respect-limit", action="store_true",
+                    help="Keep the client's per-endpoint cap (max-running-requests) instead of the top level")
+    ap.add_argument("--timeout", type=float, default=600, help="Seconds per request")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", metavar="PATH", help="Write the report as JSON ('-' for stdout)")
+    args = ap.parse_args()
+
+    report = asyncio.run(bench(args))
+    print_table(report["levels"])
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"[bench] wrote {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,15 +10,46 @@ uses `@modal.experimental.http_server` which exposes a "flash URL"
 (low-latency direct endpoint). The URL format is:
     https://<workspace>--glm5-inference-glm5.<region>.modal.direct
 
+Python tooling that drives the endpoint itself uses ``GLM5Client``: one
+keep-alive connection pool shared by every call, chat completions streamed
+as an async iterator of chunks, at most ``max-running-requests`` (from
+infra/config.yaml, 24) calls in flight per endpoint -- more would only
+queue inside SGLang -- and TTFT / tokens-per-second measured per call.
+
 Usage:
     from infra.glm5_client import get_endpoint_url, create_openai_config
 
     url = get_endpoint_url()
     config = create_openai_config(url)
     # Pass config["base_url"], config["api_key"], config["model"] to OpenAI client
+
+    from infra.glm5_client import GLM5Client, delta_text
+
+    async with GLM5Client() as client:
+        stream = client.stream_chat(messages, max_tokens=2048)
+        async for chunk in stream:
+            print(delta_text(chunk), end="")
+        print(stream.stats.ttft_s, stream.stats.tokens_per_s)
+
+        text, stats = await client.chat(messages)
+
+Configuration (env vars):
+    GLM5_ENDPOINT         flash URL (default endpoint)
+    GLM5_MAX_CONCURRENCY  calls in flight per endpoint (default: max-running-requests)
 """
 
+import asyncio
+import json
 import os
+import re
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import aiohttp
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+MODEL = "glm-5"
 
 
 def get_endpoint_url() -> str:
@@ -53,5 +84,269 @@ def create_openai_config(endpoint_url: str) -> dict[str, str]:
     return {
         "base_url": f"{endpoint_url.rstrip('/')}/v1",
         "api_key": os.environ.get("MODAL_TOKEN_ID", "not-needed"),
-        "model": "glm-5",
+        "model": MODEL,
     }
+
+
+def server_max_running_requests(path: Path = CONFIG_PATH, default: int = 24) -> int:
+    """``max-running-requests`` from the SGLang config (flat ``key: value`` YAML)."""
+    try:
+        match = re.search(r"^max-running-requests:\s*(\d+)", path.read_text(), re.MULTILINE)
+    except OSError:
+        return default
+    return int(match.group(1)) if match else default
+
+
+MAX_CONCURRENCY = int(os.environ.get("GLM5_MAX_CONCURRENCY") or server_max_running_requests())
+
+
+# ---------------------------------------------------------------------------
+# Streaming client
+# ---------------------------------------------------------------------------
+def delta_text(chunk: dict) -> str:
+    """Generated text in one chat-completion chunk (content or reasoning)."""
+    delta = (chunk.get("choices") or [{}])[0].get("delta") or {}
+    return delta.get("content") or delta.get("reasoning_content") or ""
+
+
+class CallStats:
+    """Timing of one streamed call.
+
+    Attributes:
+        endpoint:          endpoint the call went to
+        ttft_s:            request sent -> first generated token (None if none arrived)
+        duration_s:        request sent -> stream finished
+        completion_tokens: from the final usage chunk, else one per content chunk
+        prompt_tokens:     from the usage chunk, else None
+        status:            HTTP status (0 if the request never got one)
+        error:             exception text when the call failed
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.ttft_s: float | None = None
+        self.duration_s = 0.0
+        self.completion_tokens = 0
+        self.prompt_tokens: int | None = None
+        self.status = 0
+        self.error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def tokens_per_s(self) -> float:
+        """Decode throughput: output tokens over the time after the first token."""
+        if self.ttft_s is None or self.duration_s <= self.ttft_s:
+            return 0.0
+        return self.completion_tokens / (self.duration_s - self.ttft_s)
+
+    def to_dict(self) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "ttftMs": round(self.ttft_s * 1000) if self.ttft_s is not None else None,
+            "durationMs": round(self.duration_s * 1000),
+            "completionTokens": self.completion_tokens,
+            "promptTokens": self.prompt_tokens,
+            "tokensPerSec": round(self.tokens_per_s, 1),
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class ChatStream:
+    """One streamed chat completion; iterate for chunks, then read ``stats``.
+
+    The endpoint's concurrency slot is held from the first ``__anext__``
+    until the stream ends, fails or is closed.
+    """
+
+    def __init__(self, client: "GLM5Client", endpoint: str, body: dict):
+        self.client = client
+        self.stats = CallStats(endpoint)
+        self._body = body
+        self._chunks = self._run()
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self._chunks
+
+    async def aclose(self):
+        await self._chunks.aclose()
+
+    async def _run(self) -> AsyncIterator[dict]:
+        client, stats = self.client, self.stats
+        endpoint = stats.endpoint
+        client._queued[endpoint] = client._queued.get(endpoint, 0) + 1
+        try:
+            await client._limit(endpoint).acquire()
+        finally:
+            client._queued[endpoint] -= 1
+        try:
+            client._in_flight[endpoint] = client._in_flight.get(endpoint, 0) + 1
+            t0 = time.perf_counter()
+            counted = 0
+            try:
+                session = await client._get_session()
+                async with session.post(
+                    f"{endpoint.rstrip('/')}/v1/chat/completions",
+                    json=self._body,
+                    headers={"Accept": "text/event-stream", **client.headers},
+                    timeout=client.timeout,
+                ) as resp:
+                    stats.status = resp.status
+                    resp.raise_for_status()
+                    async for raw in resp.content:
+                        line = raw.decode("utf-8", errors="ignore").strip()
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            continue
+                        if delta_text(chunk):
+                            if stats.ttft_s is None:
+                                stats.ttft_s = time.perf_counter() - t0
+                            counted += 1
+                        usage = chunk.get("usage")
+                        if usage:
+                            stats.completion_tokens = usage.get("completion_tokens") or 0
+                            stats.prompt_tokens = usage.get("prompt_tokens")
+                        yield chunk
+            except GeneratorExit:
+                # Closed early by the caller; not a failed call.
+                raise
+            except BaseException as e:
+                stats.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                raise
+            finally:
+                stats.duration_s = time.perf_counter() - t0
+                if not stats.completion_tokens:
+                    stats.completion_tokens = counted
+                client._in_flight[endpoint] -= 1
+                client._record(stats)
+        finally:
+            client._limit(endpoint).release()
+
+
+class GLM5Client:
+    """
+    Pooled streaming client for one or more GLM-5 (SGLang) endpoints.
+
+    Args:
+        endpoint:        Default endpoint (default: ``GLM5_ENDPOINT``)
+        max_concurrency: Calls in flight per endpoint; extra calls wait
+        model:           Served model name
+        timeout:         Total seconds per call (None = no limit)
+        keepalive_s:     Seconds an idle pooled connection is kept
+    """
+
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        model: str = MODEL,
+        timeout: float | None = 600,
+        keepalive_s: float = 60,
+    ):
+        self.endpoint = endpoint
+        self.max_concurrency = max_concurrency
+        self.model = model
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.keepalive_s = keepalive_s
+        token = os.environ.get("MODAL_TOKEN_ID")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+        self.calls = 0
+        self.errors = 0
+        self._ttft_sum = 0.0
+        self._ttft_n = 0
+        self._tokens = 0
+        self._limits: dict[str, asyncio.Semaphore] = {}
+        self._in_flight: dict[str, int] = {}
+        self._queued: dict[str, int] = {}
+        self._session: aiohttp.ClientSession | None = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def __aenter__(self) -> "GLM5Client":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            # One pool for every call; per-host limit matches the
+            # per-endpoint semaphore so requests never wait on a socket.
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.max_concurrency,
+                keepalive_timeout=self.keepalive_s,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _limit(self, endpoint: str) -> asyncio.Semaphore:
+        limit = self._limits.get(endpoint)
+        if limit is None:
+            limit = self._limits[endpoint] = asyncio.Semaphore(self.max_concurrency)
+        return limit
+
+    # -- calls ---------------------------------------------------------------
+
+    def stream_chat(self, messages: list[dict], endpoint: str | None = None, **params) -> ChatStream:
+        """Stream a chat completion; extra keyword args go into the request
+        body (``max_tokens``, ``temperature``, ...)."""
+        endpoint = endpoint or self.endpoint or get_endpoint_url()
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            # Final chunk carries token counts for tokens/sec.
+            "stream_options": {"include_usage": True},
+            **params,
+        }
+        return ChatStream(self, endpoint, body)
+
+    async def chat(self, messages: list[dict], endpoint: str | None = None, **params) -> tuple[str, CallStats]:
+        """Whole completion text plus its ``CallStats``."""
+        stream = self.stream_chat(messages, endpoint=endpoint, **params)
+        parts = [delta_text(chunk) async for chunk in stream]
+        return "".join(parts), stream.stats
+
+    # -- stats ---------------------------------------------------------------
+
+    def in_flight(self, endpoint: str | None = None) -> int:
+        return self._in_flight.get(endpoint or self.endpoint or "", 0)
+
+    def queued(self, endpoint: str | None = None) -> int:
+        """Calls waiting for one of the endpoint's ``max_concurrency`` slots."""
+        return self._queued.get(endpoint or self.endpoint or "", 0)
+
+    def _record(self, stats: CallStats):
+        self.calls += 1
+        if not stats.ok:
+            self.errors += 1
+        if stats.ttft_s is not None:
+            self._ttft_sum += stats.ttft_s
+            self._ttft_n += 1
+        self._tokens += stats.completion_tokens
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "inFlight": dict(self._in_flight),
+            "queued": {k: v for k, v in self._queued.items() if v},
+            "meanTtftMs": round(self._ttft_sum / self._ttft_n * 1000) if self._ttft_n else None,
+            "completionTokens": self._tokens,
+        }
@@ -0,0 +1,257 @@
+"""
+GLM-5 Mock Server — offline OpenAI-compatible stand-in for the endpoint
+=======================================================================
+
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) with
+SGLang-like timing, so the client, router and benchmark harness can be
+exercised without a GPU deployment:
+
+    TTFT      = queue wait + base_ttft + prompt_chars * prefill_per_char
+    decoding  = tokens_per_s per request (one token per SSE chunk)
+    batching  = at most max_running requests decode at once; the rest queue,
+                like SGLang's ``max-running-requests``
+    errors    = error_rate of requests answer 503 (as during warmup)
+
+Output is deterministic filler text; the final stream chunk carries
+``usage`` like SGLang does with ``stream_options.include_usage``.
+``GET /metrics`` serves the SGLang gauges infra/sglang_metrics.py scrapes
+(running and queued requests, KV-cache usage, generation throughput).
+
+Usage:
+    python infra/glm5_mock_server.py --port 8000
+    GLM5_ENDPOINT=http://127.0.0.1:8000 python infra/glm5_bench.py
+
+    # In-process (used by glm5_bench.py --mock):
+    from infra.glm5_mock_server import MockServer
+    async with MockServer(port=0) as server:
+        print(server.url)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infra.glm5_client import server_max_running_requests
+
+WORDS = ("the", "worker", "reads", "task", "scope", "and", "commits", "a", "typed", "change", "to", "main")
+
+
+class MockServer:
+    """
+    Args:
+        host, port:        Bind address (port 0 picks a free port; see ``url``)
+        base_ttft_s:       Fixed time to first token
+        prefill_per_char:  Extra TTFT per prompt character
+        tokens_per_s:      Decode speed per request
+        max_running:       Requests decoding at once (max-running-requests)
+        max_tokens:        Output length when the request sets no max_tokens
+        kv_tokens:         KV-cache capacity in tokens (for ``token_usage``)
+        error_rate:        Fraction of requests answered with 503
+        seed:              RNG seed for error injection
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        base_ttft_s: float = 0.05,
+        prefill_per_char: float = 2e-6,
+        tokens_per_s: float = 200.0,
+        max_running: int = server_max_running_requests(),
+        max_tokens: int = 256,
+        kv_tokens: int = 65536,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.base_ttft_s = base_ttft_s
+        self.prefill_per_char = prefill_per_char
+        self.tokens_per_s = tokens_per_s
+        self.max_running = max_running
+        self.max_tokens = max_tokens
+        self.kv_tokens = kv_tokens
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+        self.running = 0
+        self.waiting = 0
+        self.requests = 0
+        self.errors = 0
+        self.generated_tokens = 0
+        self.kv_used = 0
+        self._last_scrape = (time.monotonic(), 0)
+        self._slots: asyncio.Semaphore | None = None
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat)
+        app.router.add_get("/health", self._health)
+        app.router.add_get("/metrics", self._metrics)
+        return app
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve port 0 to the one actually bound.
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # -- handlers ------------------------------------------------------------
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        # SGLang reports throughput over its last logging interval; here it is
+        # the interval since the previous scrape.
+        now = time.monotonic()
+        t0, n0 = self._last_scrape
+        self._last_scrape = (now, self.generated_tokens)
+        gen_tps = (self.generated_tokens - n0) / (now - t0) if now > t0 else 0.0
+        labels = '{model_name="glm-5"}'
+        lines = []
+        for name, kind, value in (
+            ("num_running_reqs", "gauge", self.running),
+            ("num_queue_reqs", "gauge", self.waiting),
+            ("token_usage", "gauge", round(self.kv_used / self.kv_tokens, 4)),
+            ("gen_throughput", "gauge", round(gen_tps, 2)),
+            ("generation_tokens_total", "counter", self.generated_tokens),
+            ("num_requests_total", "counter", self.requests),
+        ):
+            lines += [f"# TYPE sglang:{name} {kind}", f"sglang:{name}{labels} {value}"]
+        return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        rid = self.requests
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "model is loading"}, status=503)
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        n_tokens = int(body.get("max_tokens") or self.max_tokens)
+        created = int(time.time())
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        kv = prompt_chars // 4
+        self.kv_used += kv
+        try:
+            await asyncio.sleep(self.base_ttft_s + prompt_chars * self.prefill_per_char)
+            if not body.get("stream"):
+                await asyncio.sleep(n_tokens / self.tokens_per_s)
+                self.generated_tokens += n_tokens
+                self.kv_used += n_tokens
+                kv += n_tokens
+                text = " ".join(WORDS[i % len(WORDS)] for i in range(n_tokens))
+                return web.json_response({
+                    "id": f"mock-{rid}", "object": "chat.completion", "created": created,
+                    "model": body.get("model", "glm-5"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "length"}],
+                    "usage": _usage(prompt_chars, n_tokens),
+                })
+
+            resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+            await resp.prepare(request)
+            interval = 1 / self.tokens_per_s
+            for i in range(n_tokens):
+                if i:
+                    await asyncio.sleep(interval)
+                await resp.write(_sse(_chunk(rid, created, {"content": WORDS[i % len(WORDS)] + " "})))
+                self.generated_tokens += 1
+                self.kv_used += 1
+                kv += 1
+            final = _chunk(rid, created, {}, finish_reason="length")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                final["usage"] = _usage(prompt_chars, n_tokens)
+            await resp.write(_sse(final))
+            await resp.write(b"data: [DONE]\n\n")
+            return resp
+        finally:
+            self.running -= 1
+            self.kv_used -= kv
+            self._slots.release()
+
+
+def _usage(prompt_chars: int, completion_tokens: int) -> dict:
+    prompt_tokens = prompt_chars // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _chunk(n: int, created: int, delta: dict, finish_reason: str | None = None) -> dict:
+    return {
+        "id": f"mock-{n}", "object": "chat.completion.chunk", "created": created, "model": "glm-5",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def _sse(obj: dict) -> bytes:
+    return f"data: {json.dumps(obj, separators=(',', ':'))}\n\n".encode()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline OpenAI-compatible mock of the GLM-5 endpoint")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--ttft", type=float, default=0.05, help="Base time to first token, seconds")
+    ap.add_argument("--prefill-per-char", type=float, default=2e-6, help="Extra TTFT per prompt character")
+    ap.add_argument("--tokens-per-s", type=float, default=200.0, help="Decode speed per request")
+    ap.add_argument("--max-running", type=int, default=server_max_running_requests(),
+                    help="Requests decoding at once (default: max-running-requests in infra/config.yaml)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    args = ap.parse_args()
+
+    async def serve():
+        server = MockServer(
+            args.host, args.port, base_ttft_s=args.ttft, prefill_per_char=args.prefill_per_char,
+            tokens_per_s=args.tokens_per_s, max_running=args.max_running, error_rate=args.error_rate,
+        )
+        async with server:
+            print(f"[mock] serving GLM-5 mock on {server.url}", flush=True)
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+GLM-5 Router — latency-aware endpoint selection for ``GLM5Client``
+==================================================================
+
+The orchestrator's LLM client spreads requests over ``LLM_ENDPOINTS`` by
+static weight.  For Python tooling this router instead picks, per request,
+the endpoint with the lowest expected wait:
+
+    expected wait = EWMA(TTFT) * (1 + (in_flight + queued) / max_concurrency)
+
+so a replica that is slower or busier gets fewer requests until it catches
+up.  Endpoints without a TTFT sample yet are assumed as fast as the
+fastest known one, so they get tried without taking a whole burst.
+
+An endpoint answering 502/503 before its first success is still warming up
+(SGLang takes 15+ minutes to load GLM-5): it is ejected for ``eject_s``
+seconds, doubling per repeat up to ``max_eject_s``.  After it has served
+traffic, three consecutive failures eject it the same way.  A request
+whose endpoint fails before the first chunk is retried on the next best
+endpoint.
+
+Prefix affinity: every worker request repeats the same ~6.5 KB system
+prompt (the root planner's is ~15 KB).  SGLang's radix cache skips the
+prefill of a prefix it has already seen, but only on the replica that saw
+it.  So requests are keyed by a hash of their leading system messages and
+stick to the replica that first served that prefix; only when that
+replica is saturated (``in_flight + queued >= saturation * max_concurrency``),
+ejected or already failed this request does the prefix go elsewhere by
+expected wait.  Each replica tracks which prefixes it served recently
+(``PREFIX_TTL_S``, an estimate of what its cache still holds) and counts
+prefix hits, misses and the prompt tokens a hit let it skip.
+
+Routing decisions are exported as NDJSON events, one object per line:
+
+    {"timestamp": 1771130913775, "event": "route", "endpoint": "glm5-a",
+     "attempt": 0, "expectedWaitMs": 840,
+     "prefix": "9f2c41d07a3be815", "affinity": "sticky", "prefixHit": true,
+     "candidates": [{"name": "glm5-a", "ttftMs": 700, "inFlight": 4, "expectedWaitMs": 840}, ...]}
+    {"timestamp": ..., "event": "result", "endpoint": "glm5-a", "ttftMs": 650, "status": 200, ...}
+    {"timestamp": ..., "event": "eject", "endpoint": "glm5-b", "reason": "503 during warmup", "forS": 30}
+    {"timestamp": ..., "event": "restore", "endpoint": "glm5-b"}
+
+Replicas behind one flash URL share that URL and cannot be told apart from
+the client; give each replica (or region) its own entry in
+``LLM_ENDPOINTS`` to route between them.  infra/deploy_glm5.py deploys
+its containers behind a single flash URL, so with that default single
+endpoint prefix affinity is switched off: the flash proxy picks the
+container, the router cannot pin one, and prefix "hits" would only count
+repeated prompts, not radix-cache reuse.
+
+Usage:
+    from infra.glm5_router import GLM5Router
+
+    async with GLM5Router(events_path="logs/glm5-routing.ndjson") as router:
+        stream = router.stream_chat(messages, max_tokens=2048)
+        async for chunk in stream:
+            ...
+        print(stream.stats.endpoint, stream.stats.ttft_s)
+        print(router.snapshot())
+
+Configuration (env vars):
+    LLM_ENDPOINTS        JSON [{name, endpoint, weight}] (same format as the orchestrator)
+    GLM5_ENDPOINT        single endpoint fallback
+    GLM5_ROUTER_EVENTS   NDJSON file for routing events (default: none)
+    GLM5_PREFIX_AFFINITY 1 = sticky routing by system-prompt prefix (default 1;
+                         only takes effect with two or more endpoints)
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+
+import aiohttp
+
+from infra.glm5_client import CallStats, GLM5Client, delta_text, get_endpoint_url
+
+# EWMA smoothing, failure threshold and recovery time match the
+# orchestrator's LLMClient (LATENCY_ALPHA, UNHEALTHY_THRESHOLD, RECOVERY_PROBE_MS).
+TTFT_ALPHA = 0.3
+UNHEALTHY_THRESHOLD = 3
+EJECT_S = 30.0
+MAX_EJECT_S = 300.0
+
+WARMUP_STATUSES = (502, 503)
+
+# TTFT assumed before an endpoint has any sample and none is known elsewhere.
+DEFAULT_TTFT_S = 1.0
+
+ROUTER_EVENTS = os.environ.get("GLM5_ROUTER_EVENTS") or None
+
+PREFIX_AFFINITY = os.environ.get("GLM5_PREFIX_AFFINITY", "1") == "1"
+# How long a replica's radix cache is assumed to keep a prefix it served,
+# and how many prefixes are tracked per replica / in the sticky map.
+PREFIX_TTL_S = 600.0
+PREFIX_ENTRIES = 256
+STICKY_ENTRIES = 4096
+# Rough prompt-token estimate for prefix savings.
+CHARS_PER_TOKEN = 4
+
+
+def prefix_key(messages: list[dict]) -> tuple[str, int] | None:
+    """(hash, chars) of the leading system messages, or None without any."""
+    parts = []
+    for msg in messages:
+        if msg.get("role") != "system":
+            break
+        content = msg.get("content")
+        parts.append(content if isinstance(content, str) else json.dumps(content, sort_keys=True))
+    if not parts:
+        return None
+    text = "\x00".join(parts)
+    return hashlib.sha256(text.encode()).hexdigest()[:16], len(text)
+
+
+def load_endpoints() -> list[dict]:
+    """Endpoints from ``LLM_ENDPOINTS``, else ``GLM5_ENDPOINT`` as "default"."""
+    raw = os.environ.get("LLM_ENDPOINTS")
+    if raw:
+        return [
+            {"name": ep["name"], "endpoint": ep["endpoint"].rstrip("/").removesuffix("/v1"),
+             "weight": ep.get("weight", 100)}
+            for ep in json.loads(raw)
+        ]
+    return [{"name": "default", "endpoint": get_endpoint_url(), "weight": 100}]
+
+
+class EndpointState:
+    def __init__(self, name: str, url: str, weight: float, eject_s: float = EJECT_S):
+        self.name = name
+        self.url = url
+        self.weight = weight
+        self.ttft_s: float | None = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.served = False          # has completed a request since start
+        self.ejected_until = 0.0
+        self.eject_s = eject_s
+        # prefix hash -> last time this replica was sent it
+        self.prefixes: OrderedDict[str, float] = OrderedDict()
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+        self.prefix_tokens_saved = 0
+
+    @property
+    def ejected(self) -> bool:
+        return time.time() < self.ejected_until
+
+    def record_ttft(self, ttft_s: float):
+        self.ttft_s = ttft_s if self.ttft_s is None else TTFT_ALPHA * ttft_s + (1 - TTFT_ALPHA) * self.ttft_s
+
+    def record_prefix(self, key: str, chars: int) -> bool:
+        """Note that *key* is sent here; True if it is probably still cached."""
+        now = time.time()
+        seen = self.prefixes.pop(key, None)
+        hit = seen is not None and now - seen < PREFIX_TTL_S
+        self.prefixes[key] = now
+        while len(self.prefixes) > PREFIX_ENTRIES:
+            self.prefixes.popitem(last=False)
+        if hit:
+            self.prefix_hits += 1
+            self.prefix_tokens_saved += chars // CHARS_PER_TOKEN
+        else:
+            self.prefix_misses += 1
+        return hit
+
+
+class RoutedStream:
+    """A chat completion routed by ``GLM5Router``; iterate for chunks, then
+    read ``stats`` (the successful attempt's ``CallStats``) and ``attempts``."""
+
+    def __init__(self, router: "GLM5Router", messages: list[dict], params: dict):
+        self.router = router
+        self.stats: CallStats | None = None
+        self.attempts = 0
+        self._messages = messages
+        self._params = params
+        self._prefix = prefix_key(messages) if router.affinity else None
+        self._chunks = self._run()
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self._chunks
+
+    async def aclose(self):
+        await self._chunks.aclose()
+
+    async def _run(self) -> AsyncIterator[dict]:
+        router = self.router
+        tried: set[str] = set()
+        while True:
+            state = router.select(exclude=tried, attempt=self.attempts, prefix=self._prefix)
+            tried.add(state.name)
+            self.attempts += 1
+            stream = router.client.stream_chat(self._messages, endpoint=state.url, **self._params)
+            self.stats = stream.stats
+            started = False
+            recorded = False
+            try:
+                async for chunk in stream:
+                    started = True
+                    yield chunk
+            except (aiohttp.ClientError, TimeoutError) as e:
+                await stream.aclose()
+                router._record(state, stream.stats)
+                recorded = True
+                # Chunks already reached the caller: the request can't be replayed.
+                if started or len(tried) >= len(router.endpoints):
+                    raise
+                router._event({"event": "retry", "endpoint": state.name, "error": str(e)[:200]})
+                continue
+            finally:
+                # Releases the endpoint slot when the caller stops early, and
+                # records every attempt once: completed, closed early (stats
+                # without an error) or cancelled (an error, so it counts
+                # against the endpoint like any other failure).
+                await stream.aclose()
+                if not recorded:
+                    router._record(state, stream.stats)
+            return
+
+
+class GLM5Router:
+    """
+    Route GLM-5 calls over several endpoints by expected wait.
+
+    Args:
+        endpoints:   [{name, endpoint, weight}] (default: ``load_endpoints()``)
+        client:      Shared ``GLM5Client`` (default: a new one, closed with the router)
+        events_path: Append routing events to this NDJSON file
+        on_event:    Also hand each event dict to this callback
+        eject_s:     First ejection period; doubles per repeat up to ``max_eject_s``
+        affinity:    Route by system-prompt prefix (see module docstring); ignored
+                     with a single endpoint
+        saturation:  Fraction of ``max_concurrency`` in flight at which a
+                     prefix's replica is passed over
+    """
+
+    def __init__(
+        self,
+        endpoints: list[dict] | None = None,
+        client: GLM5Client | None = None,
+        events_path: str | None = ROUTER_EVENTS,
+        on_event: Callable[[dict], None] | None = None,
+        eject_s: float = EJECT_S,
+        max_eject_s: float = MAX_EJECT_S,
+        affinity: bool = PREFIX_AFFINITY,
+        saturation: float = 1.0,
+    ):
+        endpoints = endpoints if endpoints is not None else load_endpoints()
+        # weight 0 disables an endpoint, as in the orchestrator's config.
+        self.endpoints = [
+            EndpointState(ep["name"], ep["endpoint"], ep.get("weight", 100), eject_s)
+            for ep in endpoints if ep.get("weight", 100) > 0
+        ]
+        if not self.endpoints:
+            raise ValueError("GLM5Router requires at least one endpoint with weight > 0")
+        self.max_eject_s = max_eject_s
+        self.eject_base_s = eject_s
+        self._own_client = client is None
+        self.client = client or GLM5Client()
+        self.on_event = on_event
+        # One endpoint leaves nothing to stick to (see module docstring).
+        self.affinity = affinity and len(self.endpoints) > 1
+        self.saturation = saturation
+        # prefix hash -> name of the replica it sticks to
+        self._sticky: OrderedDict[str, str] = OrderedDict()
+        self._events = open(events_path, "a") if events_path else None
+
+    async def __aenter__(self) -> "GLM5Router":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._own_client:
+            await self.client.close()
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+    # -- selection -----------------------------------------------------------
+
+    def expected_wait_s(self, state: EndpointState) -> float:
+        ttft = state.ttft_s
+        if ttft is None:
+            known = [s.ttft_s for s in self.endpoints if s.ttft_s is not None]
+            ttft = min(known) if known else DEFAULT_TTFT_S
+        return ttft * (1 + self.load(state) / self.client.max_concurrency)
+
+    def load(self, state: EndpointState) -> int:
+        """Calls in flight on, or queued in the client for, *state*."""
+        return self.client.in_flight(state.url) + self.client.queued(state.url)
+
+    def saturated(self, state: EndpointState) -> bool:
+        return self.load(state) >= self.saturation * self.client.max_concurrency
+
+    def select(self, exclude: set[str] = frozenset(), attempt: int = 0,
+               prefix: tuple[str, int] | None = None) -> EndpointState:
+        """The prefix's sticky replica if it can take the request, else the
+        endpoint with the lowest expected wait (ties: higher weight)."""
+        now = time.time()
+        for state in self.endpoints:
+            if state.ejected_until and now >= state.ejected_until:
+                state.ejected_until = 0.0
+                self._event({"event": "restore", "endpoint": state.name})
+
+        candidates = [s for s in self.endpoints if s.name not in exclude]
+        live = [s for s in candidates if not s.ejected]
+        # Everything ejected: try the one that comes back soonest rather than failing.
+        pool = live or sorted(candidates, key=lambda s: s.ejected_until)[:1]
+        choice = min(pool, key=lambda s: (self.expected_wait_s(s), -s.weight))
+
+        affinity = {}
+        if prefix is not None:
+            key, chars = prefix
+            home = next((s for s in self.endpoints if s.name == self._sticky.get(key)), None)
+            if home is not None and home in live and not self.saturated(home):
+                choice, mode = home, "sticky"
+            elif home is not None and not home.ejected:
+                # Saturated, or already failed this request: overflow
+                # without moving the prefix's home.
+                mode = "fallback"
+            else:
+                mode = "new"
+            if mode != "fallback":
+                self._sticky[key] = choice.name
+                self._sticky.move_to_end(key)
+                while len(self._sticky) > STICKY_ENTRIES:
+                    self._sticky.popitem(last=False)
+            affinity = {"prefix": key, "affinity": mode, "prefixHit": choice.record_prefix(key, chars)}
+
+        self._event({
+            "event": "route",
+            "endpoint": choice.name,
+            "attempt": attempt,
+            "expectedWaitMs": round(self.expected_wait_s(choice) * 1000),
+            **affinity,
+            "candidates": [
+                {
+                    "name": s.name,
+                    "ttftMs": round(s.ttft_s * 1000) if s.ttft_s is not None else None,
+                    "inFlight": self.client.in_flight(s.url),
+                    "expectedWaitMs": round(self.expected_wait_s(s) * 1000),
+                    **({"ejected": True} if s.ejected else {}),
+                }
+                for s in candidates
+            ],
+        })
+        return choice
+
+    # -- calls ---------------------------------------------------------------
+
+    def stream_chat(self, messages: list[dict], **params) -> RoutedStream:
+        return RoutedStream(self, messages, params)
+
+    async def chat(self, messages: list[dict], **params) -> tuple[str, CallStats]:
+        stream = self.stream_chat(messages, **params)
+        parts = [delta_text(chunk) async for chunk in stream]
+        return "".join(parts), stream.stats
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _record(self, state: EndpointState, stats: CallStats):
+        state.requests += 1
+        self._event({"event": "result", **stats.to_dict(), "endpoint": state.name})
+        if stats.ok:
+            state.served = True
+            state.consecutive_failures = 0
+            state.eject_s = self.eject_base_s
+            if stats.ttft_s is not None:
+                state.record_ttft(stats.ttft_s)
+            return
+
+        state.failures += 1
+        state.consecutive_failures += 1
+        if not state.served and stats.status in WARMUP_STATUSES:
+            self._eject(state, f"{stats.status} during warmup")
+        elif state.consecutive_failures >= UNHEALTHY_THRESHOLD:
+            self._eject(state, f"{state.consecutive_failures} consecutive failures")
+
+    def _eject(self, state: EndpointState, reason: str):
+        if state.ejected:
+            return  # more failures from requests sent before the ejection
+        state.ejected_until = time.time() + state.eject_s
+        self._event({"event": "eject", "endpoint": state.name, "reason": reason, "forS": state.eject_s})
+        state.eject_s = min(state.eject_s * 2, self.max_eject_s)
+        state.consecutive_failures = 0
+
+    def _event(self, event: dict):
+        event = {"timestamp": int(time.time() * 1000), **event}
+        if self._events is not None:
+            self._events.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._events.flush()
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def snapshot(self) -> list[dict]:
+        """Per-endpoint routing state (for dashboards and logs)."""
+        return [
+            {
+                "name": s.name,
+                "ttftMs": round(s.ttft_s * 1000) if s.ttft_s is not None else None,
+                "inFlight": self.client.in_flight(s.url),
+                "expectedWaitMs": round(self.expected_wait_s(s) * 1000),
+                "requests": s.requests,
+                "failures": s.failures,
+                "ejected": s.ejected,
+                "prefixHits": s.prefix_hits,
+                "prefixMisses": s.prefix_misses,
+                "prefixHitRate": round(s.prefix_hits / (s.prefix_hits + s.prefix_misses), 3)
+                if s.prefix_hits + s.prefix_misses else 0.0,
+                "estPrefixTokensSaved": s.prefix_tokens_saved,
+            }
+            for s in self.endpoints
+        ]
@@ -0,0 +1,116 @@
+"""
+Repo Clone Strategies — how a worker sandbox materializes the target repo
+=========================================================================
+
+A full ``git clone`` per task re-downloads the whole history and every
+blob, although the worker only diffs against the commit it starts from
+(``startSha`` = HEAD after checkout) and the run's history grows
+monotonically.  Strategies, chosen with ``CLONE_STRATEGY``:
+
+    full       plain ``git clone`` (default)
+    blobless   ``--filter=blob:none``: full commit history, file contents
+               fetched on demand for the checked-out tree
+    shallow    ``--depth 1``; conflict-resolution tasks deepen the branch
+               they rebase until it shares a merge base with main
+    reference  borrow objects from a bare mirror on the dependency cache
+               volume (``/cache/git``) and fetch only the delta; the mirror
+               is created on first use and refreshed when older than
+               ``CLONE_MIRROR_MAX_AGE`` seconds.  The clone is made with
+               ``--dissociate``, so it keeps working if the volume or the
+               mirror goes away.  Falls back to full when the volume is
+               disabled.
+
+The partial strategies are opt-in: a blobless or shallow clone is cheaper
+to make, but every ``git log -p``, ``git blame``, diff or rebase a worker
+runs afterwards may fetch missing objects over the network, which moves
+the cost into worker time.  Measure a run before switching the default.
+
+Every strategy is a single command; the sandbox bootstrap runs it, falls
+back to a full clone if it fails, and reports the clone time.
+
+Usage:
+    from infra.repo_clone import clone_command, resolve_strategy
+
+    strategy = resolve_strategy(payload.get("cloneStrategy"))
+    argv = clone_command(strategy, repo_url, authed_url, "/workspace/repo")
+
+    # Conflict-resolution tasks: fetch the branch to rebase (deepening
+    # shallow clones until it shares a merge base with main)
+    script = fetch_for_rebase_script("/workspace/repo", branch)
+"""
+
+import hashlib
+import os
+import shlex
+
+from infra.dep_cache import DEP_CACHE_ENABLED, DEP_CACHE_MOUNT
+
+CLONE_STRATEGIES = ("full", "blobless", "shallow", "reference")
+CLONE_STRATEGY = os.environ.get("CLONE_STRATEGY", "full")
+CLONE_MIRROR_MAX_AGE = int(os.environ.get("CLONE_MIRROR_MAX_AGE", "3600"))
+
+# Deepening steps for shallow clones before giving up and unshallowing.
+_DEEPEN_STEPS = (50, 200, 1000)
+
+
+def _mirror_script(repo_url: str, authed_url: str, dest: str) -> str:
+    """Shell script: ensure a fresh bare mirror on the volume, clone against it."""
+    key = hashlib.sha256(repo_url.encode()).hexdigest()[:16]
+    mirror = f"{DEP_CACHE_MOUNT}/git/{key}.git"
+    q = shlex.quote
+    return f"""
+set -e
+mirror={q(mirror)}
+if [ ! -d "$mirror/objects" ]; then
+  tmp="$mirror.$$.tmp"
+  git clone --quiet --bare {q(authed_url)} "$tmp"
+  # The token must not be persisted on the shared volume.
+  git -C "$tmp" remote set-url origin {q(repo_url)}
+  mkdir -p "$(dirname "$mirror")"
+  mv "$tmp" "$mirror" 2>/dev/null || rm -rf "$tmp"
+elif [ $(( $(date +%s) - $(stat -c %Y "$mirror/FETCH_HEAD" 2>/dev/null || echo 0) )) -gt {CLONE_MIRROR_MAX_AGE} ]; then
+  git -C "$mirror" fetch --quiet --prune {q(authed_url)} '+refs/heads/*:refs/heads/*' || true
+fi
+sync "$mirror" 2>/dev/null || true
+# --dissociate copies the borrowed objects, so the clone does not depend on
+# alternates on the shared volume outliving it.
+git clone --quiet --reference-if-able "$mirror" --dissociate {q(authed_url)} {q(dest)}
+"""
+
+
+def clone_command(strategy: str, repo_url: str, authed_url: str, dest: str) -> list[str]:
+    """Command (argv) that materializes *repo_url* at *dest* with *strategy*."""
+    if strategy == "full":
+        return ["git", "clone", authed_url, dest]
+    if strategy == "shallow":
+        return ["git", "clone", "--depth", "1", authed_url, dest]
+    if strategy == "reference":
+        return ["bash", "-c", _mirror_script(repo_url, authed_url, dest)]
+    return ["git", "clone", "--filter=blob:none", authed_url, dest]
+
+
+def resolve_strategy(requested: str | None) -> str:
+    strategy = requested or CLONE_STRATEGY
+    if strategy not in CLONE_STRATEGIES:
+        strategy = "full"
+    if strategy == "reference" and not DEP_CACHE_ENABLED:
+        strategy = "full"
+    return strategy
+
+
+def fetch_for_rebase_script(repo_dir: str, branch: str, base: str = "main") -> str:
+    """Shell script fetching *branch* so it can be rebased onto *base*.  In a
+    shallow clone both are deepened until they share a merge base,
+    unshallowing as a last resort."""
+    q = shlex.quote
+    steps = " ".join(str(d) for d in _DEEPEN_STEPS)
+    refspecs = " ".join(q(f"+refs/heads/{b}:refs/remotes/origin/{b}") for b in (branch, base))
+    return f"""
+cd {q(repo_dir)}
+[ -f .git/shallow ] || exec git fetch --quiet origin {q(branch)}
+for depth in {steps}; do
+  git fetch --quiet --depth "$depth" origin {refspecs}
+  git merge-base origin/{q(branch)} origin/{q(base)} >/dev/null 2>&1 && exit 0
+done
+git fetch --quiet --unshallow origin {refspecs}
+"""
@@ -0,0 +1,401 @@
+"""
+Sandbox Backends — where ``run_task`` runs the bootstrap
+========================================================
+
+``run_task`` drives one task through the single-exec bootstrap
+(infra/sandbox_bootstrap.py).  A backend supplies the environment for it:
+
+    modal   an ephemeral Modal sandbox (or a warm-pool lease); the default
+    local   a per-task temp dir on this machine with a ``git worktree`` of
+            one shared local object store, so "cloning" is a fetch of what
+            is new plus a checkout.  Runs the locally built
+            packages/sandbox/dist/worker-runner.js.  No Modal needed.
+
+Backends hand out ``SandboxSession`` objects; ``run_task`` only uses the
+session interface, so a new backend needs ``create`` plus a session with
+``clone_step``, ``exec_bootstrap`` and ``terminate``.  Sessions can also be
+parked after their task and resumed for a follow-up on the same branch
+(``resume`` / ``resume_step``, see infra/sandbox_parking.py).
+
+Usage:
+    from infra.sandbox_backends import get_backend
+
+    backend = get_backend("local")
+    session = await backend.create(payload)
+    proc = await session.exec_bootstrap(spec)
+    async for line in proc.stdout: ...
+    await session.terminate()
+
+Configuration (env vars):
+    SANDBOX_BACKEND      modal | local (default modal; payload "sandboxBackend" overrides)
+    LOCAL_SANDBOX_ROOT   local backend state (default ~/.cache/agentswarm/local-sandbox)
+    LOCAL_WORKER_RUNNER  worker entry point (default packages/sandbox/dist/worker-runner.js)
+"""
+
+import abc
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import AsyncIterator
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from infra.dep_cache import DEP_CACHE_MOUNT, dep_cache_volumes
+from infra.repo_clone import clone_command, fetch_for_rebase_script, resolve_strategy
+from infra.sandbox_pool import REPO_DIR, TASK_TIMEOUT, SandboxPool, authed_repo_url, refresh_command
+
+# Imported where Modal is used, so the local backend runs without it installed.
+if TYPE_CHECKING:
+    import modal
+
+REPO_ROOT = Path(__file__).parent.parent
+SANDBOX_BACKENDS = ("modal", "local")
+SANDBOX_BACKEND = os.environ.get("SANDBOX_BACKEND", "modal")
+
+LOCAL_SANDBOX_ROOT = Path(
+    os.environ.get("LOCAL_SANDBOX_ROOT")
+    or Path.home() / ".cache" / "agentswarm" / "local-sandbox"
+)
+LOCAL_WORKER_RUNNER = os.environ.get(
+    "LOCAL_WORKER_RUNNER",
+    str(REPO_ROOT / "packages" / "sandbox" / "dist" / "worker-runner.js"),
+)
+
+BOOTSTRAP_PATH = "/agent/bootstrap.py"
+LOCAL_BOOTSTRAP_PATH = str(REPO_ROOT / "infra" / "sandbox_bootstrap.py")
+
+
+_modal_lock = threading.Lock()
+
+
+def modal_resources() -> "tuple[modal.App, modal.Image]":
+    """The Modal app and worker image, resolved on first use only.  Safe to
+    call from many threads at once (tasks starting together resolve once)."""
+    with _modal_lock:
+        return _resolve_modal_resources()
+
+
+@cache
+def _resolve_modal_resources() -> "tuple[modal.App, modal.Image]":
+    import modal
+
+    from infra.sandbox_image import resolve_worker_image
+
+    app = modal.App.lookup("agentswarm", create_if_missing=True)
+    # Looked up by content hash; only built when packages/*/dist or the SDK pin changed.
+    image, _ = resolve_worker_image(app)
+    return app, image
+
+
+# ---------------------------------------------------------------------------
+# Session interface
+# ---------------------------------------------------------------------------
+class BootstrapProcess(abc.ABC):
+    """A running bootstrap: line iterators for stdout/stderr plus ``wait``."""
+
+    stdout: AsyncIterator[str]
+    stderr: AsyncIterator[str]
+
+    @abc.abstractmethod
+    async def wait(self) -> int:
+        """Exit code once the process ends."""
+
+
+class SandboxSession(abc.ABC):
+    """One task's sandbox.
+
+    Attributes:
+        detail:    shown in the "sandbox created" line (e.g. "warm pool, idle 3.0s")
+        warm:      the repo is already materialized
+        repo_dir:  repo path as seen by the bootstrap
+        cache_dir: dependency cache path as seen by the bootstrap
+        push_url:  push target if the clone's origin cannot push, else None
+        deadline:  epoch seconds the sandbox is killed at by its backend
+        reused:    claimed from parking (infra/sandbox_parking.py)
+        uses_host_memory: runs on this machine, so parking evicts it
+                   under host memory pressure
+    """
+
+    detail = ""
+    warm = False
+    repo_dir = REPO_DIR
+    cache_dir = DEP_CACHE_MOUNT
+    push_url: str | None = None
+    deadline = float("inf")
+    reused = False
+    uses_host_memory = False
+
+    @property
+    def remaining_s(self) -> float:
+        return self.deadline - time.time()
+
+    @abc.abstractmethod
+    def clone_step(self, payload: dict) -> tuple[list[str], list[str] | None, str]:
+        """(clone argv, fallback argv or None, label) for the bootstrap."""
+
+    def rebase_fetch(self, source: str) -> str | None:
+        """Shell script making origin/<source> available for the rebase."""
+        return fetch_for_rebase_script(self.repo_dir, source)
+
+    async def resume(self, payload: dict) -> None:
+        """Prepare a parked session for a follow-up task on its branch."""
+        self.reused = True
+
+    def resume_step(self, payload: dict, fetch: bool = True) -> list[str]:
+        """argv run in place of the clone in a parked session: drop whatever
+        the previous task left behind (ignored files such as node_modules
+        stay) and fetch main for the rebase."""
+        repo = shlex.quote(self.repo_dir)
+        script = (
+            f"git -C {repo} rebase --abort >/dev/null 2>&1; "
+            f"git -C {repo} reset --quiet --hard && git -C {repo} clean -fdq"
+        )
+        if fetch:
+            url = authed_repo_url(payload["repoUrl"], payload.get("gitToken", ""))
+            script += (
+                f" && git -C {repo} fetch --quiet {shlex.quote(url)} "
+                f"'+refs/heads/main:refs/remotes/origin/main'"
+            )
+        return ["bash", "-c", script]
+
+    @abc.abstractmethod
+    async def exec_bootstrap(self, spec: dict) -> BootstrapProcess:
+        """Start the bootstrap script described by *spec*."""
+
+    @abc.abstractmethod
+    async def terminate(self) -> None:
+        """Kill or release the sandbox."""
+
+
+# ---------------------------------------------------------------------------
+# Modal
+# ---------------------------------------------------------------------------
+class _ModalProcess(BootstrapProcess):
+    def __init__(self, process):
+        self._process = process
+        self.stdout = process.stdout
+        self.stderr = process.stderr
+
+    async def wait(self) -> int:
+        await self._process.wait.aio()
+        return self._process.returncode
+
+
+class ModalSession(SandboxSession):
+    def __init__(self, sandbox: "modal.Sandbox", detail: str, warm: bool, deadline: float):
+        self.sandbox = sandbox
+        self.detail = detail
+        self.warm = warm
+        self.deadline = deadline
+
+    def clone_step(self, payload):
+        repo_url = payload["repoUrl"]
+        authed_url = authed_repo_url(repo_url, payload.get("gitToken", ""))
+        if self.warm:
+            # Already cloned (with the pool's token); switch origin to this
+            # task's credentials and fetch what main gained since warming.
+            return refresh_command(authed_url), None, "warm pool"
+        # Every strategy keeps HEAD, which worker-runner diffs against as startSha.
+        label = resolve_strategy(payload.get("cloneStrategy"))
+        fallback = clone_command("full", repo_url, authed_url, REPO_DIR) if label != "full" else None
+        return clone_command(label, repo_url, authed_url, REPO_DIR), fallback, label
+
+    async def exec_bootstrap(self, spec):
+        process = await self.sandbox.exec.aio("python3", BOOTSTRAP_PATH, timeout=TASK_TIMEOUT - 60, bufsize=1)
+        process.stdin.write(json.dumps(spec))
+        process.stdin.write_eof()
+        await process.stdin.drain.aio()
+        return _ModalProcess(process)
+
+    async def terminate(self):
+        await self.sandbox.terminate.aio()
+
+
+class ModalBackend:
+    name = "modal"
+
+    def __init__(self, pool: SandboxPool | None = None, park_ttl: float = 0):
+        self.pool = pool
+        # A sandbox that may be parked needs room for a second full task
+        # after its own and the time spent parked.
+        self.timeout = TASK_TIMEOUT + (TASK_TIMEOUT + int(park_ttl) if park_ttl > 0 else 0)
+
+    async def create(self, payload: dict) -> ModalSession:
+        import modal
+
+        warm = self.pool.lease(payload["repoUrl"]) if self.pool is not None else None
+        if warm is not None:
+            # Pool sandboxes get TASK_TIMEOUT + max_idle from their creation.
+            deadline = warm.ready_at - warm.clone_s + TASK_TIMEOUT + self.pool.max_idle
+            return ModalSession(warm.sandbox, f"warm pool, idle {warm.idle_s:.1f}s", warm=True, deadline=deadline)
+        t0 = time.time()
+        app, image = await asyncio.to_thread(modal_resources)
+        sb = await modal.Sandbox.create.aio(
+            app=app,
+            image=image,
+            timeout=self.timeout,
+            workdir="/workspace",
+            volumes=dep_cache_volumes(),
+        )
+        return ModalSession(sb, f"{time.time() - t0:.1f}s", warm=False, deadline=t0 + self.timeout)
+
+
+# ---------------------------------------------------------------------------
+# Local (git worktrees)
+# ---------------------------------------------------------------------------
+class _LocalProcess(BootstrapProcess):
+    def __init__(self, process: asyncio.subprocess.Process):
+        self._process = process
+        self.stdout = self._lines(process.stdout)
+        self.stderr = self._lines(process.stderr)
+
+    @staticmethod
+    async def _lines(stream: asyncio.StreamReader) -> AsyncIterator[str]:
+        async for raw in stream:
+            yield raw.decode("utf-8", errors="replace")
+
+    async def wait(self) -> int:
+        return await self._process.wait()
+
+
+def _git(*args: str) -> None:
+    proc = subprocess.run(["git", *args], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args[2:4] if args[0] == '-C' else args[:1])} failed: "
+                           f"{proc.stderr.strip()[-300:]}")
+
+
+class LocalSession(SandboxSession):
+    uses_host_memory = True
+
+    def __init__(self, backend: "LocalBackend", store: Path, workspace: Path, payload: dict, detail: str):
+        self.backend = backend
+        self.store = store
+        self.workspace = workspace
+        self.repo_dir = str(workspace / "repo")
+        self.cache_dir = str(backend.root / "cache")
+        # Every branch a task checked out in this worktree; a parked session
+        # adds its follow-up task's branch, and release() deletes them all.
+        self.branches = [payload["task"]["branch"]]
+        self.detail = detail
+        # The shared store's origin carries no token; push with it explicitly.
+        self.push_url = authed_repo_url(payload["repoUrl"], payload.get("gitToken", ""))
+
+    def clone_step(self, payload):
+        # The store was fetched in create(); a worktree is just a checkout.
+        return (
+            ["git", "-C", str(self.store), "worktree", "add", "--detach", self.repo_dir, "origin/main"],
+            None,
+            "worktree",
+        )
+
+    def rebase_fetch(self, source):
+        # create() already fetched every branch into the shared store.
+        return None
+
+    async def resume(self, payload):
+        await super().resume(payload)
+        branch = payload["task"]["branch"]
+        if branch not in self.branches:
+            self.branches.append(branch)
+        # Fetch main into the shared store under its lock, as create() does.
+        await asyncio.to_thread(self.backend.prepare_store, payload["repoUrl"], payload.get("gitToken", ""))
+
+    def resume_step(self, payload, fetch=True):
+        return super().resume_step(payload, fetch=False)
+
+    async def exec_bootstrap(self, spec):
+        env = {
+            **os.environ,
+            "WORKSPACE_DIR": str(self.workspace),
+            "WORKER_RUNNER": LOCAL_WORKER_RUNNER,
+            "PYTHONUNBUFFERED": "1",
+        }
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, LOCAL_BOOTSTRAP_PATH,
+            cwd=self.workspace, env=env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=64 * 1024 * 1024,  # the result event carries the whole diff
+        )
+        process.stdin.write(json.dumps(spec).encode())
+        await process.stdin.drain()
+        process.stdin.close()
+        return _LocalProcess(process)
+
+    async def terminate(self):
+        await asyncio.to_thread(self.backend.release, self)
+
+
+class LocalBackend:
+    """Per-task worktrees of one bare store per target repo under ``root``."""
+
+    name = "local"
+
+    def __init__(self, root: Path = LOCAL_SANDBOX_ROOT):
+        self.root = Path(root)
+
+    def store_for(self, repo_url: str) -> Path:
+        return self.root / "git" / f"{hashlib.sha256(repo_url.encode()).hexdigest()[:16]}.git"
+
+    def prepare_store(self, repo_url: str, git_token: str) -> tuple[Path, float]:
+        """Create or fetch the shared store; returns (path, seconds).  A file
+        lock serializes this across tasks and spawner processes."""
+        store = self.store_for(repo_url)
+        store.parent.mkdir(parents=True, exist_ok=True)
+        authed = authed_repo_url(repo_url, git_token)
+        t0 = time.time()
+        with open(f"{store}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not (store / "objects").is_dir():
+                _git("clone", "--quiet", "--bare", authed, str(store))
+                # Keep the token out of the stored config; track branches
+                # as origin/* so worktrees resolve origin/main.
+                _git("-C", str(store), "remote", "set-url", "origin", repo_url)
+                _git("-C", str(store), "config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+            _git("-C", str(store), "fetch", "--quiet", "--prune", authed,
+                 "+refs/heads/*:refs/remotes/origin/*")
+            _git("-C", str(store), "worktree", "prune")
+        return store, time.time() - t0
+
+    async def create(self, payload: dict) -> LocalSession:
+        store, fetch_s = await asyncio.to_thread(
+            self.prepare_store, payload["repoUrl"], payload.get("gitToken", ""),
+        )
+        workspace = Path(tempfile.mkdtemp(prefix=f"agentswarm-{payload['task']['id']}-"))
+        return LocalSession(self, store, workspace, payload, f"local worktree, store fetched in {fetch_s:.1f}s")
+
+    def release(self, session: LocalSession) -> None:
+        """Drop the worktree, every local branch its tasks checked out and
+        the temp dir."""
+        for args in (
+            ("-C", str(session.store), "worktree", "remove", "--force", session.repo_dir),
+            *(("-C", str(session.store), "branch", "-D", branch) for branch in session.branches),
+        ):
+            try:
+                _git(*args)
+            except RuntimeError:
+                pass
+        shutil.rmtree(session.workspace, ignore_errors=True)
+
+
+def get_backend(name: str | None = None, pool: SandboxPool | None = None, park_ttl: float = 0):
+    """Backend by name (default ``SANDBOX_BACKEND``); *pool* and *park_ttl*
+    (sandbox lifetime headroom for parking) apply to Modal."""
+    name = name or SANDBOX_BACKEND
+    if name == "local":
+        return LocalBackend()
+    if name != "modal":
+        raise ValueError(f"unknown sandbox backend {name!r} (expected one of {', '.join(SANDBOX_BACKENDS)})")
+    return ModalBackend(pool, park_ttl)
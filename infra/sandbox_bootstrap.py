@@ -0,0 +1,183 @@
+"""
+Sandbox Bootstrap — the whole task lifecycle in one exec
+========================================================
+
+Baked into the worker image as /agent/bootstrap.py and run by ``run_task``
+as a single ``exec``, replacing the sequence of round trips it used to
+make (write task.json, clone, fetch, checkout, rebase, run worker, read
+result.json, push).  Runs on the image's python3, so stdlib only.
+
+Input: one JSON object on stdin, built by ``spawn_sandbox.bootstrap_spec``:
+
+    payload         task payload, written to $WORKSPACE_DIR/task.json
+    repoDir         where the repo lives ($WORKSPACE_DIR/repo)
+    clone           argv that clones (or refreshes) the repo
+    cloneFallback   argv retried after a failed clone, or null
+    cloneLabel      strategy name reported with the clone phase
+    branch          branch to create
+    conflictSource  branch to rebase onto main instead, or null
+    conflictFetch   shell script fetching conflictSource for the rebase, or null
+    conflictRef     ref holding conflictSource (default origin/<conflictSource>)
+    deps            argv restoring the dependency cache, or null
+    push            push the branch when files changed
+    pushUrl         push target when it is not the clone's origin, or null
+    workerTimeout   seconds the worker may run
+
+WORKSPACE_DIR (default /workspace) and WORKER_RUNNER (default
+/agent/worker-runner.js) locate the task files and the worker.
+
+Output: the worker's own output passes through unchanged; lifecycle events
+are single lines ``@@bootstrap {json}``:
+
+    {"event": "start", "phase": "worker"}
+    {"event": "phase", "phase": "clone", "startMs": 1771130913775, "ms": 3120, "ok": true, ...}
+    {"event": "result", "result": {...handoff...} | null, "error": "..."}
+    {"event": "timings", "phases": {"clone": 3120, ...}, "totalMs": 312000}
+
+``result`` is always emitted, followed by ``timings``.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+MARKER = "@@bootstrap "
+# Defaults match the Modal image; the local backend overrides both.
+WORKSPACE_DIR = os.environ.get("WORKSPACE_DIR", "/workspace")
+TASK_PATH = os.path.join(WORKSPACE_DIR, "task.json")
+RESULT_PATH = os.path.join(WORKSPACE_DIR, "result.json")
+WORKER_RUNNER = os.environ.get("WORKER_RUNNER", "/agent/worker-runner.js")
+
+_timings = {}
+
+
+def emit(event):
+    sys.stdout.write(MARKER + json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def run(argv, timeout=None, cwd=None):
+    return subprocess.run(argv, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+
+
+def git(repo, *args, timeout=120):
+    return run(["git", "-C", repo, *args], timeout=timeout)
+
+
+class Phase:
+    """Times one phase and emits its event; extra fields go in ``info``."""
+
+    def __init__(self, name):
+        self.name = name
+        self.info = {}
+
+    def __enter__(self):
+        self.t0 = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = round((time.time() - self.t0) * 1000)
+        _timings[self.name] = ms
+        ok = exc is None and "error" not in self.info
+        event = {
+            "event": "phase", "phase": self.name, "startMs": round(self.t0 * 1000),
+            "ms": ms, "ok": ok, **self.info,
+        }
+        if exc is not None:
+            event["error"] = str(exc)
+        emit(event)
+        return False
+
+
+def _check(proc, what):
+    if proc.returncode != 0:
+        raise RuntimeError(f"{what} exited with {proc.returncode}: {proc.stderr.strip()[-300:]}")
+
+
+def bootstrap(spec):
+    repo = spec["repoDir"]
+    payload = spec["payload"]
+
+    with Phase("write"):
+        with open(TASK_PATH, "w") as f:
+            json.dump(payload, f)
+
+    with Phase("clone") as phase:
+        phase.info["strategy"] = spec.get("cloneLabel", "")
+        proc = run(spec["clone"], timeout=300)
+        if proc.returncode != 0 and spec.get("cloneFallback"):
+            shutil.rmtree(repo, ignore_errors=True)
+            phase.info["strategy"] = "full"
+            proc = run(spec["cloneFallback"], timeout=300)
+        _check(proc, "clone")
+
+    branch = spec["branch"]
+    source = spec.get("conflictSource")
+    with Phase("checkout") as phase:
+        if source:
+            # Conflict-resolution mode: checkout the original branch and
+            # rebase onto main so conflict markers appear in the working tree.
+            phase.info.update(mode="rebase", source=source)
+            if spec.get("conflictFetch"):
+                _check(run(["bash", "-c", spec["conflictFetch"]], timeout=300), "fetch")
+            ref = spec.get("conflictRef") or f"origin/{source}"
+            _check(git(repo, "checkout", "-B", branch, ref), "checkout")
+            # Rebase exits non-zero if conflicts exist — that's expected.
+            phase.info["conflicts"] = git(repo, "rebase", "origin/main").returncode != 0
+        else:
+            phase.info.update(mode="branch", branch=branch)
+            # -B: worktrees of the local backend share branches, so a retried
+            # task may find its branch already there.
+            _check(git(repo, "checkout", "-B", branch), "checkout")
+
+    if spec.get("deps"):
+        with Phase("deps") as phase:
+            proc = run(spec["deps"], timeout=900)
+            lines = proc.stdout.strip().splitlines()
+            phase.info["report"] = json.loads(lines[-1]) if lines else {"status": "error", "error": "no output"}
+
+    emit({"event": "start", "phase": "worker"})
+    with Phase("worker") as phase:
+        # Output goes straight to our stdout, where the host streams it.
+        proc = subprocess.run(
+            ["node", WORKER_RUNNER],
+            stdout=sys.stdout, stderr=subprocess.STDOUT, timeout=spec.get("workerTimeout", 1800),
+        )
+        phase.info["exitCode"] = proc.returncode
+
+    with Phase("result"):
+        with open(RESULT_PATH) as f:
+            result = json.load(f)
+
+    with Phase("push") as phase:
+        if not result.get("filesChanged"):
+            phase.info["skipped"] = "no files changed"
+        elif not spec.get("push"):
+            phase.info["skipped"] = "no GIT_TOKEN"
+        else:
+            # A failed push still returns the handoff; the merge queue
+            # reports the missing branch.
+            proc = git(repo, "push", spec.get("pushUrl") or "origin", branch)
+            phase.info["branch"] = branch
+            if proc.returncode != 0:
+                phase.info["error"] = proc.stderr.strip()[-300:]
+
+    return result
+
+
+def main():
+    t0 = time.time()
+    result, error = None, None
+    try:
+        result = bootstrap(json.load(sys.stdin))
+    except Exception as e:
+        error = str(e)
+    emit({"event": "result", "result": result, "error": error})
+    emit({"event": "timings", "phases": _timings, "totalMs": round((time.time() - t0) * 1000)})
+
+
+if __name__ == "__main__":
+    main()
@@ -11,18 +11,57 @@ Each sandbox gets a copy of this image with:
 - The @agentswarm/sandbox package (the agent itself)
 - Pi coding agent SDK (@mariozechner/pi-coding-agent)
 
+The worker image is keyed on a content hash of the copied dist directories,
+the pinned Pi SDK version and this recipe.  ``resolve_worker_image`` keeps
+the built image id in a local cache file, so an unchanged build skips
+hashing/uploading the local dirs and rebuilding layers entirely -- the
+image is looked up by id.
+
 Usage:
     from infra.sandbox_image import create_agent_image
     image = create_agent_image()
     sandbox = modal.Sandbox.create(image=image, ...)
+
+    from infra.sandbox_image import resolve_worker_image
+    image, info = resolve_worker_image(app)   # info["hit"], info["buildS"], ...
+
+    # Report the cache state, building on a miss:
+    python infra/sandbox_image.py [--rebuild] [--hash-only] [--json]
 """
 
-import modal
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
 from pathlib import Path
 
+import modal
+
 # Root of the agentswarm repo
 REPO_ROOT = Path(__file__).parent.parent
 
+# Pinned Pi coding agent SDK installed into the worker image.
+PI_SDK_VERSION = "0.52.12"
+PI_SDK_PACKAGE = f"@mariozechner/pi-coding-agent@{PI_SDK_VERSION}"
+
+# Local files copied into the worker image (and hashed for its cache key).
+WORKER_IMAGE_INPUTS = (
+    REPO_ROOT / "packages" / "core" / "dist",
+    REPO_ROOT / "packages" / "core" / "package.json",
+    REPO_ROOT / "packages" / "sandbox" / "dist",
+    REPO_ROOT / "packages" / "sandbox" / "package.json",
+    REPO_ROOT / "infra" / "sandbox_bootstrap.py",
+)
+
+# Resolved image ids by content hash (WORKER_IMAGE_CACHE overrides the path).
+IMAGE_CACHE_PATH = Path(
+    os.environ.get("WORKER_IMAGE_CACHE")
+    or Path.home() / ".cache" / "agentswarm" / "worker-image.json"
+)
+IMAGE_CACHE_MAX_ENTRIES = 8
+
 
 def create_agent_image() -> modal.Image:
     """
@@ -105,14 +144,15 @@ def create_worker_image() -> modal.Image:
     
     image = (
         base
+        # Install Pi coding agent SDK globally -- before the local copies, so
+        # a rebuilt dist does not invalidate this layer
+        .run_commands(f"npm install -g {PI_SDK_PACKAGE}")
         # Copy core package
         .add_local_dir(str(core_dist), "/agent/packages/core/dist", copy=True)
         .add_local_file(str(core_pkg), "/agent/packages/core/package.json", copy=True)
         # Copy sandbox package
         .add_local_dir(str(sandbox_dist), "/agent/packages/sandbox/dist", copy=True)
         .add_local_file(str(sandbox_pkg), "/agent/packages/sandbox/package.json", copy=True)
-        # Install Pi coding agent SDK globally
-        .run_commands("npm install -g @mariozechner/pi-coding-agent@0.52.12")
         # Link @agentswarm/core so sandbox can resolve it
         # (both packages are pre-built JS with zero runtime deps — no npm install needed)
         .run_commands(
@@ -122,11 +162,111 @@ def create_worker_image() -> modal.Image:
             "ln -s $(npm root -g)/@mariozechner /agent/node_modules/@mariozechner",
             "ln -s /agent/packages/sandbox/dist/worker-runner.js /agent/worker-runner.js",
         )
+        # Single-exec task lifecycle driven by spawn_sandbox.run_task
+        .add_local_file(str(REPO_ROOT / "infra" / "sandbox_bootstrap.py"), "/agent/bootstrap.py", copy=True)
     )
     
     return image
 
 
+# ---------------------------------------------------------------------------
+# Content-hash image cache
+# ---------------------------------------------------------------------------
+def worker_image_hash() -> str:
+    """SHA-256 over the worker image inputs, the SDK version and this recipe."""
+    h = hashlib.sha256()
+    h.update(PI_SDK_PACKAGE.encode())
+    h.update(Path(__file__).read_bytes())
+    for path in WORKER_IMAGE_INPUTS:
+        h.update(b"\0" + str(path.relative_to(REPO_ROOT)).encode())
+        if path.is_file():
+            h.update(path.read_bytes())
+        elif path.is_dir():
+            for f in sorted(p for p in path.rglob("*") if p.is_file()):
+                h.update(b"\0" + str(f.relative_to(path)).encode() + b"\0")
+                h.update(f.read_bytes())
+        else:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def _load_image_cache() -> dict:
+    try:
+        with open(IMAGE_CACHE_PATH) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_image_cache(cache: dict):
+    # Keep the newest entries; write-then-rename so concurrent spawners
+    # never read a torn file.
+    newest = sorted(cache.items(), key=lambda kv: kv[1].get("usedAt", 0), reverse=True)
+    cache = dict(newest[:IMAGE_CACHE_MAX_ENTRIES])
+    try:
+        IMAGE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = IMAGE_CACHE_PATH.with_name(f"{IMAGE_CACHE_PATH.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, IMAGE_CACHE_PATH)
+    except OSError:
+        pass
+
+
+def resolve_worker_image(app: modal.App, rebuild: bool = False) -> tuple[modal.Image, dict]:
+    """
+    Return the worker image, reusing the cached image id when the inputs
+    are unchanged; otherwise build it eagerly in *app* and record its id.
+
+    Returns:
+        (image, info) where info has ``hash``, ``imageId``, ``hit``,
+        ``resolveS`` (this call) and ``buildS`` (when the image was built).
+    """
+    t0 = time.time()
+    key = worker_image_hash()
+    cache = _load_image_cache()
+    entry = cache.get(key)
+
+    if entry and not rebuild:
+        image = modal.Image.from_id(entry["imageId"])
+        try:
+            image.hydrate()  # cheap id lookup; fails if the image is gone
+        except Exception:
+            entry = None
+        else:
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["usedAt"] = time.time()
+            _save_image_cache(cache)
+            return image, {
+                "hash": key,
+                "imageId": entry["imageId"],
+                "hit": True,
+                "resolveS": round(time.time() - t0, 3),
+                "buildS": entry.get("buildS"),
+            }
+
+    t1 = time.time()
+    image = create_worker_image().build(app)
+    build_s = round(time.time() - t1, 3)
+    cache[key] = {
+        "imageId": image.object_id,
+        "sdk": PI_SDK_PACKAGE,
+        "builtAt": time.time(),
+        "usedAt": time.time(),
+        "buildS": build_s,
+        "hits": 0,
+    }
+    _save_image_cache(cache)
+    return image, {
+        "hash": key,
+        "imageId": image.object_id,
+        "hit": False,
+        "resolveS": round(time.time() - t0, 3),
+        "buildS": build_s,
+    }
+
+
 # Standalone: test image build
 # Usage: modal run infra/sandbox_image.py
 app = modal.App("sandbox-image-test")
@@ -170,3 +310,52 @@ def main():
         detail = info.get("version", info.get("error", "unknown"))
         print(f"  {status} {tool}: {detail}")
     print("==================================\n")
+
+
+# ---------------------------------------------------------------------------
+# CLI: python infra/sandbox_image.py
+# ---------------------------------------------------------------------------
+def cli():
+    ap = argparse.ArgumentParser(description="Resolve the worker image through the content-hash cache")
+    ap.add_argument("--rebuild", action="store_true", help="Ignore the cached image id and build")
+    ap.add_argument("--hash-only", action="store_true", help="Print the content hash and cache state, no Modal calls")
+    ap.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = ap.parse_args()
+
+    t0 = time.time()
+    key = worker_image_hash()
+    hash_s = time.time() - t0
+    cache = _load_image_cache()
+
+    if args.hash_only:
+        entry = cache.get(key)
+        info = {"hash": key, "hashS": round(hash_s, 3), "cached": entry is not None, **(entry or {})}
+    else:
+        build_app = modal.App.lookup("agentswarm", create_if_missing=True)
+        with modal.enable_output():
+            _, info = resolve_worker_image(build_app, rebuild=args.rebuild)
+        info["hashS"] = round(hash_s, 3)
+        info["hits"] = _load_image_cache().get(key, {}).get("hits", 0)
+
+    if args.json:
+        print(json.dumps(info))
+        return
+
+    print(f"worker image  {key[:16]}  (hashed inputs in {hash_s * 1000:.0f} ms)")
+    print(f"  cache file  {IMAGE_CACHE_PATH}")
+    if args.hash_only:
+        state = f"cached as {info['imageId']}" if info["cached"] else "not cached"
+        print(f"  state       {state}")
+    else:
+        state = "hit" if info["hit"] else "miss (built)"
+        print(f"  state       {state}, image {info['imageId']}, resolved in {info['resolveS']:.1f}s")
+        print(f"  hits        {info['hits']}")
+    if info.get("buildS") is not None:
+        print(f"  build time  {info['buildS']:.1f}s")
+    others = [k for k in cache if k != key]
+    if others:
+        print(f"  {len(others)} older entr{'y' if len(others) == 1 else 'ies'} in cache")
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,224 @@
+"""
+Sandbox Parking — keep finished sandboxes for conflict-resolution follow-ups
+============================================================================
+
+When a worker's branch later fails to merge, the orchestrator creates a
+conflict-resolution task for the same branch (``conflictSourceBranch``).
+Without parking that task pays for a new sandbox, a clone, a fetch of the
+branch and a dependency restore, although the sandbox that produced the
+branch finished minutes earlier.
+
+With parking, ``run_task`` hands a finished sandbox that pushed its branch
+to ``SandboxParking`` instead of terminating it.  A conflict-resolution
+task for that branch claims it and only runs ``git fetch origin main`` and
+the rebase (see ``SandboxSession.resume_step``).
+
+Parked sandboxes are terminated when:
+
+    ttl        parked longer than ``ttl`` seconds
+    capacity   more than ``max_parked`` are parked (oldest first)
+    memory     host MemAvailable below ``min_free_mb`` (oldest first,
+               local backend only: its sandboxes are worktrees on this
+               machine, while Modal ones use no host memory)
+    lifetime   too little of the sandbox's own timeout is left for a task
+
+Parking lives in the calling process, so like the warm pool it only pays
+off for long-lived callers (infra/spawner_daemon.py).
+
+Usage:
+    from infra.sandbox_parking import SandboxParking
+
+    parking = SandboxParking(ttl=600)
+    parking.start()                      # background TTL/memory reaper
+    result = await run_task_async(payload, parking=parking)
+    print(parking.stats())               # {"parked": 3, "hits": 1, ...}
+    await parking.close()
+
+Configuration (env vars, overridable per instance):
+    SANDBOX_PARK_TTL          seconds a finished sandbox stays parked (default 0 = off)
+    SANDBOX_PARK_MAX          sandboxes parked at once (default 16)
+    SANDBOX_PARK_MIN_FREE_MB  evict while host MemAvailable is below this (default 2048)
+"""
+
+import asyncio
+import os
+import time
+
+from infra.sandbox_backends import SandboxSession
+from infra.sandbox_pool import TASK_TIMEOUT
+
+PARK_TTL = float(os.environ.get("SANDBOX_PARK_TTL", "0"))
+PARK_MAX = int(os.environ.get("SANDBOX_PARK_MAX", "16"))
+PARK_MIN_FREE_MB = int(os.environ.get("SANDBOX_PARK_MIN_FREE_MB", "2048"))
+
+
+def _available_mb() -> float | None:
+    """Host MemAvailable in MiB, or None where /proc/meminfo is missing."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class ParkedSandbox:
+    def __init__(self, key: str, session: SandboxSession):
+        self.key = key
+        self.session = session
+        self.parked_at = time.time()
+
+    @property
+    def parked_s(self) -> float:
+        return time.time() - self.parked_at
+
+
+class SandboxParking:
+    """
+    Finished sandboxes keyed by (repo, branch), waiting for a follow-up task.
+
+    Args:
+        ttl:         Seconds a sandbox may stay parked
+        max_parked:  Sandboxes parked at once
+        min_free_mb: Evict local sandboxes oldest-first while host
+                     MemAvailable is below this
+    """
+
+    def __init__(
+        self,
+        ttl: float = PARK_TTL,
+        max_parked: int = PARK_MAX,
+        min_free_mb: int = PARK_MIN_FREE_MB,
+    ):
+        self.ttl = ttl
+        self.max_parked = max_parked
+        self.min_free_mb = min_free_mb
+
+        self.parked_total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = {"ttl": 0, "capacity": 0, "memory": 0, "lifetime": 0, "replaced": 0}
+
+        # Insertion order is parking order, so the first entry is the oldest.
+        self._parked: dict[str, ParkedSandbox] = {}
+        self._reaper: asyncio.Task | None = None
+
+    @staticmethod
+    def key(repo_url: str, branch: str) -> str:
+        return f"{repo_url}#{branch}"
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self):
+        """Start the background reaper (needs a running event loop)."""
+        if self.enabled and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def close(self):
+        """Stop reaping and terminate everything still parked."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        parked = list(self._parked.values())
+        self._parked.clear()
+        await asyncio.gather(*(self._terminate(p.session) for p in parked))
+
+    # -- park / claim --------------------------------------------------------
+
+    async def park(self, repo_url: str, branch: str, session: SandboxSession) -> bool:
+        """Keep *session* for a follow-up on *branch*; False if it was
+        terminated instead (parking off or too little lifetime left)."""
+        if not self.enabled or session.remaining_s < TASK_TIMEOUT:
+            if self.enabled:
+                self.evicted["lifetime"] += 1
+            await self._terminate(session)
+            return False
+        key = self.key(repo_url, branch)
+        stale = []
+        previous = self._parked.pop(key, None)
+        if previous is not None:
+            self.evicted["replaced"] += 1
+            stale.append(previous)
+        self._parked[key] = ParkedSandbox(key, session)
+        self.parked_total += 1
+        stale += self._evict()
+        await asyncio.gather(*(self._terminate(p.session) for p in stale))
+        return key in self._parked
+
+    async def claim(self, repo_url: str, branch: str) -> ParkedSandbox | None:
+        """Take the parked sandbox for *branch*, or None (a miss)."""
+        if not self.enabled:
+            return None
+        stale = self._evict()
+        parked = self._parked.pop(self.key(repo_url, branch), None)
+        if parked is not None and parked.session.remaining_s < TASK_TIMEOUT:
+            self.evicted["lifetime"] += 1
+            stale.append(parked)
+            parked = None
+        if parked is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        await asyncio.gather(*(self._terminate(p.session) for p in stale))
+        return parked
+
+    async def discard(self, repo_url: str, branch: str) -> None:
+        """Terminate a parked sandbox a fresh task for *branch* makes obsolete."""
+        parked = self._parked.pop(self.key(repo_url, branch), None)
+        if parked is not None:
+            self.evicted["replaced"] += 1
+            await self._terminate(parked.session)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "parked": len(self._parked),
+            "parkedTotal": self.parked_total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else 0.0,
+            "evicted": dict(self.evicted),
+        }
+
+    # -- eviction ------------------------------------------------------------
+
+    def _evict(self) -> list[ParkedSandbox]:
+        """Remove and return entries past TTL, over capacity or under memory pressure."""
+        stale = [p for p in self._parked.values() if p.parked_s > self.ttl]
+        self.evicted["ttl"] += len(stale)
+        for p in stale:
+            del self._parked[p.key]
+
+        while len(self._parked) > self.max_parked:
+            stale.append(self._parked.pop(next(iter(self._parked))))
+            self.evicted["capacity"] += 1
+
+        # Only sandboxes on this machine free host memory when terminated.
+        local = next((p for p in self._parked.values() if p.session.uses_host_memory), None)
+        if local is not None and self.min_free_mb > 0:
+            available = _available_mb()
+            # One eviction per pass: freeing a sandbox takes a moment to show up.
+            if available is not None and available < self.min_free_mb:
+                stale.append(self._parked.pop(local.key))
+                self.evicted["memory"] += 1
+        return stale
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(min(30.0, max(1.0, self.ttl / 4)))
+            stale = self._evict()
+            await asyncio.gather(*(self._terminate(p.session) for p in stale))
+
+    @staticmethod
+    async def _terminate(session: SandboxSession):
+        try:
+            await session.terminate()
+        except Exception:
+            pass
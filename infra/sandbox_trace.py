@@ -0,0 +1,116 @@
+"""
+Sandbox Tracing — span records in the orchestrator's trace NDJSON schema
+========================================================================
+
+``run_task`` gets a propagation context (``{"traceId", "parentSpanId"}``)
+in its payload from the orchestrator's ``worker.execute`` span.  Spans
+opened here are written as ``[trace] {json}`` progress lines; the worker
+pool appends them to ``logs/trace-*.ndjson`` unchanged, so sandbox phases
+show up next to planner and merge spans with the same fields:
+
+    {"timestamp": 1771130913775,
+     "trace": {"traceId": "...", "spanId": "...", "parentSpanId": "..."},
+     "spanName": "sandbox.clone", "spanKind": "end", "spanStatus": "ok",
+     "attributes": {...}, "taskId": "task-001", "agentId": "sandbox",
+     "durationMs": 3120}
+
+Without a propagation context every call is a no-op.
+
+Usage:
+    from infra.sandbox_trace import SandboxTracer
+
+    tracer = SandboxTracer(payload.get("trace"), task_id, emit)
+    root = tracer.begin("sandbox.run")
+    span = tracer.begin("sandbox.create", parent=root)
+    ...
+    span.end()
+    # A phase timed elsewhere (e.g. inside the sandbox):
+    tracer.record("sandbox.clone", start_ms, duration_ms, parent=root)
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable
+
+TRACE_PREFIX = "[trace] "
+AGENT_ID = "sandbox"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class SandboxSpan:
+    def __init__(self, tracer: "SandboxTracer", name: str, parent_span_id: str | None,
+                 attrs: dict | None = None, start_ms: int | None = None):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = _span_id()
+        self.parent_span_id = parent_span_id
+        self.start_ms = _now_ms() if start_ms is None else start_ms
+        self.attrs = dict(attrs or {})
+        self.ended = False
+
+    def set_attributes(self, attrs: dict):
+        self.attrs.update(attrs)
+
+    def end(self, status: str = "ok", attrs: dict | None = None, end_ms: int | None = None):
+        """Emit the "end" record; idempotent."""
+        if self.ended:
+            return
+        self.ended = True
+        if attrs:
+            self.attrs.update(attrs)
+        end_ms = _now_ms() if end_ms is None else end_ms
+        self.tracer._write(self, "end", end_ms, status=status, duration_ms=end_ms - self.start_ms)
+
+
+class SandboxTracer:
+    """Emit span records parented to the orchestrator's propagated context."""
+
+    def __init__(self, context: dict | None, task_id: str, emit: Callable[[str], None]):
+        context = context or {}
+        self.trace_id = context.get("traceId")
+        self.parent_span_id = context.get("parentSpanId")
+        self.task_id = task_id
+        self.emit = emit
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.trace_id)
+
+    def begin(self, name: str, parent: SandboxSpan | None = None, attrs: dict | None = None,
+              start_ms: int | None = None) -> SandboxSpan:
+        span = SandboxSpan(self, name, parent.span_id if parent else self.parent_span_id, attrs, start_ms)
+        self._write(span, "begin", span.start_ms)
+        return span
+
+    def record(self, name: str, start_ms: int, duration_ms: int, parent: SandboxSpan | None = None,
+               status: str = "ok", attrs: dict | None = None) -> SandboxSpan:
+        """Emit begin and end for a span whose timing was measured elsewhere."""
+        span = self.begin(name, parent=parent, attrs=attrs, start_ms=start_ms)
+        span.end(status=status, end_ms=start_ms + duration_ms)
+        return span
+
+    def _write(self, span: SandboxSpan, kind: str, timestamp: int,
+               status: str | None = None, duration_ms: int | None = None):
+        if not self.enabled:
+            return
+        trace = {"traceId": self.trace_id, "spanId": span.span_id}
+        if span.parent_span_id:
+            trace["parentSpanId"] = span.parent_span_id
+        record = {"timestamp": timestamp, "trace": trace, "spanName": span.name, "spanKind": kind}
+        if status:
+            record["spanStatus"] = status
+        if span.attrs:
+            record["attributes"] = {k: v for k, v in span.attrs.items() if isinstance(v, (str, int, float, bool))}
+        record["taskId"] = self.task_id
+        record["agentId"] = AGENT_ID
+        if duration_ms is not None:
+            record["durationMs"] = duration_ms
+        self.emit(TRACE_PREFIX + json.dumps(record, separators=(",", ":")))
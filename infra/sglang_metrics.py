@@ -0,0 +1,255 @@
+"""
+SGLang Metrics — async scraper of the inference server's /metrics
+=================================================================
+
+infra/config.yaml starts SGLang with ``enable-metrics``, which serves
+Prometheus text at ``/metrics`` on the inference port.  ``SGLangScraper``
+polls one or more servers and reduces each scrape to the numbers that say
+whether the model server is the swarm's bottleneck:
+
+    running      requests decoding           sglang:num_running_reqs
+    queued       requests waiting to run     sglang:num_queue_reqs
+    kvUsage      KV-cache fraction in use    sglang:token_usage
+    genTps       generation tokens/sec       sglang:gen_throughput, else the
+                                             rate of sglang:generation_tokens_total
+
+Series with several label sets (e.g. one per DP rank) are summed, except
+``kvUsage`` which takes the fullest rank.  A queue that stays non-empty, or
+a KV cache near full, means workers wait on the model rather than on
+sandboxes.
+
+Usage:
+    from infra.sglang_metrics import SGLangScraper
+
+    scraper = SGLangScraper(["https://...modal.direct"], interval=5)
+    sample = await scraper.scrape()          # one poll of every server
+    await scraper.run(on_sample)             # poll until cancelled
+
+    python infra/sglang_metrics.py http://127.0.0.1:8000   # print samples
+
+Configuration (env vars):
+    SGLANG_METRICS_URL       comma-separated server URLs ("/metrics" is appended
+                             unless the URL already has a path)
+    SGLANG_METRICS_INTERVAL  seconds between polls (default 5)
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+import aiohttp
+
+METRICS_URLS = [u.strip() for u in os.environ.get("SGLANG_METRICS_URL", "").split(",") if u.strip()]
+METRICS_INTERVAL = float(os.environ.get("SGLANG_METRICS_INTERVAL", "5"))
+
+# Summary field -> SGLang metric (without the "sglang:" prefix).
+GAUGES = {
+    "running": "num_running_reqs",
+    "queued": "num_queue_reqs",
+    "kvUsage": "token_usage",
+    "genTps": "gen_throughput",
+}
+GENERATION_COUNTER = "generation_tokens_total"
+
+
+# ---------------------------------------------------------------------------
+# Prometheus text format
+# ---------------------------------------------------------------------------
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)")
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_prometheus(text: str) -> dict[str, list[tuple[dict[str, str], float]]]:
+    """Samples by metric name: ``{name: [(labels, value), ...]}``.
+
+    Comments, malformed lines and unparsable values are skipped; the
+    optional trailing timestamp is ignored.
+    """
+    metrics: dict[str, list[tuple[dict[str, str], float]]] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        try:
+            number = float(value)
+        except ValueError:
+            continue
+        parsed = {k: v.replace('\\"', '"').replace("\\\\", "\\") for k, v in _LABEL.findall(labels or "")}
+        metrics.setdefault(name, []).append((parsed, number))
+    return metrics
+
+
+def _values(metrics: dict, name: str) -> list[float]:
+    # Older SGLang releases export "sglang_" instead of "sglang:".
+    samples = metrics.get(f"sglang:{name}") or metrics.get(f"sglang_{name}") or []
+    return [v for _, v in samples if v == v]  # drop NaN
+
+
+def metrics_url(url: str) -> str:
+    """``url`` itself if it has a path, else its ``/metrics``."""
+    return url if urlsplit(url).path not in ("", "/") else f"{url.rstrip('/')}/metrics"
+
+
+# ---------------------------------------------------------------------------
+# Scraper
+# ---------------------------------------------------------------------------
+class ServerState:
+    """Last scrape of one server."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.running = 0.0
+        self.queued = 0.0
+        self.kv_usage: float | None = None
+        self.gen_tps: float | None = None
+        self.error: str | None = None
+        self.scraped_at: float | None = None
+        self._gen_tokens: tuple[float, float] | None = None   # (monotonic, counter)
+
+    @property
+    def up(self) -> bool:
+        return self.scraped_at is not None and self.error is None
+
+    def update(self, metrics: dict):
+        now = time.monotonic()
+        self.running = sum(_values(metrics, GAUGES["running"]))
+        self.queued = sum(_values(metrics, GAUGES["queued"]))
+        kv = _values(metrics, GAUGES["kvUsage"])
+        self.kv_usage = max(kv) if kv else None
+
+        gauge = _values(metrics, GAUGES["genTps"])
+        counter = _values(metrics, GENERATION_COUNTER)
+        total = sum(counter) if counter else None
+        if gauge:
+            self.gen_tps = sum(gauge)
+        elif total is not None and self._gen_tokens is not None:
+            t0, n0 = self._gen_tokens
+            # A counter that went down means the server restarted.
+            self.gen_tps = max(0.0, total - n0) / (now - t0) if now > t0 and total >= n0 else None
+        else:
+            self.gen_tps = None
+        if total is not None:
+            self._gen_tokens = (now, total)
+        self.error = None
+        self.scraped_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "up": self.up,
+            "running": self.running,
+            "queued": self.queued,
+            "kvUsage": self.kv_usage,
+            "genTps": round(self.gen_tps, 1) if self.gen_tps is not None else None,
+            "error": self.error,
+        }
+
+
+class SGLangScraper:
+    """
+    Poll SGLang ``/metrics`` on one or more servers.
+
+    Args:
+        urls:     Server base URLs or full metrics URLs (default: ``SGLANG_METRICS_URL``)
+        interval: Seconds between polls
+        timeout:  Seconds per scrape
+    """
+
+    def __init__(
+        self,
+        urls: list[str] | None = None,
+        interval: float = METRICS_INTERVAL,
+        timeout: float = 5.0,
+    ):
+        urls = urls if urls is not None else METRICS_URLS
+        if not urls:
+            raise ValueError("SGLangScraper requires at least one URL (set SGLANG_METRICS_URL)")
+        self.servers = [ServerState(metrics_url(u)) for u in urls]
+        self.interval = interval
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> "SGLangScraper":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _scrape_one(self, server: ServerState):
+        # Any failure is recorded on the server, not just network ones: an
+        # exception escaping here would end run() and its caller's thread.
+        try:
+            async with self._session.get(server.url, timeout=self.timeout) as resp:
+                resp.raise_for_status()
+                text = await resp.text()
+            server.update(parse_prometheus(text))
+        except Exception as e:
+            server.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            server.scraped_at = time.time()
+
+    async def scrape(self) -> dict:
+        """Poll every server once and return ``summary()``."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        await asyncio.gather(*(self._scrape_one(s) for s in self.servers))
+        return self.summary()
+
+    async def run(self, on_sample: Callable[[dict], None]):
+        """Scrape every ``interval`` seconds, handing each summary to
+        *on_sample*, until cancelled."""
+        try:
+            while True:
+                on_sample(await self.scrape())
+                await asyncio.sleep(self.interval)
+        finally:
+            await self.close()
+
+    def summary(self) -> dict:
+        """Totals over the servers that answered, plus each server's state."""
+        up = [s for s in self.servers if s.up]
+        kv = [s.kv_usage for s in up if s.kv_usage is not None]
+        tps = [s.gen_tps for s in up if s.gen_tps is not None]
+        return {
+            "timestamp": int(time.time() * 1000),
+            "intervalS": self.interval,
+            "up": len(up),
+            "servers": len(self.servers),
+            "running": sum(s.running for s in up),
+            "queued": sum(s.queued for s in up),
+            "kvUsage": max(kv) if kv else None,
+            "genTps": round(sum(tps), 1) if tps else None,
+            "endpoints": [s.to_dict() for s in self.servers],
+        }
+
+
+def main():
+    urls = sys.argv[1:] or METRICS_URLS
+    if not urls:
+        print("usage: python infra/sglang_metrics.py URL [URL ...]  (or set SGLANG_METRICS_URL)")
+        sys.exit(1)
+
+    async def poll():
+        await SGLangScraper(urls).run(lambda sample: print(json.dumps(sample), flush=True))
+
+    try:
+        asyncio.run(poll())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
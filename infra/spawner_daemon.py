@@ -0,0 +1,259 @@
+"""
+Sandbox Spawner Daemon — one long-lived process for every task
+==============================================================
+
+Runs ``run_task_async`` for many tasks concurrently on one asyncio loop, so
+interpreter startup, ``import modal``, ``App.lookup`` and the worker image
+definition are paid once per orchestrator run instead of once per task.
+
+Protocol: NDJSON, one object per line, over stdin/stdout (default) or a
+Unix socket (``--socket PATH``, one session per connection).
+
+    requests                                  responses
+    {"type":"run","id":ID,"payload":{...}}    {"type":"ready","pid":N}
+    {"type":"cancel","id":ID}                 {"type":"line","id":ID,"line":"[spawn] ..."}
+    {"type":"stats"}                          {"type":"result","id":ID,"result":{...}}
+                                              {"type":"error","id":ID,"error":"..."}
+                                              {"type":"stats",...}
+
+``id`` is chosen by the client and tagged on every response for that task,
+so the output of concurrent tasks can be demultiplexed.  ``line`` carries
+exactly what ``spawn_sandbox.py`` prints per task (``[spawn] ...`` and
+``[worker:ID] ...``); ``result`` is the handoff dict.  ``ready`` is sent
+once the Modal app and image are resolved (right away when
+``SANDBOX_BACKEND=local``).  Closing stdin (or the
+connection) cancels that session's tasks and terminates their sandboxes.
+
+Usage:
+    python infra/spawner_daemon.py                          # stdin/stdout
+    python infra/spawner_daemon.py --socket /tmp/agentswarm-spawner.sock
+    python infra/spawner_daemon.py --max-concurrency 50 --pool-size 4
+    python infra/spawner_daemon.py --park-ttl 600           # reuse sandboxes for conflict fixes
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from collections.abc import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infra.sandbox_pool import SandboxPool
+from infra.sandbox_backends import SANDBOX_BACKEND, modal_resources
+from infra.sandbox_parking import PARK_TTL, SandboxParking
+from infra.spawn_sandbox import failure_result, run_task_async
+
+# Task payloads embed the system prompt; allow lines far above asyncio's 64 KiB default.
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+
+# ---------------------------------------------------------------------------
+# Shared state
+# ---------------------------------------------------------------------------
+class Spawner:
+    """Concurrency limit, warm pools, parked sandboxes and counters shared
+    by all sessions."""
+
+    def __init__(self, max_concurrency: int, pool_size: int, park_ttl: float = 0):
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.pool_size = pool_size
+        self.pools: dict[str, SandboxPool] = {}
+        self.parking = SandboxParking(ttl=park_ttl)
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    async def pool_for(self, payload: dict) -> SandboxPool | None:
+        """Warm pool for the payload's repo, started on first use (Modal only)."""
+        if self.pool_size <= 0 or (payload.get("sandboxBackend") or SANDBOX_BACKEND) != "modal":
+            return None
+        repo_url = payload.get("repoUrl", "")
+        pool = self.pools.get(repo_url)
+        if pool is None:
+            # A cold lookup of the Modal app and image blocks; keep it off
+            # the loop every session's NDJSON traffic runs on.
+            resources = await asyncio.to_thread(modal_resources)
+            # Another session may have created the pool meanwhile.
+            pool = self.pools.get(repo_url)
+            if pool is None:
+                pool = SandboxPool(*resources, repo_url, payload.get("gitToken", ""), size=self.pool_size)
+                pool.start()
+                self.pools[repo_url] = pool
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "type": "stats",
+            "running": self.running,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "pools": {url: pool.stats() for url, pool in self.pools.items()},
+            "parking": self.parking.stats(),
+        }
+
+    async def close(self):
+        for pool in self.pools.values():
+            pool.close()
+        await self.parking.close()
+
+
+# ---------------------------------------------------------------------------
+# Session — one NDJSON conversation (stdin/stdout or a socket connection)
+# ---------------------------------------------------------------------------
+class Session:
+    def __init__(self, spawner: Spawner, write: Callable[[bytes], None]):
+        self.spawner = spawner
+        self._write = write
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    def send(self, msg: dict) -> None:
+        try:
+            self._write((json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def handle(self, raw: bytes) -> None:
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            msg = json.loads(raw)
+            kind = msg["type"]
+        except (ValueError, KeyError, TypeError) as e:
+            self.send({"type": "error", "error": f"bad request: {e}"})
+            return
+
+        rid = str(msg.get("id", ""))
+        if kind == "run":
+            if not rid or rid in self.tasks:
+                self.send({"type": "error", "id": rid, "error": "missing or duplicate id"})
+                return
+            self.tasks[rid] = asyncio.create_task(self._run(rid, msg.get("payload") or {}))
+        elif kind == "cancel":
+            task = self.tasks.get(rid)
+            if task is not None:
+                task.cancel()
+        elif kind == "stats":
+            self.send(self.spawner.stats())
+        else:
+            self.send({"type": "error", "id": rid, "error": f"unknown request type {kind!r}"})
+
+    async def _run(self, rid: str, payload: dict) -> None:
+        def emit(line: str) -> None:
+            self.send({"type": "line", "id": rid, "line": line})
+
+        try:
+            async with self.spawner.limit:
+                self.spawner.running += 1
+                try:
+                    result = await run_task_async(
+                        payload, pool=await self.spawner.pool_for(payload), emit=emit,
+                        parking=self.spawner.parking,
+                    )
+                finally:
+                    self.spawner.running -= 1
+            self.spawner.completed += 1
+            self.send({"type": "result", "id": rid, "result": result})
+        except asyncio.CancelledError:
+            self.spawner.cancelled += 1
+            self.send({"type": "error", "id": rid, "error": "cancelled"})
+        except Exception as e:
+            task_id = (payload.get("task") or {}).get("id", rid)
+            self.send({"type": "result", "id": rid, "result": failure_result(task_id, str(e))})
+        finally:
+            self.tasks.pop(rid, None)
+
+    async def serve(self, reader: asyncio.StreamReader) -> None:
+        """Handle requests until EOF, then cancel whatever is still running."""
+        self.send({"type": "ready", "pid": os.getpid()})
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    self.send({"type": "error", "error": "request line too long"})
+                    continue
+                if not line:
+                    break
+                self.handle(line)
+        finally:
+            tasks = list(self.tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+async def serve_stdio(spawner: Spawner) -> None:
+    # Keep the real stdout for the protocol; anything else that prints
+    # (Modal, warm-pool warnings) goes to stderr instead of corrupting it.
+    proto_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+    sys.stdout = sys.stderr
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    await Session(spawner, proto_out.write).serve(reader)
+
+
+async def serve_socket(spawner: Spawner, path: str) -> None:
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await Session(spawner, writer.write).serve(reader)
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(on_connect, path, limit=MAX_LINE_BYTES)
+    os.chmod(path, 0o600)
+    print(f"[spawner] listening on {path}", file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    spawner = Spawner(args.max_concurrency, args.pool_size, args.park_ttl)
+    spawner.parking.start()
+    if SANDBOX_BACKEND == "modal":
+        # Resolve once before "ready" rather than inside the first task.
+        await asyncio.to_thread(modal_resources)
+    loop = asyncio.get_running_loop()
+    serving = asyncio.create_task(
+        serve_socket(spawner, args.socket) if args.socket else serve_stdio(spawner)
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, serving.cancel)
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await spawner.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Long-lived Modal sandbox spawner")
+    ap.add_argument("--socket", metavar="PATH",
+                    help="Serve on a Unix socket instead of stdin/stdout")
+    ap.add_argument("--max-concurrency", type=int, default=int(os.environ.get("MAX_WORKERS", "50")),
+                    help="Sandboxes run at once (default: $MAX_WORKERS or 50)")
+    ap.add_argument("--pool-size", type=int, default=int(os.environ.get("SANDBOX_POOL_SIZE", "0")),
+                    help="Warm sandboxes kept per repo, 0 disables the pool "
+                         "(default: $SANDBOX_POOL_SIZE or 0)")
+    ap.add_argument("--park-ttl", type=float, default=PARK_TTL,
+                    help="Seconds a finished sandbox stays parked for a conflict-resolution "
+                         "follow-up on its branch, 0 disables (default: $SANDBOX_PARK_TTL or 0)")
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
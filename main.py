@@ -6,18 +6,25 @@ Usage:
     python main.py
     python main.py "Build a playable MVP of Minecraft"
     python main.py --dashboard          # also launch the Rich TUI
+    python main.py --bench              # pipe reader throughput on the bundled run log
 """
 from __future__ import annotations
 
 import argparse
-import json
+import glob
 import os
 import signal
 import subprocess
 import sys
+import threading
 import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 from datetime import datetime
-from typing import Any
+from typing import IO, Any
+
+from event_decoder import DecodeError, loads, peek_message
+from event_router import EventRouter
 
 DIM = "\033[2m"
 RESET = "\033[0m"
@@ -56,6 +63,18 @@ DEBUG_TRUNCATE_LIMIT = 2000
 
 debug_mode = False
 
+# Bytes per read from the orchestrator pipe.  Lines longer than this grow the
+# buffer; everything else is split in place.
+READ_CHUNK = 64 * 1024
+
+# Dashboard tee: bytes buffered for a slow dashboard before the overflow
+# policy kicks in, and the messages it sheds first (see DashboardTee).
+TEE_BUFFER_BYTES = 4 * 1024 * 1024
+TEE_DROP = ("Worker progress",)
+TEE_COALESCE = ("Metrics",)
+# Multiple of the buffer size at which even lifecycle lines are dropped.
+TEE_HARD_FACTOR = 4
+
 
 def format_ts(epoch_ms: int) -> str:
     dt = datetime.fromtimestamp(epoch_ms / 1000)
@@ -181,7 +200,241 @@ def format_run_summary(
     return "\n".join(lines)
 
 
-def run(request: str, with_dashboard: bool = False, reset: bool = False, debug: bool = False) -> int:
+# ---------------------------------------------------------------------------
+# Pipe reader
+# ---------------------------------------------------------------------------
+
+class LineReader:
+    """Split a byte stream into lines using a single reusable buffer.
+
+    Each read fills the buffer with ``readinto``; complete lines are handed
+    out as memoryview slices of it, so nothing is copied on the way to the
+    JSON parser.  A yielded line (newline stripped) is only valid until the
+    next one is requested.
+
+    ``on_block`` receives the raw bytes of every run of complete lines right
+    after it is read -- one call per read rather than per line, which is what
+    the dashboard tee wants.
+    """
+
+    def __init__(
+        self,
+        stream: IO[bytes],
+        chunk_size: int = READ_CHUNK,
+        on_block: Callable[[memoryview], None] | None = None,
+    ):
+        # readinto1 returns after one raw read instead of waiting for a full
+        # buffer; unbuffered (raw) streams only have readinto, which does the same.
+        self._readinto = getattr(stream, "readinto1", None) or stream.readinto
+        self._buf = bytearray(chunk_size)
+        self._view = memoryview(self._buf)
+        self.on_block = on_block
+        self.bytes_read = 0
+        self.lines_read = 0
+
+    def __iter__(self) -> Iterator[memoryview]:
+        buf, view = self._buf, self._view
+        filled = 0
+        while True:
+            if filled == len(buf):
+                # A single line fills the buffer: grow into a fresh one (a
+                # bytearray with exported views cannot be resized).
+                buf = bytearray(len(buf) * 2)
+                buf[:filled] = view
+                view = memoryview(buf)
+            n = self._readinto(view[filled:])
+            if not n:
+                break
+            self.bytes_read += n
+            scan = filled
+            filled += n
+            last = buf.rfind(b"\n", scan, filled)
+            if last < 0:
+                continue
+
+            end = last + 1
+            if self.on_block is not None:
+                self.on_block(view[:end])
+            start = 0
+            while start < end:
+                nl = buf.find(b"\n", start, end)
+                self.lines_read += 1
+                yield view[start:nl]
+                start = nl + 1
+
+            # Slide the partial tail to the front (same-size assignment is
+            # allowed while views are exported).  The source would be a view
+            # of the same buffer overlapping the target, and slice assignment
+            # only promises a plain copy, so copy the tail out first -- it is
+            # at most one partial line.
+            filled -= end
+            buf[:filled] = bytes(view[end:end + filled])
+
+        if filled:
+            if self.on_block is not None:
+                self.on_block(view[:filled])
+            self.lines_read += 1
+            yield view[:filled]
+        self._buf, self._view = buf, view
+
+
+# ---------------------------------------------------------------------------
+# Dashboard tee
+# ---------------------------------------------------------------------------
+
+class DashboardTee:
+    """Forward raw orchestrator output to the dashboard without ever blocking.
+
+    ``write`` only appends to an in-memory buffer; a background thread does
+    the (possibly blocking) pipe writes.  Each line is classified once, as
+    it is appended, and lines that may be shed are also queued by tier.
+    When a slow or stalled dashboard lets the buffer grow past ``max_bytes``
+    (the high-water mark) it is shed, oldest lines first, down to half of
+    it (the low-water mark), in this order:
+
+    1. messages in ``drop`` ("Worker progress") are discarded;
+    2. messages in ``coalesce`` ("Metrics") keep only their latest line;
+    3. debug-level and non-JSON lines are discarded.
+
+    Task, merge and planner lifecycle events are only dropped, oldest
+    first, once the buffer still exceeds ``hard_max_bytes`` after that
+    (counted in ``lost``).  Shedding costs O(1) per dropped line, so a
+    full buffer never slows ``write`` down.
+    """
+
+    def __init__(
+        self,
+        pipe: IO[bytes],
+        max_bytes: int = TEE_BUFFER_BYTES,
+        drop: Iterable[str] = TEE_DROP,
+        coalesce: Iterable[str] = TEE_COALESCE,
+        hard_max_bytes: int | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.hard_max_bytes = hard_max_bytes or TEE_HARD_FACTOR * max_bytes
+        self.drop = frozenset(m.encode("utf-8") for m in drop)
+        self.coalesce = frozenset(m.encode("utf-8") for m in coalesce)
+        self.dropped = 0
+        self.coalesced = 0
+        self.lost = 0
+        self.broken = False
+        self._pipe = pipe
+        # Lines are one-item lists so shedding can blank them in place.
+        self._pending: deque[list[bytes]] = deque()
+        # Sheddable lines by tier (see class docstring), oldest first.
+        self._tiers: tuple[deque[list[bytes]], ...] = (deque(), deque(), deque())
+        # Coalesced message -> its latest pending line (not yet in a tier).
+        self._latest: dict[bytes, list[bytes]] = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="dashboard-tee", daemon=True)
+        self._thread.start()
+
+    def write(self, block: bytes | memoryview) -> None:
+        data = bytes(block)  # LineReader reuses its buffer
+        with self._cond:
+            if self.broken or self._closed:
+                return
+            for line in data.splitlines(keepends=True):
+                self._append(line)
+            if self._size > self.max_bytes:
+                self._shed()
+            self._cond.notify()
+
+    def close(self, timeout: float | None = None) -> None:
+        """Flush what is buffered, then close the dashboard's stdin."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _append(self, line: bytes) -> None:
+        entry = [line]
+        self._pending.append(entry)
+        self._size += len(line)
+        msg = peek_message(line)[0] if line.startswith(b"{") else None
+        if msg in self.drop:
+            self._tiers[0].append(entry)
+        elif msg in self.coalesce:
+            previous = self._latest.get(msg)
+            if previous is not None:
+                self._tiers[1].append(previous)
+            self._latest[msg] = entry
+        elif msg is None or line.find(b'"level":"debug"', 0, 64) >= 0:
+            self._tiers[2].append(entry)
+
+    def _take(self) -> bytes:
+        data = b"".join(entry[0] for entry in self._pending)
+        self._pending.clear()
+        for tier in self._tiers:
+            tier.clear()
+        self._latest.clear()
+        self._size = 0
+        return data
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    break
+                data = self._take()
+            try:
+                self._pipe.write(data)
+                self._pipe.flush()
+            except (BrokenPipeError, OSError, ValueError):
+                with self._cond:
+                    self.broken = True
+                    self._take()
+                return
+        try:
+            self._pipe.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _shed(self) -> None:
+        target = self.max_bytes // 2
+        for n, tier in enumerate(self._tiers):
+            while tier and self._size > target:
+                entry = tier.popleft()
+                if not entry[0]:
+                    continue  # already lost to the hard cap below
+                self._size -= len(entry[0])
+                entry[0] = b""
+                if n == 1:
+                    self.coalesced += 1
+                else:
+                    self.dropped += 1
+
+        # Only lifecycle lines (and the latest coalesced ones) are left.
+        # Evicted entries are blanked like shed ones, and one still current
+        # in _latest is forgotten there, so _append never queues it as the
+        # superseded line and its bytes are only subtracted once.
+        while self._size > self.hard_max_bytes and self._pending:
+            entry = self._pending.popleft()
+            if not entry[0]:
+                continue
+            self._size -= len(entry[0])
+            entry[0] = b""
+            self.lost += 1
+            for msg, latest in self._latest.items():
+                if latest is entry:
+                    del self._latest[msg]
+                    break
+
+
+def run(
+    request: str,
+    with_dashboard: bool = False,
+    reset: bool = False,
+    debug: bool = False,
+    dashboard_buffer: int = TEE_BUFFER_BYTES,
+    dashboard_drop: Iterable[str] = TEE_DROP,
+    dashboard_coalesce: Iterable[str] = TEE_COALESCE,
+    router_stats: bool = False,
+) -> int:
     global debug_mode
     debug_mode = debug
 
@@ -215,28 +468,68 @@ def run(request: str, with_dashboard: bool = False, reset: bool = False, debug:
         stderr=subprocess.STDOUT,
         cwd=project_root,
         env=env,
+        bufsize=0,
     )
     assert proc.stdout is not None
 
     dashboard_proc: subprocess.Popen[bytes] | None = None
+    tee: DashboardTee | None = None
     if with_dashboard:
         dashboard_proc = subprocess.Popen(
             [sys.executable, os.path.join(project_root, "dashboard.py"), "--stdin"],
             stdin=subprocess.PIPE,
             cwd=project_root,
         )
+        assert dashboard_proc.stdin is not None
+        tee = DashboardTee(
+            dashboard_proc.stdin, dashboard_buffer, dashboard_drop, dashboard_coalesce,
+        )
 
     last_metrics: dict[str, Any] | None = None
     run_files: dict[str, str] | None = None
     start_time = time.time()
     last_was_metrics = False
 
+    router = EventRouter("cli")
+
+    @router.on("Run files")
+    def on_run_files(entry: dict[str, Any], data: dict[str, Any]) -> None:
+        nonlocal run_files, last_was_metrics
+        run_files = data
+        print(f"  {DIM}Log:{RESET}     {format_file_link(data.get('logFile', ''))}")
+        print(f"  {DIM}Traces:{RESET}  {format_file_link(data.get('traceFile', ''))}")
+        print(f"  {DIM}LLM:{RESET}     {format_file_link(data.get('llmDetailFile', ''))}")
+        print()
+        last_was_metrics = False
+
+    @router.on("Final summary")
+    def on_final_summary(entry: dict[str, Any], data: dict[str, Any]) -> None:
+        nonlocal last_metrics, run_files
+        last_metrics = data
+        run_files = {
+            k: data[k] for k in ("logFile", "traceFile", "llmDetailFile") if k in data
+        }
+
+    @router.on("Metrics")
+    def on_metrics(entry: dict[str, Any], data: dict[str, Any]) -> None:
+        nonlocal last_metrics, last_was_metrics
+        last_metrics = data
+        elapsed = int(time.time() - start_time)
+        m, s = divmod(elapsed, 60)
+        h, m = divmod(m, 60)
+        time_str = f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+        sys.stdout.write(f"\r{DIM}[{time_str}]{RESET}{format_metrics_bar(data)}    ")
+        sys.stdout.flush()
+        last_was_metrics = True
+
     def shutdown(signum: int | None = None, frame: Any = None) -> None:
         if last_was_metrics:
             print()
         print(f"\n{YELLOW}⏹ Shutting down…{RESET}")
         elapsed = int(time.time() - start_time)
         print(format_run_summary(last_metrics, elapsed, run_files))
+        if router_stats:
+            print(f"{DIM}{router.report()}{RESET}")
         proc.terminate()
         try:
             proc.wait(timeout=10)
@@ -249,21 +542,16 @@ def run(request: str, with_dashboard: bool = False, reset: bool = False, debug:
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
 
-    for raw_line in iter(proc.stdout.readline, b""):
-        line = raw_line.decode("utf-8", errors="replace").rstrip()
-        if not line:
-            continue
-
-        if dashboard_proc and dashboard_proc.stdin:
-            try:
-                dashboard_proc.stdin.write(raw_line)
-                dashboard_proc.stdin.flush()
-            except BrokenPipeError:
-                dashboard_proc = None
-
+    reader = LineReader(proc.stdout, on_block=tee.write if tee else None)
+    for raw_line in reader:
         try:
-            entry: dict[str, Any] = json.loads(line)
-        except json.JSONDecodeError:
+            entry: Any = loads(raw_line)
+        except DecodeError:
+            entry = None
+        if not isinstance(entry, dict):
+            line = str(raw_line, "utf-8", "replace").rstrip()
+            if not line:
+                continue
             if last_was_metrics:
                 print()
                 last_was_metrics = False
@@ -272,32 +560,7 @@ def run(request: str, with_dashboard: bool = False, reset: bool = False, debug:
 
         msg: str = entry.get("message", "")
         data: dict[str, Any] = entry.get("data", {})
-
-        if msg == "Run files":
-            run_files = data
-            print(f"  {DIM}Log:{RESET}     {format_file_link(data.get('logFile', ''))}")
-            print(f"  {DIM}Traces:{RESET}  {format_file_link(data.get('traceFile', ''))}")
-            print(f"  {DIM}LLM:{RESET}     {format_file_link(data.get('llmDetailFile', ''))}")
-            print()
-            last_was_metrics = False
-            continue
-
-        if msg == "Final summary":
-            last_metrics = data
-            run_files = {
-                k: data[k] for k in ("logFile", "traceFile", "llmDetailFile") if k in data
-            }
-            continue
-
-        if msg == "Metrics":
-            last_metrics = data
-            elapsed = int(time.time() - start_time)
-            m, s = divmod(elapsed, 60)
-            h, m = divmod(m, 60)
-            time_str = f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
-            sys.stdout.write(f"\r{DIM}[{time_str}]{RESET}{format_metrics_bar(data)}    ")
-            sys.stdout.flush()
-            last_was_metrics = True
+        if router.route(msg, entry, data):
             continue
 
         if last_was_metrics:
@@ -309,13 +572,19 @@ def run(request: str, with_dashboard: bool = False, reset: bool = False, debug:
     proc.wait()
     exit_code = proc.returncode
 
-    if dashboard_proc and dashboard_proc.stdin:
-        dashboard_proc.stdin.close()
-        dashboard_proc.wait()
-
     if last_was_metrics:
         print()
 
+    if tee and dashboard_proc:
+        if tee.dropped or tee.coalesced or tee.lost:
+            print(f"{DIM}Dashboard fell behind: dropped {tee.dropped:,} lines, "
+                  f"coalesced {tee.coalesced:,}{RESET}")
+            if tee.lost:
+                print(f"{YELLOW}Dashboard buffer hit its hard limit: "
+                      f"{tee.lost:,} lifecycle lines lost{RESET}")
+        tee.close()
+        dashboard_proc.wait()
+
     elapsed = int(time.time() - start_time)
 
     if exit_code == 0:
@@ -325,21 +594,148 @@ def run(request: str, with_dashboard: bool = False, reset: bool = False, debug:
 
     print(format_run_summary(last_metrics, elapsed, run_files))
     print()
+    if router_stats:
+        print(f"{DIM}{router.report()}{RESET}")
+        print()
     return exit_code
 
 
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+# Child process that writes the log ``copies`` times to stdout, standing in for
+# the orchestrator so its CPU is not counted against the reader.
+_FEEDER = (
+    "import sys\n"
+    "data = open(sys.argv[1], 'rb').read()\n"
+    "for _ in range(int(sys.argv[2])):\n"
+    "    sys.stdout.buffer.write(data)\n"
+)
+
+
+def bench(path: str, target_lines: int = 100_000) -> None:
+    """Compare the per-line readline loop with LineReader on a replayed log.
+
+    Both paths parse every line and forward it to a /dev/null "dashboard";
+    formatting and terminal output are left out.  Reports wall-clock
+    throughput and process CPU time per 100k lines.
+    """
+    with open(path, "rb") as fh:
+        per_copy = fh.read().count(b"\n") or 1
+    copies = -(-target_lines // per_copy)
+
+    def feeder(bufsize: int) -> subprocess.Popen[bytes]:
+        return subprocess.Popen(
+            [sys.executable, "-c", _FEEDER, path, str(copies)],
+            stdout=subprocess.PIPE,
+            bufsize=bufsize,
+        )
+
+    def readline_loop(sink: IO[bytes]) -> tuple[int, int]:
+        proc = feeder(-1)
+        assert proc.stdout is not None
+        lines = nbytes = 0
+        for raw_line in iter(proc.stdout.readline, b""):
+            nbytes += len(raw_line)
+            line = raw_line.decode("utf-8", errors="replace").rstrip()
+            if not line:
+                continue
+            sink.write(raw_line)
+            sink.flush()
+            try:
+                loads(raw_line)
+            except DecodeError:
+                pass
+            lines += 1
+        proc.wait()
+        return lines, nbytes
+
+    def line_reader_loop(sink: IO[bytes]) -> tuple[int, int]:
+        proc = feeder(0)
+        assert proc.stdout is not None
+
+        def forward(block: memoryview) -> None:
+            sink.write(block)
+            sink.flush()
+
+        reader = LineReader(proc.stdout, on_block=forward)
+        lines = 0
+        for raw_line in reader:
+            try:
+                loads(raw_line)
+            except DecodeError:
+                continue
+            lines += 1
+        proc.wait()
+        return lines, reader.bytes_read
+
+    print(f"{BOLD}Pipe reader benchmark{RESET}  {DIM}{path} x{copies}{RESET}")
+    for label, loop in (
+        ("readline + per-line flush", readline_loop),
+        ("LineReader + batched write", line_reader_loop),
+    ):
+        with open(os.devnull, "wb") as sink:
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            lines, nbytes = loop(sink)
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+        per_100k = cpu * 100_000 / max(lines, 1)
+        print(
+            f"  {label:28s} {lines:>8,} lines  "
+            f"{lines / wall:>10,.0f} lines/s  {nbytes / wall / 1e6:6.1f} MB/s  "
+            f"{CYAN}{per_100k * 1000:7.1f} ms CPU / 100k lines{RESET}"
+        )
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="AgentSwarm CLI")
-    ap.add_argument("request", help="Build request, e.g. 'Build Minecraft according to SPEC.md'")
+    ap.add_argument("request", nargs="?",
+                    help="Build request, e.g. 'Build Minecraft according to SPEC.md'")
     ap.add_argument("--dashboard", action="store_true",
                     help="Also launch the Rich TUI dashboard")
     ap.add_argument("--reset", action="store_true",
                     help="Reset target repo to initial commit before running")
     ap.add_argument("--debug", action="store_true",
                     help="Enable debug logging (LOG_LEVEL=debug, verbose output)")
+    ap.add_argument("--dashboard-buffer", type=int, default=TEE_BUFFER_BYTES // 1024,
+                    metavar="KB",
+                    help="Output buffered for a slow dashboard before it is shed "
+                         f"(default: {TEE_BUFFER_BYTES // 1024})")
+    ap.add_argument("--dashboard-drop", action="append", default=[], metavar="MESSAGE",
+                    help="Also drop this message first when the dashboard falls "
+                         f"behind (repeatable; always: {', '.join(TEE_DROP)})")
+    ap.add_argument("--dashboard-coalesce", action="append", default=[], metavar="MESSAGE",
+                    help="Also keep only the latest line of this message when the "
+                         f"dashboard falls behind (repeatable; always: {', '.join(TEE_COALESCE)})")
+    ap.add_argument("--router-stats", action="store_true",
+                    help="Print per-message call counts and handler time at the end")
+    ap.add_argument("--bench", nargs="?", const="", metavar="NDJSON",
+                    help="Benchmark the orchestrator pipe reader on a log "
+                         "(default: bundled run log) instead of running")
+    ap.add_argument("--bench-lines", type=int, default=100_000,
+                    help="Lines to replay in --bench mode (default: 100000)")
     args = ap.parse_args()
 
-    sys.exit(run(args.request, args.dashboard, args.reset, args.debug))
+    if args.bench is not None:
+        path = args.bench or next(iter(sorted(glob.glob(os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "gource", "terminal-logs", "run-*.ndjson",
+        )))), "")
+        if not path:
+            ap.error("--bench: no log given and no bundled run-*.ndjson found")
+        bench(path, args.bench_lines)
+        return
+    if not args.request:
+        ap.error("the following arguments are required: request")
+
+    sys.exit(run(
+        args.request, args.dashboard, args.reset, args.debug,
+        dashboard_buffer=args.dashboard_buffer * 1024,
+        dashboard_drop=TEE_DROP + tuple(args.dashboard_drop),
+        dashboard_coalesce=TEE_COALESCE + tuple(args.dashboard_coalesce),
+        router_stats=args.router_stats,
+    ))
 
 
 if __name__ == "__main__":
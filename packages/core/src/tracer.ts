@@ -276,6 +276,14 @@ export function createTracer(traceId?: string): Tracer {
   return new Tracer(traceId);
 }
 
+/**
+ * Append a span event recorded by another process (e.g. a sandbox spawner
+ * that received this run's propagation context) to the trace file as-is.
+ */
+export function writeSpanEvent(event: SpanEvent): void {
+  traceWriter.write(event);
+}
+
 /**
  * Write full LLM request/response detail to the LLM detail log.
  * Correlates with a span via spanId.
@@ -52,6 +52,7 @@ describe("config", () => {
       assert.strictEqual(config.sandbox.idleTimeout, 300);
       assert.strictEqual(config.targetRepoPath, "./target-repo");
       assert.strictEqual(config.pythonPath, "python3");
+      assert.strictEqual(config.sandboxSpawner, "process");
       assert.strictEqual(config.healthCheckInterval, 10);
       assert.strictEqual(config.readinessTimeoutMs, 120_000);
     });
@@ -74,6 +75,7 @@ describe("config", () => {
       SANDBOX_IDLE_TIMEOUT: "600",
       TARGET_REPO_PATH: "/custom/path",
       PYTHON_PATH: "/usr/bin/python",
+      SANDBOX_SPAWNER: "daemon",
       HEALTH_CHECK_INTERVAL: "30",
     };
 
@@ -94,6 +96,7 @@ describe("config", () => {
       assert.strictEqual(config.sandbox.idleTimeout, 600);
       assert.strictEqual(config.targetRepoPath, "/custom/path");
       assert.strictEqual(config.pythonPath, "/usr/bin/python");
+      assert.strictEqual(config.sandboxSpawner, "daemon");
       assert.strictEqual(config.healthCheckInterval, 30);
     });
   });
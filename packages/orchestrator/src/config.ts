@@ -9,6 +9,8 @@ export interface FinalizationConfig {
 export interface OrchestratorConfig extends HarnessConfig {
   targetRepoPath: string;
   pythonPath: string;
+  /** How sandboxes are launched: one Python process per task, or a shared spawner daemon. */
+  sandboxSpawner: "process" | "daemon";
   healthCheckInterval: number;
   /** Max ms to wait for LLM endpoints to become ready at startup. 0 = skip probe. */
   readinessTimeoutMs: number;
@@ -105,6 +107,7 @@ export function loadConfig(): OrchestratorConfig {
     },
     targetRepoPath: process.env.TARGET_REPO_PATH || "./target-repo",
     pythonPath: process.env.PYTHON_PATH || "python3",
+    sandboxSpawner: process.env.SANDBOX_SPAWNER === "daemon" ? "daemon" : "process",
     healthCheckInterval: Number(process.env.HEALTH_CHECK_INTERVAL) || 10,
     readinessTimeoutMs: process.env.LLM_READINESS_TIMEOUT_MS
       ? Number(process.env.LLM_READINESS_TIMEOUT_MS)
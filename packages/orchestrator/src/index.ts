@@ -1,6 +1,7 @@
 export * from "./config.js";
 export * from "./task-queue.js";
 export * from "./worker-pool.js";
+export * from "./spawner-daemon.js";
 export * from "./merge-queue.js";
 export * from "./monitor.js";
 export * from "./llm-client.js";
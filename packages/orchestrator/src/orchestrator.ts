@@ -177,6 +177,7 @@ export async function createOrchestrator(
       git: config.git,
       pythonPath: config.pythonPath,
       gitToken: process.env.GIT_TOKEN,
+      spawner: config.sandboxSpawner,
     },
     workerPrompt,
   );
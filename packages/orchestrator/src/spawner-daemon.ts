@@ -0,0 +1,153 @@
+/**
+ * Spawner Daemon client — one long-lived Python process for all sandboxes
+ *
+ * Starts `infra/spawner_daemon.py` once and sends every task to it over
+ * NDJSON on stdin. The daemon runs the sandboxes concurrently and tags each
+ * output line with the request id, so per-task `[spawn]` / `[worker:ID]`
+ * lines and the final Handoff are demultiplexed here.
+ *
+ * Compared to one `python infra/spawn_sandbox.py` per task this skips the
+ * interpreter start, `import modal`, app lookup and image definition for
+ * every task after the first.
+ */
+
+import { spawn, type ChildProcess } from "node:child_process";
+import { createInterface } from "node:readline";
+import type { Handoff } from "@agentswarm/core";
+import { createLogger } from "@agentswarm/core";
+
+const logger = createLogger("spawner-daemon", "root-planner");
+
+interface DaemonMessage {
+  type: "ready" | "line" | "result" | "error" | "stats";
+  id?: string;
+  line?: string;
+  result?: Handoff;
+  error?: string;
+}
+
+interface PendingRun {
+  onLine: (line: string) => void;
+  resolve: (handoff: Handoff) => void;
+  reject: (err: Error) => void;
+}
+
+export class SpawnerDaemon {
+  private proc: ChildProcess | null = null;
+  private pending: Map<string, PendingRun> = new Map();
+  private counter = 0;
+  private stderrTail = "";
+
+  constructor(private pythonPath: string) {}
+
+  /**
+   * Run one sandbox task. `onLine` receives every progress line for it;
+   * resolves with the Handoff. Returns the request id for `cancel()`.
+   */
+  run(taskId: string, payload: string, onLine: (line: string) => void): { id: string; result: Promise<Handoff> } {
+    const id = `${taskId}#${++this.counter}`;
+    const result = new Promise<Handoff>((resolve, reject) => {
+      this.pending.set(id, { onLine, resolve, reject });
+    });
+    this.send(`{"type":"run","id":${JSON.stringify(id)},"payload":${payload}}`);
+    return { id, result };
+  }
+
+  /** Cancel a running request; the daemon terminates its sandbox. */
+  cancel(id: string): void {
+    const run = this.pending.get(id);
+    if (!run) return;
+    this.pending.delete(id);
+    run.reject(new Error(`Sandbox request ${id} cancelled`));
+    this.send(JSON.stringify({ type: "cancel", id }));
+  }
+
+  /** Close stdin; the daemon cancels what is left and exits. */
+  stop(): void {
+    if (!this.proc) return;
+    this.proc.stdin?.end();
+    this.proc = null;
+  }
+
+  private send(line: string): void {
+    const proc = this.ensureStarted();
+    proc.stdin!.write(line + "\n");
+  }
+
+  private ensureStarted(): ChildProcess {
+    if (this.proc) return this.proc;
+
+    const proc = spawn(this.pythonPath, ["-u", "infra/spawner_daemon.py"], {
+      cwd: process.cwd(),
+      env: { ...process.env, PYTHONUNBUFFERED: "1" },
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+    this.proc = proc;
+    logger.info("Spawner daemon started", { pid: proc.pid, pythonPath: this.pythonPath });
+
+    const rl = createInterface({ input: proc.stdout! });
+    rl.on("line", (line: string) => this.dispatch(line));
+
+    proc.stderr!.on("data", (chunk: Buffer) => {
+      this.stderrTail = (this.stderrTail + chunk.toString("utf-8")).slice(-2000);
+    });
+
+    const fail = (reason: string): void => {
+      if (this.proc === proc) this.proc = null;
+      const runs = [...this.pending.values()];
+      this.pending.clear();
+      if (runs.length > 0) {
+        logger.error("Spawner daemon exited with tasks in flight", {
+          reason,
+          inFlight: runs.length,
+          stderr: this.stderrTail.slice(-800),
+        });
+      }
+      for (const run of runs) {
+        run.reject(new Error(`Spawner daemon ${reason}`));
+      }
+    };
+    proc.on("close", (code: number | null) => fail(`exited with code ${code}`));
+    proc.on("error", (err: Error) => fail(`failed: ${err.message}`));
+    proc.stdin!.on("error", () => {});
+
+    return proc;
+  }
+
+  private dispatch(line: string): void {
+    let msg: DaemonMessage;
+    try {
+      msg = JSON.parse(line) as DaemonMessage;
+    } catch {
+      logger.debug("Spawner daemon output", { line: line.slice(0, 200) });
+      return;
+    }
+
+    if (msg.type === "ready") {
+      logger.debug("Spawner daemon ready");
+      return;
+    }
+
+    const run = msg.id ? this.pending.get(msg.id) : undefined;
+    if (!run) {
+      if (msg.type === "error") {
+        logger.warn("Spawner daemon error", { id: msg.id, error: msg.error });
+      }
+      return;
+    }
+
+    switch (msg.type) {
+      case "line":
+        run.onLine(msg.line ?? "");
+        break;
+      case "result":
+        this.pending.delete(msg.id!);
+        run.resolve(msg.result as Handoff);
+        break;
+      case "error":
+        this.pending.delete(msg.id!);
+        run.reject(new Error(msg.error ?? "Spawner daemon error"));
+        break;
+    }
+  }
+}
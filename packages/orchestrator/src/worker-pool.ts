@@ -10,12 +10,17 @@
  * stdout from spawn_sandbox.py is streamed line-by-line so that intermediate
  * worker logs (tool calls, progress, etc.) are re-emitted as NDJSON "Worker progress"
  * events in real-time — visible in the dashboard while agents are running.
+ *
+ * With `spawner: "daemon"` (SANDBOX_SPAWNER=daemon) tasks are instead sent to
+ * one long-lived infra/spawner_daemon.py process (see spawner-daemon.ts);
+ * the same lines arrive multiplexed by task and are handled identically.
  */
 
 import { spawn } from "node:child_process";
 import { createInterface } from "node:readline";
-import type { Task, Handoff, HarnessConfig, Tracer, Span } from "@agentswarm/core";
-import { createLogger } from "@agentswarm/core";
+import type { Task, Handoff, HarnessConfig, Tracer, Span, SpanEvent } from "@agentswarm/core";
+import { createLogger, writeSpanEvent } from "@agentswarm/core";
+import { SpawnerDaemon } from "./spawner-daemon.js";
 
 const logger = createLogger("worker-pool", "root-planner");
 
@@ -35,12 +40,14 @@ export class WorkerPool {
     git: HarnessConfig["git"];
     pythonPath: string;
     gitToken?: string;
+    spawner?: "process" | "daemon";
   };
   private tracer: Tracer | null = null;
   private taskCompleteCallbacks: ((handoff: Handoff) => void)[];
   private workerFailedCallbacks: ((taskId: string, error: Error) => void)[];
   private activeToolCalls: Map<string, number>;
   private timedOutBranches: string[] = [];
+  private daemon: SpawnerDaemon | null = null;
 
   constructor(
     config: {
@@ -50,6 +57,7 @@ export class WorkerPool {
       git: HarnessConfig["git"];
       pythonPath: string;
       gitToken?: string;
+      spawner?: "process" | "daemon";
     },
     workerPrompt: string,
   ) {
@@ -59,6 +67,9 @@ export class WorkerPool {
     this.taskCompleteCallbacks = [];
     this.workerFailedCallbacks = [];
     this.activeToolCalls = new Map();
+    if (config.spawner === "daemon") {
+      this.daemon = new SpawnerDaemon(config.pythonPath);
+    }
   }
 
   setTracer(tracer: Tracer): void {
@@ -69,13 +80,18 @@ export class WorkerPool {
    * No-op — ephemeral model has no persistent sandboxes to start.
    */
   async start(): Promise<void> {
-    logger.info("Worker pool ready (ephemeral mode)", { maxWorkers: this.config.maxWorkers });
+    logger.info("Worker pool ready (ephemeral mode)", {
+      maxWorkers: this.config.maxWorkers,
+      spawner: this.daemon ? "daemon" : "process",
+    });
   }
 
   /**
-   * No-op — ephemeral sandboxes self-terminate after each task.
+   * Ephemeral sandboxes self-terminate after each task; only the spawner
+   * daemon (if used) needs shutting down.
    */
   async stop(): Promise<void> {
+    this.daemon?.stop();
     logger.info("Worker pool stopped", { activeCount: this.activeWorkers.size });
   }
 
@@ -116,7 +132,9 @@ export class WorkerPool {
     logger.debug("Sandbox payload prepared", { taskId: task.id, endpointName: endpoint.name, model: this.config.llm.model, payloadSize: payload.length, hasTraceCtx: !!traceCtx });
 
     try {
-      const handoff = await this.runSandboxStreaming(task.id, task.branch, payload, workerSpan);
+      const handoff = this.daemon
+        ? await this.runSandboxDaemon(this.daemon, task.id, task.branch, payload, workerSpan)
+        : await this.runSandboxStreaming(task.id, task.branch, payload, workerSpan);
 
       for (const cb of this.taskCompleteCallbacks) {
         cb(handoff);
@@ -192,20 +210,7 @@ export class WorkerPool {
 
       rl.on("line", (line: string) => {
         stdoutLines.push(line);
-        this.forwardWorkerLine(taskId, line);
-
-        if (workerSpan) {
-          const lower = line.toLowerCase();
-          if (lower.includes("sandbox created")) {
-            workerSpan.event("sandbox.created");
-          } else if (lower.includes("repo cloned")) {
-            workerSpan.event("sandbox.cloned");
-          } else if (lower.includes("starting worker agent")) {
-            workerSpan.event("sandbox.workerStarted");
-          } else if (lower.includes("pushed branch")) {
-            workerSpan.event("sandbox.pushed");
-          }
-        }
+        this.handleSandboxLine(taskId, line, workerSpan);
       });
 
       proc.stderr!.on("data", (chunk: Buffer) => {
@@ -262,6 +267,72 @@ export class WorkerPool {
     });
   }
 
+  private runSandboxDaemon(
+    daemon: SpawnerDaemon,
+    taskId: string,
+    branchName: string,
+    payload: string,
+    workerSpan?: Span,
+  ): Promise<Handoff> {
+    const { id, result } = daemon.run(taskId, payload, (line: string) => {
+      this.handleSandboxLine(taskId, line, workerSpan);
+    });
+    logger.debug("Sandbox task sent to spawner daemon", { taskId, requestId: id, timeoutSec: this.config.workerTimeout });
+
+    let timer: NodeJS.Timeout | undefined;
+    const timeout = new Promise<never>((_, reject) => {
+      timer = setTimeout(() => {
+        this.timedOutBranches.push(branchName);
+        logger.error("Worker timed out", {
+          taskId,
+          branch: branchName,
+          timeoutSec: this.config.workerTimeout,
+        });
+        reject(
+          new Error(
+            `Sandbox timed out after ${this.config.workerTimeout}s for task ${taskId}`,
+          ),
+        );
+        // After reject() so the race settles with the timeout, not the cancel.
+        daemon.cancel(id);
+      }, this.config.workerTimeout * 1000);
+    });
+
+    return Promise.race([result, timeout]).finally(() => clearTimeout(timer));
+  }
+
+  private handleSandboxLine(taskId: string, line: string, workerSpan?: Span): void {
+    // Sandbox phase spans (infra/sandbox_trace.py) go straight to the trace file.
+    if (line.startsWith("[trace] ")) {
+      try {
+        writeSpanEvent(JSON.parse(line.slice(8)) as SpanEvent);
+      } catch {
+        logger.debug("Malformed sandbox trace line", { taskId, line: line.slice(0, 200) });
+      }
+      return;
+    }
+
+    this.forwardWorkerLine(taskId, line);
+
+    if (workerSpan) {
+      const lower = line.toLowerCase();
+      if (lower.includes("sandbox created")) {
+        workerSpan.event("sandbox.created");
+      } else if (lower.includes("repo cloned")) {
+        // "[spawn] repo cloned for task X (blobless, 3.2s)"
+        const clone = line.match(/\(([^,()]+),[^()]*?([\d.]+)s\)\s*$/);
+        workerSpan.event(
+          "sandbox.cloned",
+          clone ? { strategy: clone[1], cloneMs: Math.round(parseFloat(clone[2]) * 1000) } : undefined,
+        );
+      } else if (lower.includes("starting worker agent")) {
+        workerSpan.event("sandbox.workerStarted");
+      } else if (lower.includes("pushed branch")) {
+        workerSpan.event("sandbox.pushed");
+      }
+    }
+  }
+
   private forwardWorkerLine(taskId: string, line: string): void {
     if (line.startsWith("{")) {
       logger.debug("Worker JSON output", { taskId, line: line.slice(0, 300) });
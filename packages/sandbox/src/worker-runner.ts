@@ -19,9 +19,11 @@ import {
   SettingsManager,
 } from "@mariozechner/pi-coding-agent";
 
-const TASK_PATH = "/workspace/task.json";
-const RESULT_PATH = "/workspace/result.json";
-const WORK_DIR = "/workspace/repo";
+// /workspace in a Modal sandbox; the local backend points this at a per-task temp dir.
+const WORKSPACE_DIR = process.env.WORKSPACE_DIR || "/workspace";
+const TASK_PATH = `${WORKSPACE_DIR}/task.json`;
+const RESULT_PATH = `${WORKSPACE_DIR}/result.json`;
+const WORK_DIR = `${WORKSPACE_DIR}/repo`;
 
 const ARTIFACT_PATTERNS = [
   /^node_modules\//,
@@ -60,7 +62,7 @@ function isArtifact(filePath: string): boolean {
  * so writing our worker instructions here keeps them separate from any
  * AGENTS.md that already exists in the target repo (both get loaded).
  */
-const WORKER_AGENTS_MD_PATH = "/workspace/AGENTS.md";
+const WORKER_AGENTS_MD_PATH = `${WORKSPACE_DIR}/AGENTS.md`;
 
 /**
  * All 7 built-in Pi tools — gives workers full filesystem and search
@@ -131,7 +133,7 @@ export async function runWorker(): Promise<void> {
   const { task, systemPrompt, llmConfig } = payload;
   log(`Task: ${task.id} — ${task.description.slice(0, 80)}`);
 
-  enableTracing("/workspace");
+  enableTracing(WORKSPACE_DIR);
   let workerSpan: Span | undefined;
   if (payload.trace) {
     const tracer = Tracer.fromPropagated(payload.trace);
@@ -147,7 +149,7 @@ export async function runWorker(): Promise<void> {
   // any AGENTS.md in the target repo itself get loaded and concatenated.
   if (systemPrompt) {
     writeFileSync(WORKER_AGENTS_MD_PATH, systemPrompt, "utf-8");
-    log("Worker instructions written to /workspace/AGENTS.md");
+    log(`Worker instructions written to ${WORKER_AGENTS_MD_PATH}`);
   }
 
   const authStorage = new AuthStorage();